@@ -0,0 +1,53 @@
+"""Benchmark aggregating the cut variables of the static problem.
+
+Compares the number of binary variables and the solve time of the static
+MILP with one cut variable per product edge against one cut variable per
+physical transition, on the getting started example and a reduced package
+delivery case study.
+
+Usage: python benchmarks/aggregation.py [--packages 2] [--time-limit 300]
+"""
+import argparse
+from floras.components.product import sync_prod
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+from examples import getting_started, package_delivery
+
+
+def run(transys, sys_aut, prod_aut, aggregate, time_limit):
+    virtual = sync_prod(transys, prod_aut)
+    virtual_sys = sync_prod(transys, sys_aut)
+    GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case='static')
+    milp = MILP(GD, SD, 'static', callback=None, aggregate=aggregate)
+    milp.setup_model()
+    milp.model.Params.OutputFlag = 0
+    milp.model.Params.TimeLimit = time_limit
+    milp.solve_problem()
+    d, flow, _ = milp.parse_solution()
+    return milp.model.NumBinVars, milp.model.Runtime, flow, len(d)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--packages", type=int, default=2)
+    parser.add_argument("--time-limit", type=float, default=300)
+    args = parser.parse_args()
+
+    instances = [
+        ('getting_started', getting_started),
+        ('package_delivery', lambda: package_delivery(args.packages)),
+    ]
+    print(f'{"instance":>17} {"aggregate":>10} {"bin vars":>9} {"solve [s]":>10} '
+          f'{"flow":>6} {"cuts":>6}')
+    for name, build in instances:
+        transys, sys_aut, prod_aut = build()
+        for aggregate in [False, True]:
+            n_bin, runtime, flow, ncuts = run(
+                transys, sys_aut, prod_aut, aggregate, args.time_limit
+            )
+            print(f'{name:>17} {str(aggregate):>10} {n_bin:>9} {runtime:>10.3f} '
+                  f'{str(flow):>6} {str(ncuts):>6}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark translating spot automata into Automaton objects.
+
+Compares the single-pass reader on the spot graph (read_spot_automaton)
+against the previous approach of re-serializing the automaton to a hoa
+string for every attribute.
+
+Usage: python benchmarks/automaton_construction.py
+"""
+import time
+import spot
+from floras.components.automata import (
+    Automaton,
+    read_spot_automaton,
+    count_automaton_states,
+    get_initial_state,
+    get_transitions,
+    get_APs,
+    get_hoa_body,
+    get_state_str,
+    read_state,
+)
+
+
+def hoa_acc_states(spot_aut):
+    acc_states = []
+    for line in get_hoa_body(spot_aut):
+        if 'State:' in line:
+            parse_line = line.split()
+            if len(parse_line) > 2:
+                acc_states.append(read_state(parse_line[1]))
+    return acc_states
+
+
+def automaton_from_hoa(spot_aut):
+    nstates = count_automaton_states(spot_aut)
+    Q = [get_state_str(k) for k in range(nstates)]
+    qinit = get_initial_state(spot_aut)
+    tau = get_transitions(spot_aut)
+    AP = get_APs(spot_aut)
+    Acc = {'test': [get_state_str(s) for s in hoa_acc_states(spot_aut)]}
+    return Automaton(Q, qinit, AP, tau, Acc)
+
+
+def automaton_from_graph(spot_aut):
+    Q, qinit, tau, AP, acc_states = read_spot_automaton(spot_aut)
+    Acc = {'test': [get_state_str(s) for s in acc_states]}
+    return Automaton(Q, qinit, AP, tau, Acc)
+
+
+def tester_formula(n_aps):
+    """Visit n_aps/2 waypoints in order, each guarded by a pair of APs."""
+    aps = ['p' + str(k) for k in range(n_aps)]
+    pairs = ['(' + aps[k] + ' | ' + aps[k + 1] + ')' for k in range(0, n_aps - 1, 2)]
+    formula = pairs[-1]
+    for pair in reversed(pairs[:-1]):
+        formula = pair + ' & F(' + formula + ')'
+    return 'F(' + formula + ')'
+
+
+def timeit(fn, arg, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print(f'{"APs":>4} {"states":>7} {"edges":>7} {"hoa [s]":>10} '
+          f'{"graph [s]":>10} {"speedup":>8}')
+    for n_aps in [10, 14, 18, 22, 26, 30]:
+        spot_aut = spot.translate(
+            tester_formula(n_aps), 'Buchi', 'state-based', 'complete'
+        )
+        aut_hoa = automaton_from_hoa(spot_aut)
+        aut_graph = automaton_from_graph(spot_aut)
+        assert aut_hoa.Q == aut_graph.Q
+        assert aut_hoa.qinit == aut_graph.qinit
+        assert aut_hoa.Acc == aut_graph.Acc
+        assert [str(ap) for ap in aut_hoa.ap] == [str(ap) for ap in aut_graph.ap]
+        assert len(aut_hoa.delta) == len(aut_graph.delta)
+
+        t_hoa = timeit(automaton_from_hoa, spot_aut)
+        t_graph = timeit(automaton_from_graph, spot_aut)
+        print(f'{n_aps:>4} {spot_aut.num_states():>7} {spot_aut.num_edges():>7} '
+              f'{t_hoa:>10.4f} {t_graph:>10.4f} {t_hoa / t_graph:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark the Gurobi and HiGHS backends on the bundled examples.
+
+Solves the static and reactive problems of the getting started example and
+a reduced package delivery case study with both backends and reports the
+model build time, the solve time and the solution (flow and number of cuts).
+
+Usage: python benchmarks/backends.py [--packages 2] [--time-limit 300]
+       [--backends gurobi highs]
+"""
+import argparse
+from floras.components.product import sync_prod
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+from floras.optimization.backends import BACKENDS
+from examples import getting_started, package_delivery
+
+
+def run(virtual, virtual_sys, prod_aut, case, backend, time_limit):
+    GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case=case)
+    milp = MILP(GD, SD, case, callback=None, backend=backend)
+    milp.setup_model()
+    if milp.model is not None:
+        milp.model.Params.OutputFlag = 0
+    milp.solve_problem(time_limit=time_limit)
+    d, flow, _ = milp.parse_solution()
+    return milp.build_time, milp.data["runtime"], milp.data["status"], flow, len(d)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--packages", type=int, default=2)
+    parser.add_argument("--time-limit", type=float, default=300)
+    parser.add_argument("--backends", nargs="+", default=BACKENDS, choices=BACKENDS)
+    args = parser.parse_args()
+
+    instances = [
+        ('getting_started', getting_started),
+        ('package_delivery', lambda: package_delivery(args.packages)),
+    ]
+    print(f'{"instance":>17} {"case":>9} {"backend":>8} {"build [s]":>10} '
+          f'{"solve [s]":>10} {"status":>10} {"flow":>6} {"cuts":>6}')
+    for name, build in instances:
+        transys, sys_aut, prod_aut = build()
+        virtual = sync_prod(transys, prod_aut)
+        virtual_sys = sync_prod(transys, sys_aut)
+        for case in ['static', 'reactive']:
+            for backend in args.backends:
+                t_build, t_solve, status, flow, ncuts = run(
+                    virtual, virtual_sys, prod_aut, case, backend, args.time_limit
+                )
+                print(f'{name:>17} {case:>9} {backend:>8} {t_build:>10.3f} '
+                      f'{t_solve:>10.3f} {status:>10} {str(flow):>6} {ncuts:>6}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Benchmark the Benders decomposition of the reactive problem.
+
+Solves the reactive problem on square grids with the MILP and with the
+Benders decomposition for several numbers of worker processes, and reports
+the run times, the objectives, the Benders bound, the number of master
+iterations and the optimality and reachability cuts added to the master.
+
+Usage: python benchmarks/benders.py [--sizes 3 4] [--workers 1 2 4] [--time-limit 300]
+"""
+import argparse
+import time
+from floras.components.product import sync_prod
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+from floras.optimization.benders import BendersDecomposition
+from grids import grid_problem
+
+
+def run_milp(GD, SD, time_limit):
+    milp = MILP(GD, SD, 'reactive', callback=None)
+    milp.setup_model()
+    milp.model.Params.OutputFlag = 0
+    milp.solve_problem(time_limit=time_limit)
+    return milp.model.Runtime, milp.model.ObjVal
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3, 4])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--time-limit", type=float, default=300)
+    args = parser.parse_args()
+
+    rows = []
+    for size in args.sizes:
+        transys, sys_aut, prod_aut = grid_problem(size)
+        virtual = sync_prod(transys, prod_aut)
+        virtual_sys = sync_prod(transys, sys_aut)
+        GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case='reactive')
+        t_solve, objective = run_milp(GD, SD, args.time_limit)
+        rows.append((size, 'milp', t_solve, objective, '', '', ''))
+        for workers in args.workers:
+            milp = MILP(GD, SD, 'reactive', callback=None)
+            start = time.time()
+            decomposition = BendersDecomposition(milp, workers)
+            result = decomposition.solve(args.time_limit)
+            t_solve = time.time() - start
+            cuts = decomposition.n_cuts
+            rows.append((
+                size, f'benders/{workers}', t_solve, result.objective,
+                f'{result.bound:.4f}', result.iterations,
+                f'{cuts["optimality"]}/{cuts["feasibility"]}'
+            ))
+
+    print(f'{"grid":>5} {"solver":>11} {"time [s]":>10} {"objective":>10} '
+          f'{"bound":>8} {"iters":>6} {"cuts":>8}')
+    for size, name, t_solve, objective, bound, iterations, cuts in rows:
+        print(f'{size:>5} {name:>11} {t_solve:>10.3f} {objective:>10.4f} '
+              f'{bound:>8} {str(iterations):>6} {cuts:>8}')
+
+
+if __name__ == '__main__':
+    main()
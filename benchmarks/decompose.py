@@ -0,0 +1,67 @@
+"""Benchmark the decomposition by automaton layers on grid worlds.
+
+Solves the static and reactive problems on square grids with the monolithic
+model and with the decomposition, and reports the automaton layers, the path
+taken by the decomposition, the run times and the objectives.
+
+Usage: python benchmarks/decompose.py [--sizes 3 4 6] [--time-limit 300]
+"""
+import argparse
+import contextlib
+import io
+import time
+from floras.components.product import sync_prod
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+from floras.optimization.decompose import LayerDecomposition, solve_decomposed
+from grids import grid_problem
+
+
+def objective(GD, d_vals, flow):
+    # the cut penalty of the whole graph
+    return flow - len(d_vals) / GD.compact.without_self_loops().number_of_edges()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3, 4, 6])
+    parser.add_argument("--time-limit", type=float, default=300)
+    args = parser.parse_args()
+
+    print(f'{"grid":>5} {"case":>9} {"solver":>11} {"time [s]":>10} '
+          f'{"objective":>10}  path')
+    for size in args.sizes:
+        transys, sys_aut, prod_aut = grid_problem(size)
+        virtual = sync_prod(transys, prod_aut)
+        virtual_sys = sync_prod(transys, sys_aut)
+        for case in ['static', 'reactive']:
+            GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case=case)
+            layers = ' '.join(
+                f'{size["nodes"]}/{size["edges"]}'
+                for size in LayerDecomposition(GD).sizes()
+            )
+            with contextlib.redirect_stdout(io.StringIO()) as log:
+                start = time.time()
+                milp = MILP(GD, SD, case, callback=None)
+                d_vals, flow, _ = milp.optimize(time_limit=args.time_limit)
+                t_mono = time.time() - start
+                start = time.time()
+                d_dec, flow_dec, exit_status = solve_decomposed(
+                    GD, SD, case, time_limit=args.time_limit, callback=None
+                )
+                t_dec = time.time() - start
+            print(f'{size:>5} {case:>9} {"monolithic":>11} {t_mono:>10.3f} '
+                  f'{objective(GD, d_vals, flow):>10.4f}  layers {layers}')
+            if exit_status != 'opt':
+                # the last line of the decomposition names the reason
+                reason = [line for line in log.getvalue().splitlines()
+                          if line.startswith('decomposition:')][-1]
+                print(f'{size:>5} {case:>9} {"decomposed":>11} {t_dec:>10.3f} '
+                      f'{"":>10}  fallback ({reason[len("decomposition: "):]})')
+            else:
+                print(f'{size:>5} {case:>9} {"decomposed":>11} {t_dec:>10.3f} '
+                      f'{objective(GD, d_dec, flow_dec):>10.4f}  certified')
+
+
+if __name__ == '__main__':
+    main()
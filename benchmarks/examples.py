@@ -0,0 +1,62 @@
+"""Bundled examples (getting started and package delivery) shared by the
+benchmarks."""
+import os
+import sys
+from floras.components.transition_system import TransitionSystemInput, TranSys
+from floras.components.automata import (
+    get_system_automaton,
+    get_tester_automaton,
+    get_product_automaton
+)
+from floras.components.grid import Grid
+from floras.components.utils import get_states_and_transitions_from_file
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def automata(sys_formula, test_formula):
+    sys_aut, spot_aut_sys = get_system_automaton(sys_formula)
+    _, spot_aut_test = get_tester_automaton(test_formula)
+    prod_aut = get_product_automaton(spot_aut_sys, spot_aut_test)
+    return sys_aut, prod_aut
+
+
+def getting_started():
+    """Transition system and automata of the getting started example."""
+    gridfile = os.path.join(ROOT, 'examples', 'getting_started', 'gridworld.txt')
+    states, transitions = get_states_and_transitions_from_file(gridfile)
+    labels = {
+        (2, 0): ['I'], (0, 2): ['I'], (2, 4): ['I'],
+        (0, 0): ['T'], (0, 4): ['T']
+    }
+    transys = TranSys(TransitionSystemInput(states, transitions, labels, [(2, 2)]))
+    sys_aut, prod_aut = automata('F(T)', 'F(I)')
+    return transys, sys_aut, prod_aut
+
+
+def package_delivery(n_packages):
+    """
+    Transition system and automata of the package delivery case study,
+    reduced to the first n_packages packages.
+    """
+    case_dir = os.path.join(ROOT, 'case_studies', 'package_delivery')
+    sys.path.append(case_dir)
+    from package_delivery import build_transition_system_automatic
+
+    packagelocs = {
+        (2, 2): 'p1', (2, 4): 'p2', (2, 6): 'p3', (2, 8): 'p4', (2, 10): 'p5'
+    }
+    packagegoals = {
+        (0, 5): 'p1', (0, 7): 'p2', (4, 9): 'p3', (0, 12): 'p4', (3, 12): 'p5'
+    }
+    packagelocs = {k: p for k, p in packagelocs.items() if int(p[1:]) <= n_packages}
+    packagegoals = {k: p for k, p in packagegoals.items() if int(p[1:]) <= n_packages}
+    grid = Grid(os.path.join(case_dir, 'grid.txt'))
+    transys = TranSys(build_transition_system_automatic(
+        grid, packagelocs, packagegoals, (3, 0), (0, 0)
+    ))
+    test_formula = 'p1d'
+    for k in range(2, n_packages + 1):
+        test_formula = 'p' + str(k) + 'd & F(' + test_formula + ')'
+    sys_aut, prod_aut = automata('F(goal)', 'F(' + test_formula + ')')
+    return transys, sys_aut, prod_aut
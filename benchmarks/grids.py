@@ -0,0 +1,35 @@
+"""Grid world transition systems shared by the benchmarks."""
+from floras.components.transition_system import TransitionSystemInput, TranSys
+from floras.components.automata import (
+    get_system_automaton,
+    get_tester_automaton,
+    get_product_automaton
+)
+
+
+def grid_transition_system_input(rows, cols=None):
+    """
+    Open rows x cols grid (four neighbors and staying in place), starting in
+    the bottom-left corner with the goal 'T' in the top-right corner and the
+    intermediate states 'I' in the two other corners.
+    """
+    cols = rows if cols is None else cols
+    states = [(i, j) for i in range(rows) for j in range(cols)]
+    transitions = {}
+    for i, j in states:
+        transitions[(i, j)] = [
+            (i + di, j + dj) for di, dj in [(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)]
+            if 0 <= i + di < rows and 0 <= j + dj < cols
+        ]
+    labels = {(0, cols - 1): ['T'], (0, 0): ['I'], (rows - 1, cols - 1): ['I']}
+    init = [(rows - 1, 0)]
+    return TransitionSystemInput(states, transitions, labels, init)
+
+
+def grid_problem(rows, cols=None, sys_formula='F(T)', test_formula='F(I)'):
+    """Transition system and automata for the grid benchmark problem."""
+    transys = TranSys(grid_transition_system_input(rows, cols))
+    sys_aut, spot_aut_sys = get_system_automaton(sys_formula)
+    test_aut, spot_aut_test = get_tester_automaton(test_formula)
+    prod_aut = get_product_automaton(spot_aut_sys, spot_aut_test)
+    return transys, sys_aut, prod_aut
@@ -0,0 +1,58 @@
+"""Benchmark the lazy reachability constraints of the reactive problem.
+
+Solves the reactive problem on square grids with one copy of the flow on S
+per history variable and entry node of S, and with the lazy reachability
+constraints, and reports the model size, Gurobi's peak memory, the build
+and solve times, the solution and the number of lazy constraints.
+
+Usage: python benchmarks/lazy.py [--sizes 3 4 5] [--time-limit 300]
+"""
+import argparse
+from floras.components.product import sync_prod
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+from grids import grid_problem
+
+
+def run(GD, SD, lazy, time_limit):
+    milp = MILP(GD, SD, 'reactive', callback=None, lazy=lazy)
+    milp.setup_model()
+    milp.model.Params.OutputFlag = 0
+    milp.solve_problem(time_limit=time_limit)
+    d, flow, _ = milp.parse_solution()
+    model = milp.model
+    return {
+        "vars": model.NumVars,
+        "constrs": model.NumConstrs,
+        "memory": model.MaxMemUsed,
+        "build": milp.build_time,
+        "solve": model.Runtime,
+        "flow": flow,
+        "cuts": len(d),
+        "lazy_cuts": milp.data.get("lazy_cuts", "-"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3, 4, 5])
+    parser.add_argument("--time-limit", type=float, default=300)
+    args = parser.parse_args()
+
+    print(f'{"grid":>6} {"lazy":>6} {"vars":>7} {"constrs":>8} {"mem [GB]":>9} '
+          f'{"build [s]":>10} {"solve [s]":>10} {"flow":>6} {"cuts":>5} '
+          f'{"lazy cuts":>10}')
+    for size in args.sizes:
+        transys, sys_aut, prod_aut = grid_problem(size)
+        virtual = sync_prod(transys, prod_aut)
+        virtual_sys = sync_prod(transys, sys_aut)
+        GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case='reactive')
+        for lazy in [False, True]:
+            r = run(GD, SD, lazy, args.time_limit)
+            print(f'{size:>6} {str(lazy):>6} {r["vars"]:>7} {r["constrs"]:>8} '
+                  f'{r["memory"]:>9.4f} {r["build"]:>10.3f} {r["solve"]:>10.3f} '
+                  f'{str(r["flow"]):>6} {r["cuts"]:>5} {str(r["lazy_cuts"]):>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Benchmark the min-cut solver against the MILP on grid worlds.
+
+Solves the static problem on square grids with the min-cut solver alone and
+with the MILP (with and without the min-cut MIP start), and reports the run
+times, the flows, the min-cut bound and the number of cuts.
+
+Usage: python benchmarks/mincut.py [--sizes 4 6 8] [--time-limit 300]
+"""
+import argparse
+import time
+from floras.components.product import sync_prod
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+from floras.optimization.mincut import mincut
+from grids import grid_problem
+
+
+def run_milp(GD, SD, start, time_limit):
+    milp = MILP(GD, SD, 'static', callback=None)
+    milp.setup_model()
+    milp.model.Params.OutputFlag = 0
+    if start is not None:
+        milp.set_start(start.f_vals, start.d_vals, start.m_vals)
+    milp.solve_problem(time_limit=time_limit)
+    d, flow, _ = milp.parse_solution()
+    return milp.data["runtime"], flow, len(d)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 6, 8])
+    parser.add_argument("--time-limit", type=float, default=300)
+    args = parser.parse_args()
+
+    print(f'{"size":>5} {"solver":>12} {"time [s]":>10} {"flow":>6} '
+          f'{"bound":>6} {"cuts":>6}')
+    for size in args.sizes:
+        transys, sys_aut, prod_aut = grid_problem(size)
+        virtual = sync_prod(transys, prod_aut)
+        virtual_sys = sync_prod(transys, sys_aut)
+        GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case='static')
+
+        start = time.time()
+        result = mincut(MILP(GD, SD, 'static', callback=None))
+        t_mincut = time.time() - start
+        print(f'{size:>5} {"mincut":>12} {t_mincut:>10.3f} {result.flow:>6} '
+              f'{result.bound:>6} {result.ncuts:>6}')
+        for name, warm in [('milp', None), ('milp+start', result)]:
+            t_solve, flow, ncuts = run_milp(GD, SD, warm, args.time_limit)
+            print(f'{size:>5} {name:>12} {t_solve:>10.3f} {str(flow):>6} '
+                  f'{"":>6} {ncuts:>6}')
+
+
+if __name__ == '__main__':
+    main()
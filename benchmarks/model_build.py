@@ -0,0 +1,52 @@
+"""Benchmark building the optimization model separately from solving it.
+
+Usage: python benchmarks/model_build.py [--case static|reactive]
+       [--assembly matrix|tupledict] [--sizes 5 10 20] [--time-limit 60]
+       [--no-solve]
+"""
+import argparse
+import time
+from floras.components.product import sync_prod
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+from grids import grid_problem
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--case", default="static", choices=["static", "reactive"])
+    parser.add_argument(
+        "--assembly", default="matrix", choices=["matrix", "tupledict"]
+    )
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 10, 15, 20])
+    parser.add_argument("--time-limit", type=float, default=60)
+    parser.add_argument("--no-solve", action="store_true")
+    args = parser.parse_args()
+
+    print(f'{"grid":>8} {"edges":>8} {"vars":>8} {"constrs":>9} {"setup [s]":>10} '
+          f'{"build [s]":>10} {"solve [s]":>10}')
+    for size in args.sizes:
+        transys, sys_aut, prod_aut = grid_problem(size)
+        virtual = sync_prod(transys, prod_aut)
+        virtual_sys = sync_prod(transys, sys_aut)
+
+        start = time.perf_counter()
+        GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case=args.case)
+        milp = MILP(GD, SD, args.case, callback=None, assembly=args.assembly)
+        t_setup = time.perf_counter() - start
+
+        milp.setup_model()
+        if args.no_solve:
+            solve_str = f'{"-":>10}'
+        else:
+            milp.model.Params.OutputFlag = 0
+            milp.model.Params.TimeLimit = args.time_limit
+            milp.solve_problem()
+            solve_str = f'{milp.model.Runtime:>10.3f}'
+        print(f'{str(size) + "x" + str(size):>8} {len(milp.model_edges):>8} '
+              f'{milp.model.NumVars:>8} {milp.model.NumConstrs:>9} {t_setup:>10.3f} '
+              f'{milp.build_time:>10.3f} {solve_str}')
+
+
+if __name__ == '__main__':
+    main()
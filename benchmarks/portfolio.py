@@ -0,0 +1,52 @@
+"""Benchmark the solver portfolio against single seeded solves.
+
+Solves the static and reactive problems on a grid world with single Gurobi
+runs for the portfolio configurations and with a portfolio of the same size, and reports
+the wall clock times (including the process start up), the solution and
+the winning portfolio configuration.
+
+Usage: python benchmarks/portfolio.py [--size 5] [--members 4]
+       [--time-limit 300]
+"""
+import argparse
+from floras.components.product import sync_prod
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+from floras.optimization.backends import portfolio_configs
+from grids import grid_problem
+
+
+def run(GD, SD, case, portfolio, time_limit):
+    milp = MILP(GD, SD, case, callback=None, portfolio=portfolio)
+    milp.setup_model()
+    milp.model.Params.OutputFlag = 0
+    milp.solve_problem(time_limit=time_limit)
+    d, flow, _ = milp.parse_solution()
+    return milp.data["runtime"], flow, len(d), milp.data.get("portfolio_winner")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=5)
+    parser.add_argument("--members", type=int, default=4)
+    parser.add_argument("--time-limit", type=float, default=300)
+    args = parser.parse_args()
+
+    transys, sys_aut, prod_aut = grid_problem(args.size)
+    virtual = sync_prod(transys, prod_aut)
+    virtual_sys = sync_prod(transys, sys_aut)
+    print(f'{"case":>9} {"run":>20} {"time [s]":>10} {"flow":>6} {"cuts":>6}  winner')
+    for case in ['static', 'reactive']:
+        GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case=case)
+        # single runs are portfolios of one member to fix their seed
+        runs = [(str(config), [config]) for config in portfolio_configs(args.members)]
+        runs.append((f'portfolio of {args.members}', args.members))
+        for name, portfolio in runs:
+            t_solve, flow, ncuts, winner = run(GD, SD, case, portfolio, args.time_limit)
+            winner = winner if isinstance(portfolio, int) else ''
+            print(f'{case:>9} {name[:20]:>20} {t_solve:>10.3f} {str(flow):>6} '
+                  f'{ncuts:>6}  {winner}')
+
+
+if __name__ == '__main__':
+    main()
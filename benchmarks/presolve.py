@@ -0,0 +1,58 @@
+"""Benchmark the presolve of the virtual product graph.
+
+Builds and solves the static and reactive MILPs on the getting started
+example, a reduced package delivery case study and a grid, with and without
+the presolve, and reports the size of G, the build and solve times, the flow
+and the number of cuts.
+
+Usage: python benchmarks/presolve.py [--packages 2] [--size 4] [--time-limit 300]
+"""
+import argparse
+from floras.components.product import sync_prod
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+from examples import getting_started, package_delivery
+from grids import grid_problem
+
+
+def run(GD, SD, case, presolve, time_limit):
+    milp = MILP(GD, SD, case, callback=None, presolve=presolve)
+    milp.setup_model()
+    milp.model.Params.OutputFlag = 0
+    milp.solve_problem(time_limit=time_limit)
+    d, flow, _ = milp.parse_solution()
+    return milp.G, milp.build_time, milp.data["runtime"], flow, len(d)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--packages", type=int, default=2)
+    parser.add_argument("--size", type=int, default=4)
+    parser.add_argument("--time-limit", type=float, default=300)
+    args = parser.parse_args()
+
+    instances = [
+        ('getting_started', getting_started),
+        ('package_delivery', lambda: package_delivery(args.packages)),
+        ('grid', lambda: grid_problem(args.size)),
+    ]
+    print(f'{"instance":>17} {"case":>9} {"presolve":>9} {"nodes":>6} {"edges":>6} '
+          f'{"build [s]":>10} {"solve [s]":>10} {"flow":>6} {"cuts":>6}')
+    for name, build in instances:
+        transys, sys_aut, prod_aut = build()
+        virtual = sync_prod(transys, prod_aut)
+        virtual_sys = sync_prod(transys, sys_aut)
+        for case in ['static', 'reactive']:
+            GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case=case)
+            for presolve in [False, True]:
+                G, t_build, t_solve, flow, ncuts = run(
+                    GD, SD, case, presolve, args.time_limit
+                )
+                print(f'{name:>17} {case:>9} {str(presolve):>9} '
+                      f'{G.number_of_nodes():>6} {G.number_of_edges():>6} '
+                      f'{t_build:>10.3f} {t_solve:>10.3f} {str(flow):>6} '
+                      f'{str(ncuts):>6}')
+
+
+if __name__ == '__main__':
+    main()
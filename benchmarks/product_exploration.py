@@ -0,0 +1,73 @@
+"""Benchmark the exploration of the product of a grid world and the
+specification product automaton.
+
+Compares Product.explore (indexed successors, deque frontier, set-based
+visited tracking and automaton moves cached per label class) against the
+previous list-based exploration loop, and reports the label class cache
+statistics. The equivalence of the two explorations is tested in
+tests/test_product.py.
+
+Usage: python benchmarks/product_exploration.py
+"""
+import time
+from floras.components.product import Product
+from grids import grid_problem
+
+LEGACY_MAX_SIZE = 30  # the list-based loop takes minutes beyond this size
+
+
+def legacy_explore(prod):
+    """The exploration loop of Product.pruned_sync_prod before indexing."""
+    prod.E = dict()
+    aut_state_edges = [(si[0], sj) for si, sj in prod.automaton.delta.items()]
+    nodes_to_add = [(prod.transys.I[0], prod.automaton.qinit)]
+    nodes_to_keep = list(nodes_to_add)
+    while len(nodes_to_add) > 0:
+        next_nodes = []
+        for (s, q) in nodes_to_add:
+            for a in prod.transys.A:
+                if (s, a) in list(prod.transys.E.keys()):
+                    t = prod.transys.E[(s, a)]
+                    for p in prod.automaton.Q:
+                        if (q, p) in aut_state_edges:
+                            label = prod.transys.L[t]
+                            if prod.automaton.get_transition(q, label) == p:
+                                prod.E[((s, q), a)] = (t, p)
+                                if (t, p) not in nodes_to_keep:
+                                    nodes_to_keep.append((t, p))
+                                    next_nodes.append((t, p))
+        nodes_to_add = next_nodes
+    return nodes_to_keep
+
+
+def main():
+    print(f'{"grid":>8} {"nodes":>8} {"edges":>8} {"legacy [s]":>11} '
+          f'{"indexed [s]":>12} {"speedup":>8} {"classes":>8} {"hit rate":>9}')
+    for size in range(10, 101, 10):
+        transys, sys_aut, prod_aut = grid_problem(size)
+
+        prod = Product(transys, prod_aut)
+        start = time.perf_counter()
+        nodes = prod.explore()
+        t_new = time.perf_counter() - start
+        edges = dict(prod.E)
+
+        if size <= LEGACY_MAX_SIZE:
+            legacy = Product(transys, prod_aut)
+            start = time.perf_counter()
+            legacy_explore(legacy)
+            t_old = time.perf_counter() - start
+            old_str = f'{t_old:>11.3f}'
+            speedup = f'{t_old / t_new:>7.1f}x'
+        else:
+            old_str = f'{"-":>11}'
+            speedup = f'{"-":>8}'
+        stats = prod.label_cache_stats
+        hit_rate = stats['hits'] / (stats['hits'] + stats['misses'])
+        print(f'{str(size) + "x" + str(size):>8} {len(nodes):>8} {len(edges):>8} '
+              f'{old_str} {t_new:>12.3f} {speedup} {stats["label_classes"]:>8} '
+              f'{hit_rate:>9.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark the peak memory of building the product of a grid world and the
+specification product automaton.
+
+Compares numbering the reachable product states on demand against
+allocating ids for the full cartesian product S x Q up front.
+
+Usage: python benchmarks/product_memory.py
+"""
+import tracemalloc
+from collections import OrderedDict as od
+from itertools import product
+from floras.components.product import Product
+from grids import grid_problem
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    result = fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2**20, result
+
+
+def cartesian_product(transys, prod_aut):
+    """Up-front numbering of every (s, q) pair as done before."""
+    prod = Product(transys, prod_aut)
+    S = list(product(transys.S, prod_aut.Q))
+    for k in range(len(S)):
+        prod.Sdict[S[k]] = "s" + str(k)
+        prod.reverse_Sdict["s" + str(k)] = S[k]
+    prod.Sdict, prod.reverse_Sdict = od(), od()  # explore numbers states again
+    prod.explore()
+    return prod
+
+
+def lazy_product(transys, prod_aut, int_ids):
+    prod = Product(transys, prod_aut, int_ids=int_ids)
+    prod.explore()
+    return prod
+
+
+def main():
+    print(f'{"grid":>8} {"S x Q":>9} {"reachable":>10} {"cartesian [MB]":>15} '
+          f'{"lazy [MB]":>10} {"lazy int [MB]":>14}')
+    for size in [25, 50, 100, 150]:
+        # d1 and d2 never hold on the grid, so most automaton states are
+        # unreachable in the product
+        transys, sys_aut, prod_aut = grid_problem(
+            size, test_formula='F(I) & F(d1) & F(d2)'
+        )
+        mem_full, _ = peak_memory(lambda: cartesian_product(transys, prod_aut))
+        mem_lazy, prod = peak_memory(lambda: lazy_product(transys, prod_aut, False))
+        mem_int, _ = peak_memory(lambda: lazy_product(transys, prod_aut, True))
+        n_full = len(transys.S) * len(prod_aut.Q)
+        print(f'{str(size) + "x" + str(size):>8} {n_full:>9} {len(prod.Sdict):>10} '
+              f'{mem_full:>15.1f} {mem_lazy:>10.1f} {mem_int:>14.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark the LP relaxation and rounding against the MILP on grid worlds.
+
+Solves the static and reactive problems on square grids with the MILP and
+with the LP relaxation and rounding, and reports the run times, the
+objectives, the LP bound and the gap of the rounded cut to the bound.
+
+Usage: python benchmarks/relax.py [--sizes 3 4 6] [--time-limit 300]
+"""
+import argparse
+import time
+from floras.components.product import sync_prod
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+from floras.optimization.relax import Rounding, solve_lp
+from grids import grid_problem
+
+
+def run_milp(GD, SD, case, time_limit):
+    milp = MILP(GD, SD, case, callback=None)
+    milp.setup_model()
+    milp.model.Params.OutputFlag = 0
+    milp.solve_problem(time_limit=time_limit)
+    objective = milp.model.ObjVal if milp.model.SolCount else None
+    return milp.model.Runtime, objective
+
+
+def run_relax(GD, SD, case, time_limit):
+    milp = MILP(GD, SD, case, callback=None)
+    milp.setup_model()
+    milp.model.Params.OutputFlag = 0
+    start = time.time()
+    _, d_lp, bound = solve_lp(milp, time_limit)
+    objective = None
+    if bound is not None:
+        rounding = Rounding(milp, d_lp)
+        d_vals, _ = rounding.round()
+        if d_vals is not None:
+            objective = rounding.objective(d_vals > 0.5)
+    return time.time() - start, objective, bound
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[3, 4, 6])
+    parser.add_argument("--time-limit", type=float, default=300)
+    args = parser.parse_args()
+
+    print(f'{"grid":>5} {"case":>9} {"solver":>6} {"time [s]":>10} '
+          f'{"objective":>10} {"LP bound":>9} {"gap":>7}')
+    for size in args.sizes:
+        transys, sys_aut, prod_aut = grid_problem(size)
+        virtual = sync_prod(transys, prod_aut)
+        virtual_sys = sync_prod(transys, sys_aut)
+        for case in ['static', 'reactive']:
+            GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case=case)
+            t_solve, objective = run_milp(GD, SD, case, args.time_limit)
+            print(f'{size:>5} {case:>9} {"milp":>6} {t_solve:>10.3f} '
+                  f'{str(objective and round(objective, 4)):>10}')
+            t_solve, objective, bound = run_relax(GD, SD, case, args.time_limit)
+            gap = '-'
+            if objective is not None:
+                gap = f'{bound - objective:.4f}'
+            print(f'{size:>5} {case:>9} {"relax":>6} {t_solve:>10.3f} '
+                  f'{str(objective and round(objective, 4)):>10} '
+                  f'{str(bound and round(bound, 4)):>9} {gap:>7}')
+
+
+if __name__ == '__main__':
+    main()
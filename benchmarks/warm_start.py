@@ -0,0 +1,73 @@
+"""Benchmark warm starts on a re-solved grid world.
+
+Solves the static problem on a square grid, moves the goal one row down and
+re-solves it cold, from the cuts of the first solution (as stored in its
+result file) and from the min-cut solver. Reports the time to the first
+incumbent, the run time and the solution of every run.
+
+Usage: python benchmarks/warm_start.py [--sizes 5 8] [--time-limit 300]
+"""
+import argparse
+import os
+import shutil
+from floras.components.transition_system import TranSys
+from floras.components.product import sync_prod
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+from grids import grid_problem, grid_transition_system_input
+
+RESULT_FILE = os.path.join('log', 'warm_start_previous.json')
+
+
+def moved_goal_problem(size):
+    """Grid problem with the goal 'T' moved one row down."""
+    _, sys_aut, prod_aut = grid_problem(size)
+    ts_input = grid_transition_system_input(size)
+    ts_input.labels = {(1, size - 1): ['T'], (0, 0): ['I'], (size - 1, size - 1): ['I']}
+    return TranSys(ts_input), sys_aut, prod_aut
+
+
+def run(problem, start, time_limit):
+    transys, sys_aut, prod_aut = problem
+    virtual = sync_prod(transys, prod_aut)
+    virtual_sys = sync_prod(transys, sys_aut)
+    GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case='static')
+    milp = MILP(GD, SD, 'static', callback=None)
+    milp.setup_model()
+    milp.model.Params.OutputFlag = 0
+    if start is not None:
+        milp.warm_start(start)
+    milp.solve_problem(time_limit=time_limit)
+    d, flow, _ = milp.parse_solution()
+    data = milp.data
+    return data["time_to_first_incumbent"], data["runtime"], flow, len(d)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 8])
+    parser.add_argument("--time-limit", type=float, default=300)
+    args = parser.parse_args()
+
+    print(f'{"size":>5} {"start":>9} {"first [s]":>10} {"speedup":>8} '
+          f'{"solve [s]":>10} {"flow":>6} {"cuts":>6}')
+    for size in args.sizes:
+        # previous solution, stored in its result file
+        run(grid_problem(size), None, args.time_limit)
+        shutil.copy(os.path.join('log', 'opt_data.json'), RESULT_FILE)
+
+        problem = moved_goal_problem(size)
+        cold = None
+        starts = [('cold', None), ('file', RESULT_FILE), ('mincut', 'mincut')]
+        for name, start in starts:
+            t_first, t_solve, flow, ncuts = run(problem, start, args.time_limit)
+            if cold is None:
+                cold = t_first
+            speedup = cold / t_first if cold and t_first else float('nan')
+            first = 'none' if t_first is None else f'{t_first:.4f}'
+            print(f'{size:>5} {name:>9} {first:>10} {speedup:>8.1f} '
+                  f'{t_solve:>10.3f} {str(flow):>6} {ncuts:>6}')
+
+
+if __name__ == '__main__':
+    main()
@@ -27,8 +27,22 @@ class Automaton:
         self.qinit = qinit
         self.delta = delta
         self.ap = ap  # Must be a list
-        self.Sigma = powerset(ap)
+        self._Sigma = None
         self.Acc = Acc
+        self.ap_index = None
+        self.guards = None
+        self.transition_table = None
+        self.compile_transitions()
+
+    @property
+    def Sigma(self):
+        """
+        The alphabet (powerset of the atomic propositions), only built when
+        requested since it grows exponentially with the number of APs.
+        """
+        if self._Sigma is None:
+            self._Sigma = powerset(self.ap)
+        return self._Sigma
 
     def print_transitions(self):
         """
@@ -37,6 +51,42 @@ class Automaton:
         for k, v in self.delta.items():
             print("out state and formula: ", k, " in state: ", v)
 
+    def compile_transitions(self):
+        """
+        Compile the guards of delta once into per-state lists of
+        (guard evaluator, successor), in the order of delta.
+        The evaluators take the label as a bitmask over the atomic
+        propositions (bit k set iff self.ap[k] holds).
+        Successors are memoized per (state, bitmask) in self.transition_table.
+        """
+        self.ap_index = {str(ap): k for k, ap in enumerate(self.ap)}
+        self.guards = {q: [] for q in self.Q}
+        for (q, guard), q_next in self.delta.items():
+            evaluator = compile_guard(guard, self.ap_index)
+            self.guards.setdefault(q, []).append((evaluator, q_next))
+        self.transition_table = {q: {} for q in self.guards}
+
+    def label_mask(self, propositions):
+        """
+        Bitmask of the atomic propositions in the label.
+        Propositions that do not appear in the automaton are ignored.
+
+        Args:
+            propositions: List of propositions.
+
+        Returns:
+            mask: Bitmask over self.ap_index, or None if a proposition is
+            not atomic.
+        """
+        mask = 0
+        for prop in propositions:
+            if prop.kind() != spot.op_ap:
+                return None
+            k = self.ap_index.get(str(prop))
+            if k is not None:
+                mask |= 1 << k
+        return mask
+
     def complement_negation(self, propositions):
         """
         Negation of all atomic propositions not listed in propositions.
@@ -57,6 +107,31 @@ class Automaton:
     def get_transition(self, q0, propositions):
         """
         Get the transition.
+        The successor is looked up in the compiled transition table and
+        only evaluated on the first query for each (state, label) pair.
+
+        Args:
+            q0: Initial state,
+            propositions: List of propositions.
+        """
+        mask = self.label_mask(propositions)
+        if mask is None:
+            return self.get_transition_by_containment(q0, propositions)
+        table = self.transition_table.get(q0)
+        if table is None:
+            return None
+        if mask not in table:
+            table[mask] = None
+            for evaluator, q_next in self.guards[q0]:
+                if evaluator(mask):
+                    table[mask] = q_next
+                    break
+        return table[mask]
+
+    def get_transition_by_containment(self, q0, propositions):
+        """
+        Get the transition by checking language containment of each guard
+        with spot (used for labels that are not sets of atomic propositions).
 
         Args:
             q0: Initial state,
@@ -131,6 +206,48 @@ class Automaton:
         G_agr.draw("imgs/" + fn + "_aut.pdf", prog='dot')
 
 
+def compile_guard(guard, ap_index):
+    """
+    Compile a guard into a function evaluating it on a label bitmask.
+    Atomic propositions missing from ap_index are assigned a new bit.
+
+    Args:
+        guard: Spot formula (or True) over atomic propositions.
+        ap_index: Dictionary from atomic proposition names to bit positions.
+
+    Returns:
+        evaluator: Function mapping a label bitmask to True/False.
+    """
+    if guard is True:
+        return lambda mask: True
+    kind = guard.kind()
+    if kind == spot.op_tt:
+        return lambda mask: True
+    if kind == spot.op_ff:
+        return lambda mask: False
+    if kind == spot.op_ap:
+        bit = 1 << ap_index.setdefault(str(guard), len(ap_index))
+        return lambda mask: mask & bit != 0
+    children = [compile_guard(child, ap_index) for child in guard]
+    if kind == spot.op_Not:
+        child = children[0]
+        return lambda mask: not child(mask)
+    if kind == spot.op_And:
+        return lambda mask: all(child(mask) for child in children)
+    if kind == spot.op_Or:
+        return lambda mask: any(child(mask) for child in children)
+    if kind == spot.op_Xor:
+        left, right = children
+        return lambda mask: left(mask) != right(mask)
+    if kind == spot.op_Implies:
+        left, right = children
+        return lambda mask: not left(mask) or right(mask)
+    if kind == spot.op_Equiv:
+        left, right = children
+        return lambda mask: left(mask) == right(mask)
+    raise ValueError(f'Guard {guard} is not a Boolean formula.')
+
+
 # Functions to take in spot formulas and return automaton object attributes:
 def get_automaton(formula_str, playername):
     """
@@ -142,8 +259,9 @@ def get_automaton(formula_str, playername):
         or the tester ('test').
     """
     spot_aut = spot.translate(formula_str, 'Buchi', 'state-based', 'complete')
-    Q, qinit, tau, AP = construct_automaton_attr(spot_aut)
-    Acc = construct_Acc(spot_aut, player=playername)
+    Q, qinit, tau, AP, acc_states = read_spot_automaton(spot_aut)
+    assert acc_states != []  # Not empty sanity check
+    Acc = {playername: [get_state_str(state) for state in acc_states]}
     aut = Automaton(Q, qinit, AP, tau, Acc)
     return aut, spot_aut
 
@@ -194,7 +312,9 @@ def get_product_automaton(spot_aut_sys, spot_aut_test):
     spot_aut_prod = spot.product(spot_aut_sys, spot_aut_test)
 
     Q_prod, qinit_prod, tau_prod, AP_prod = construct_automaton_attr(spot_aut_prod)
-    Acc_prod = construct_product_Acc(spot_aut_sys, spot_aut_test)
+    Acc_prod = construct_product_Acc(
+        spot_aut_sys, spot_aut_test, spec_prod=spot_aut_prod
+    )
 
     aut_prod = Automaton(Q_prod, qinit_prod, AP_prod, tau_prod, Acc_prod)
     return aut_prod
@@ -239,7 +359,9 @@ def get_prod_automaton(system_formula_str, tester_formula_str):
     spot_aut_prod = spot.product(spot_aut_sys, spot_aut_test)
 
     Q_prod, qinit_prod, tau_prod, AP_prod = construct_automaton_attr(spot_aut_prod)
-    Acc_prod = construct_product_Acc(spot_aut_sys, spot_aut_test)
+    Acc_prod = construct_product_Acc(
+        spot_aut_sys, spot_aut_test, spec_prod=spot_aut_prod
+    )
 
     aut_prod = Automaton(Q_prod, qinit_prod, AP_prod, tau_prod, Acc_prod)
     return aut_prod
@@ -259,13 +381,63 @@ def construct_automaton_attr(spot_aut):
         tau: transitions,
         AP: atomic propositions.
     '''
-    nstates = count_automaton_states(spot_aut)
+    Q, qinit, tau, AP, acc_states = read_spot_automaton(spot_aut)
+    return Q, qinit, tau, AP
+
+
+def read_spot_automaton(spot_aut):
+    '''
+    Read the states, transitions, initial state, atomic propositions and
+    accepting states of a spot automaton in a single pass over its graph,
+    without serializing it to a hoa string.
+
+    Args:
+        spot_aut: Spot automaton.
+
+    Returns:
+        Q: states,
+        qinit: initial state,
+        tau: transitions,
+        AP: atomic propositions,
+        acc_states: accepting states of the automaton (as integers).
+    '''
+    bdict = spot_aut.get_dict()
+    AP = list(spot_aut.ap())
+    nstates = spot_aut.num_states()
     Q = [get_state_str(k) for k in range(nstates)]
-    qinit = get_initial_state(spot_aut)
-    tau = get_transitions(spot_aut)
+    qinit = get_state_str(spot_aut.get_init_state_number())
 
-    AP = get_APs(spot_aut)
-    return Q, qinit, tau, AP
+    tau = {}
+    acc_states = []
+    guards = {}  # Guards are shared between edges, convert each bdd once
+    for state in range(nstates):
+        if spot_aut.state_is_accepting(state):
+            acc_states.append(state)
+        qout_st = get_state_str(state)
+        for edge in spot_aut.out(state):
+            cond_id = edge.cond.id()
+            if cond_id not in guards:
+                guards[cond_id] = get_guard_formula(edge.cond, bdict)
+            tau[(qout_st, guards[cond_id])] = get_state_str(edge.dst)
+    return Q, qinit, tau, AP, acc_states
+
+
+def get_guard_formula(cond, bdict):
+    '''
+    Convert the bdd guard of an edge into a spot formula. The true guard is
+    returned as True, matching the "t" entry of the hoa formula dictionary.
+
+    Args:
+        cond: Guard of the edge as a bdd.
+        bdict: Bdd dictionary of the automaton.
+
+    Returns:
+        formula: Guard as a spot formula (or True).
+    '''
+    formula = spot.bdd_to_formula(cond, bdict)
+    if formula.is_tt():
+        return True
+    return formula
 
 
 def count_automaton_states(spot_aut):
@@ -489,7 +661,7 @@ def get_APs(spot_aut):
     return AP
 
 
-def construct_product_Acc(spot_aut_sys, spot_aut_test):
+def construct_product_Acc(spot_aut_sys, spot_aut_test, spec_prod=None):
     '''
     Return the accepting state dictionary for the synchronous
     product of the system and tester acceptances.
@@ -497,12 +669,14 @@ def construct_product_Acc(spot_aut_sys, spot_aut_test):
     Args:
         spot_aut_sys: Spot system automaton
         spot_aut_test: Spot test automaton
+        spec_prod: Spot product of both automata (computed if not given)
 
     Returns:
         Acc: Dictionary of accepting states for 'sys' and 'test'
     '''
     Acc = dict()
-    spec_prod = spot.product(spot_aut_sys, spot_aut_test)
+    if spec_prod is None:
+        spec_prod = spot.product(spot_aut_sys, spot_aut_test)
 
     sys_prod_acc_states_str = []
     test_prod_acc_states_str = []
@@ -547,7 +721,7 @@ def get_product_states(spec_prod):
         (product_states_dict[pair_prod_state] = num_prod_state)
     '''
     product_states = spec_prod.get_product_states()
-    assert len(product_states) == count_automaton_states(spec_prod)
+    assert len(product_states) == spec_prod.num_states()
     product_states_dict = od()
     for k, prod in enumerate(product_states):
         product_states_dict.update({prod: k})
@@ -556,11 +730,8 @@ def get_product_states(spec_prod):
 
 def get_acc_states(spot_aut):
     '''
-    Return a list of accepting states in the spot_automaton
-    by parsing the body of the automaton
-    In the prefix of the hoa_string, the succeeding portion
-    of Acc refers to the number of accepting
-    conditions in the automaton.
+    Return a list of accepting states in the spot automaton,
+    read directly from the state-based acceptance marks.
 
     Args:
         spot_aut: Spot automaton
@@ -568,14 +739,9 @@ def get_acc_states(spot_aut):
     Returns:
         acc_states: Accepting states of the automaton.
     '''
-    acc_states = []
-    hoa_body = get_hoa_body(spot_aut)
-    for line in hoa_body:
-        if 'State:' in line:
-            parse_line = line.split()
-            state = parse_line[1]
-            if len(parse_line) > 2:
-                " If an acceptance condition is specified; might not be the best way"
-                acc_states.append(read_state(state))
+    acc_states = [
+        state for state in range(spot_aut.num_states())
+        if spot_aut.state_is_accepting(state)
+    ]
     assert acc_states != []  # Check that the algorithm worked.
     return acc_states
@@ -0,0 +1,199 @@
+"""Contains the CompactGraph class, a directed graph on integer nodes stored
+in compressed sparse row (CSR) form, shared by the product, the graph data
+and the optimization."""
+from collections import deque
+import numpy as np
+import networkx as nx
+from scipy.sparse import csr_matrix
+
+
+class CompactGraph:
+    """
+    Directed graph on the integer nodes 0, ..., n_nodes - 1 in CSR form.
+
+    The edges are stored in the arrays src and dst sorted by their out node,
+    edges with the same out node keep the order in which they were given and
+    duplicate edges are dropped. The out edges of node u are the edge ids
+    indptr[u], ..., indptr[u + 1] - 1.
+
+    Args:
+        n_nodes: Number of node ids.
+        src: Out nodes of the edges.
+        dst: In nodes of the edges.
+        node_attr: Dictionary of node attribute arrays of length n_nodes.
+        node_mask: Boolean array of the node ids that are in the graph
+        (default: all of them). Edges must be between nodes in the graph.
+    """
+    def __init__(self, n_nodes, src, dst, node_attr=None, node_mask=None):
+        src = np.asarray(src, dtype=np.int64).reshape(-1)
+        dst = np.asarray(dst, dtype=np.int64).reshape(-1)
+        if len(src) > 0:
+            # keep the first occurrence of every edge
+            _, first = np.unique(src * n_nodes + dst, return_index=True)
+            first.sort()
+            src, dst = src[first], dst[first]
+        order = np.argsort(src, kind='stable')
+        self.n_nodes = n_nodes
+        self.src = src[order]
+        self.dst = dst[order]
+        self.indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+        self.indptr[1:] = np.cumsum(np.bincount(self.src, minlength=n_nodes))
+        if node_mask is None:
+            node_mask = np.ones(n_nodes, dtype=bool)
+        self.node_mask = np.asarray(node_mask, dtype=bool)
+        self.node_attr = dict(node_attr) if node_attr else {}
+        self._rev_indptr = None
+        self._rev_edges = None
+        self._edge_index = None
+
+    @property
+    def nodes(self):
+        """List of the nodes in the graph."""
+        return np.flatnonzero(self.node_mask).tolist()
+
+    @property
+    def edges(self):
+        """List of the edges (u, v) ordered by edge id."""
+        return list(zip(self.src.tolist(), self.dst.tolist()))
+
+    def number_of_nodes(self):
+        return int(self.node_mask.sum())
+
+    def number_of_edges(self):
+        return len(self.src)
+
+    def out_edge_ids(self, u):
+        return range(self.indptr[u], self.indptr[u + 1])
+
+    def successors(self, u):
+        return self.dst[self.indptr[u]:self.indptr[u + 1]]
+
+    def reverse_index(self):
+        """
+        Index of the edges by their in node (built on first use).
+
+        Returns:
+            rev_indptr: The in edges of node v are rev_edges[rev_indptr[v]],
+            ..., rev_edges[rev_indptr[v + 1] - 1].
+            rev_edges: Edge ids sorted by in node.
+        """
+        if self._rev_indptr is None:
+            self._rev_edges = np.argsort(self.dst, kind='stable')
+            self._rev_indptr = np.zeros(self.n_nodes + 1, dtype=np.int64)
+            self._rev_indptr[1:] = np.cumsum(
+                np.bincount(self.dst, minlength=self.n_nodes)
+            )
+        return self._rev_indptr, self._rev_edges
+
+    def in_edge_ids(self, v):
+        rev_indptr, rev_edges = self.reverse_index()
+        return rev_edges[rev_indptr[v]:rev_indptr[v + 1]]
+
+    def predecessors(self, v):
+        return self.src[self.in_edge_ids(v)]
+
+    def edge_id(self, u, v):
+        """Id of the edge (u, v), or None if it is not in the graph."""
+        if self._edge_index is None:
+            self._edge_index = {edge: k for k, edge in enumerate(self.edges)}
+        return self._edge_index.get((u, v))
+
+    def has_edge(self, u, v):
+        return self.edge_id(u, v) is not None
+
+    def edge_subgraph(self, edge_mask):
+        """Graph on the same nodes with only the edges in edge_mask."""
+        edge_mask = np.asarray(edge_mask, dtype=bool)
+        return CompactGraph(
+            self.n_nodes, self.src[edge_mask], self.dst[edge_mask],
+            node_attr=self.node_attr, node_mask=self.node_mask
+        )
+
+    def subgraph(self, node_mask):
+        """Graph induced by the nodes in node_mask (node ids are kept)."""
+        node_mask = self.node_mask & np.asarray(node_mask, dtype=bool)
+        edge_mask = node_mask[self.src] & node_mask[self.dst]
+        return CompactGraph(
+            self.n_nodes, self.src[edge_mask], self.dst[edge_mask],
+            node_attr=self.node_attr, node_mask=node_mask
+        )
+
+    def remove_nodes(self, nodes):
+        """Graph without the given nodes and their edges."""
+        node_mask = np.ones(self.n_nodes, dtype=bool)
+        node_mask[np.asarray(list(nodes), dtype=np.int64)] = False
+        return self.subgraph(node_mask)
+
+    def without_self_loops(self):
+        return self.edge_subgraph(self.src != self.dst)
+
+    def reachable(self, sources):
+        """
+        Nodes reachable from any of the sources (forward search).
+
+        Returns:
+            reached: Boolean array over the node ids.
+        """
+        return self._search(sources, self.indptr.tolist(), self.dst.tolist())
+
+    def coreachable(self, targets):
+        """
+        Nodes from which any of the targets is reachable (backward search).
+
+        Returns:
+            reached: Boolean array over the node ids.
+        """
+        rev_indptr, rev_edges = self.reverse_index()
+        return self._search(
+            targets, rev_indptr.tolist(), self.src[rev_edges].tolist()
+        )
+
+    def _search(self, start, indptr, adjacent):
+        reached = np.zeros(self.n_nodes, dtype=bool)
+        frontier = deque()
+        for node in start:
+            if self.node_mask[node] and not reached[node]:
+                reached[node] = True
+                frontier.append(node)
+        while frontier:
+            u = frontier.popleft()
+            for v in adjacent[indptr[u]:indptr[u + 1]]:
+                if not reached[v]:
+                    reached[v] = True
+                    frontier.append(v)
+        return reached
+
+    def has_path(self, u, v):
+        return bool(self.reachable([u])[v])
+
+    def to_csr_matrix(self, weights=None):
+        """
+        Sparse adjacency matrix of the graph.
+
+        Args:
+            weights: Edge weights aligned with the edge ids (default 1).
+        """
+        if weights is None:
+            weights = np.ones(len(self.src), dtype=np.int64)
+        return csr_matrix(
+            (weights, self.dst, self.indptr), shape=(self.n_nodes, self.n_nodes)
+        )
+
+    def to_networkx(self, node_names=None):
+        """
+        Export the graph to a networkx DiGraph.
+
+        Args:
+            node_names: Sequence of the node names indexed by node id
+            (default: the node ids).
+        """
+        G = nx.DiGraph()
+        if node_names is None:
+            G.add_nodes_from(self.nodes)
+            G.add_edges_from(self.edges)
+        else:
+            G.add_nodes_from(node_names[u] for u in self.nodes)
+            G.add_edges_from(
+                (node_names[u], node_names[v]) for u, v in self.edges
+            )
+        return G
@@ -2,10 +2,12 @@
 import sys
 import spot
 from collections import OrderedDict as od
+from collections import deque
 import os
+import numpy as np
 import networkx as nx
-from itertools import product
 from floras.components.transition_system import TranSys
+from floras.components.compact_graph import CompactGraph
 
 sys.path.append("..")
 spot.setup(show_default='.tvb')
@@ -22,70 +24,215 @@ class Product(TranSys):
     S_init: initial_states,
     AP: the set of atomic propositions,
     L: labels.
+
+    Product states are numbered on demand while exploring the product, so
+    only the reachable states are stored in Sdict and reverse_Sdict.
+    Their ids are the strings "s<k>", or the integers k if int_ids is set.
+    The reachable product is stored in self.graph as a CompactGraph on the
+    numbers k, the networkx graphs G_initial and G are built on request.
     """
-    def __init__(self, transys, spec_prod_automaton):
+    def __init__(self, transys, spec_prod_automaton, int_ids=False):
+        self._G = None
+        self._G_initial = None
         super().__init__()
         self.transys = transys
         self.automaton = spec_prod_automaton
-        self.G_initial = None
-        self.G = None
-        self.S = list(product(transys.S, spec_prod_automaton.Q))
+        self.graph = None
+        self.S = []
+        self.int_ids = int_ids
+        self.label_cache_stats = None
         self.Sdict = od()
         self.reverse_Sdict = od()
-        for k in range(len(self.S)):
-            self.Sdict[self.S[k]] = "s"+str(k)
-            self.reverse_Sdict["s" + str(k)] = self.S[k]
         self.A = transys.A
         self.I = [(init, spec_prod_automaton.qinit) for init in transys.I]  # noqa: E741
         self.AP = spec_prod_automaton.Q
 
+    @property
+    def G_initial(self):
+        """networkx graph of the reachable product (built on first access)."""
+        if self._G_initial is None and self.graph is not None:
+            self._G_initial = self.graph.to_networkx(
+                node_names=list(self.reverse_Sdict.keys())
+            )
+        return self._G_initial
+
+    @G_initial.setter
+    def G_initial(self, G_initial):
+        self._G_initial = G_initial
+
+    @property
+    def G(self):
+        """
+        networkx graph of the reachable product with the actions as edge
+        attributes (built on first access).
+        """
+        if self._G is None and self.graph is not None:
+            self._G = nx.DiGraph()
+            self._G.add_nodes_from(list(self.Sdict.values()))
+            edge_attr = dict()
+            for state_act, in_node in self.E.items():
+                edge = (self.Sdict[state_act[0]], self.Sdict[in_node])
+                edge_attr[edge] = {"act": state_act[1]}
+            self._G.add_edges_from(edge_attr.keys())
+            nx.set_edge_attributes(self._G, edge_attr)
+        return self._G
+
+    @G.setter
+    def G(self, G):
+        self._G = G
+
     def print_transitions(self):
         for e_out, e_in in self.E.items():
             print("node out: " + str(e_out) + " node in: " + str(e_in))
 
+    def transys_successors(self):
+        """
+        Index the transitions of the transition system by their out state.
+
+        Returns:
+            succ: Dictionary mapping each state to its list of
+            (action, next state) pairs, ordered as the actions in A.
+        """
+        act_order = {a: k for k, a in enumerate(self.transys.A)}
+        succ = {}
+        for (s, a), t in self.transys.E.items():
+            if a in act_order:
+                succ.setdefault(s, []).append((act_order[a], a, t))
+        for s, moves in succ.items():
+            moves.sort(key=lambda move: move[0])
+            succ[s] = [(a, t) for _, a, t in moves]
+        return succ
+
+    def state_id(self, node):
+        """
+        Id of the product state, a new id is assigned on the first call.
+
+        Args:
+            node: Product state (s, q).
+
+        Returns:
+            node_id: "s<k>" (or k if int_ids is set) where k is the number
+            of product states numbered before this one.
+        """
+        node_id = self.Sdict.get(node)
+        if node_id is None:
+            k = len(self.Sdict)
+            node_id = k if self.int_ids else "s" + str(k)
+            self.Sdict[node] = node_id
+            self.reverse_Sdict[node_id] = node
+        return node_id
+
+    def label_classes(self):
+        """
+        Group the states of the transition system by their label set.
+
+        Returns:
+            state_class: Dictionary mapping each state to its label class.
+            class_labels: Label set of each class (indexed by class).
+        """
+        state_class = {}
+        class_ids = {}
+        class_labels = []
+        for s, label in self.transys.L.items():
+            key = frozenset(str(prop) for prop in label)
+            if key not in class_ids:
+                class_ids[key] = len(class_labels)
+                class_labels.append(label)
+            state_class[s] = class_ids[key]
+        return state_class, class_labels
+
     def pruned_sync_prod(self):
+        self.S = self.explore()
         self.construct_labels()
+        self.identify_SIT()
+        self.to_graph()
+
+    def explore(self):
+        """
+        Breadth-first exploration of the part of the product that is
+        reachable from the initial state. Sets the transitions self.E and
+        numbers the states in the order of discovery, the product graph on
+        these numbers is stored in self.graph.
+        Automaton moves are cached per (automaton state, label class), the
+        cache hits and misses are stored in self.label_cache_stats.
+
+        Returns:
+            nodes_to_keep: Reachable product states in the order of discovery.
+        """
         self.E = dict()
-        aut_state_edges = [(si[0], sj) for si, sj in self.automaton.delta.items()]
+        ts_succ = self.transys_successors()
+        state_class, class_labels = self.label_classes()
+        moves = {}  # (q, label class) -> automaton successor
+        hits = 0
 
-        nodes_to_add = []
         s0 = self.transys.I[0]
         q0 = self.automaton.qinit
-        nodes_to_add.append((s0, q0))
-        nodes_to_keep = []
-        nodes_to_keep.append((s0, q0))
-
-        while len(nodes_to_add) > 0:
-            next_nodes = []
-            for (s, q) in nodes_to_add:
-                for a in self.transys.A:
-                    if (s, a) in list(self.transys.E.keys()):
-                        t = self.transys.E[(s, a)]
-                        for p in self.automaton.Q:
-                            if (q, p) in aut_state_edges:
-                                label = self.transys.L[t]
-                                if self.automaton.get_transition(q, label) == p:
-                                    self.E[((s, q), a)] = (t, p)
-                                    if (t, p) not in nodes_to_keep:
-                                        nodes_to_keep.append((t, p))
-                                        next_nodes.append((t, p))
-            nodes_to_add = next_nodes
-
-        self.S = nodes_to_keep
-        self.G_initial = nx.DiGraph()
-        nodes = []
-        for node in self.S:
-            nodes.append(self.Sdict[node])
-        self.G_initial.add_nodes_from(nodes)
-        edges = []
-        for state_act, in_node in self.E.items():
-            out_node = state_act[0]
-            s_out = self.Sdict[out_node]
-            s_in = self.Sdict[in_node]
-            edges.append((s_out, s_in))
-        self.G_initial.add_edges_from(edges)
-        self.identify_SIT()
-        self.to_graph()
+        nodes_to_keep = [(s0, q0)]
+        self.state_id((s0, q0))
+        index = {(s0, q0): 0}  # number of each product state
+        edge_src = []
+        edge_dst = []
+        frontier = deque(nodes_to_keep)
+
+        while frontier:
+            s, q = frontier.popleft()
+            for a, t in ts_succ.get(s, []):
+                key = (q, state_class[t])
+                if key in moves:
+                    hits += 1
+                    p = moves[key]
+                else:
+                    p = self.automaton.get_transition(q, class_labels[key[1]])
+                    moves[key] = p
+                if p is None:
+                    continue
+                self.E[((s, q), a)] = (t, p)
+                if (t, p) not in index:
+                    index[(t, p)] = len(index)
+                    self.state_id((t, p))
+                    nodes_to_keep.append((t, p))
+                    frontier.append((t, p))
+                edge_src.append(index[(s, q)])
+                edge_dst.append(index[(t, p)])
+        self.label_cache_stats = {
+            "label_classes": len(class_labels),
+            "hits": hits,
+            "misses": len(moves),
+        }
+        self.graph = CompactGraph(
+            len(nodes_to_keep), edge_src, edge_dst,
+            node_attr=self.node_attributes(nodes_to_keep)
+        )
+        self._G_initial = None
+        self._G = None
+        return nodes_to_keep
+
+    def node_attributes(self, nodes):
+        """
+        Node attribute arrays of the product states.
+
+        Args:
+            nodes: Product states ordered by their number.
+
+        Returns:
+            node_attr: Dictionary with the index of the transition system
+            state in transys.S ('ts_state'), the index of the automaton state
+            in automaton.Q ('aut_state') and Boolean arrays for the initial
+            ('init'), system accepting ('acc_sys') and tester accepting
+            ('acc_test') states.
+        """
+        ts_index = {s: k for k, s in enumerate(self.transys.S)}
+        aut_index = {q: k for k, q in enumerate(self.automaton.Q)}
+        acc_sys = set(self.automaton.Acc.get("sys", []))
+        acc_test = set(self.automaton.Acc.get("test", []))
+        init = set(self.I)
+        return {
+            "ts_state": np.array([ts_index[s] for s, q in nodes], dtype=np.int64),
+            "aut_state": np.array([aut_index[q] for s, q in nodes], dtype=np.int64),
+            "init": np.array([node in init for node in nodes], dtype=bool),
+            "acc_sys": np.array([q in acc_sys for s, q in nodes], dtype=bool),
+            "acc_test": np.array([q in acc_test for s, q in nodes], dtype=bool),
+        }
 
     def construct_labels(self):
         self.L = od()
@@ -103,39 +250,40 @@ class Product(TranSys):
     def process_nodes(self, node_list):
         for node in node_list:
             node_st = self.Sdict[node]
-            if node in self.sink and node not in self.int:
-                if node_st not in self.plt_sink_only:
+            in_sink = node in self._sink_set
+            in_int = node in self._int_set
+            if in_sink and not in_int:
+                if node_st not in self._plt_seen:
+                    self._plt_seen.add(node_st)
                     self.plt_sink_only.append(node_st)
 
-            if node in self.int and node not in self.sink:
-                if node_st not in self.plt_int_only:
+            if in_int and not in_sink:
+                if node_st not in self._plt_seen:
+                    self._plt_seen.add(node_st)
                     self.plt_int_only.append(node_st)
 
-            if node in self.int and node in self.sink:
-                if node_st not in self.plt_sink_int:
+            if in_int and in_sink:
+                if node_st not in self._plt_seen:
+                    self._plt_seen.add(node_st)
                     self.plt_sink_int.append(node_st)
 
-            if node in self.src:
+            if node in self._src_set:
                 self.plt_src.append(node_st)
 
     def to_graph(self):
-        self.G = nx.DiGraph()
-        self.G.add_nodes_from(list(self.Sdict.values()))
+        """
+        Classify the nodes connected to the graph with edges for plotting.
+        """
         self.plt_sink_only = []  # Finding relevant nodes connected to graph with edges
         self.plt_int_only = []
         self.plt_sink_int = []
         self.plt_src = []
-        edges = []
-        edge_attr = dict()
+        self._plt_seen = set()
+        self._sink_set = set(self.sink)
+        self._int_set = set(self.int)
+        self._src_set = set(self.src)
         for state_act, in_node in self.E.items():
-            out_node = state_act[0]
-            act = state_act[1]
-            edge = (self.Sdict[out_node], self.Sdict[in_node])
-            edge_attr[edge] = {"act": act}
-            edges.append(edge)
-            self.process_nodes([out_node, in_node])
-        self.G.add_edges_from(edges)
-        nx.set_edge_attributes(self.G, edge_attr)
+            self.process_nodes([state_act[0], in_node])
 
     def base_dot_graph(self, graph=None):
         if graph is None:
@@ -146,16 +294,21 @@ class Product(TranSys):
         G_agr.node_attr['style'] = 'filled'
         G_agr.node_attr['gradientangle'] = 90
 
+        # graphviz node names are strings, also for integer state ids
+        plt_sink_only = set(map(str, self.plt_sink_only))
+        plt_int_only = set(map(str, self.plt_int_only))
+        plt_sink_int = set(map(str, self.plt_sink_int))
+        plt_src = set(map(str, self.plt_src))
         for i in G_agr.nodes():
             n = G_agr.get_node(i)
             n.attr['shape'] = 'circle'
-            if n in self.plt_sink_only:
+            if n in plt_sink_only:
                 n.attr['fillcolor'] = '#ffb000'
-            elif n in self.plt_int_only:
+            elif n in plt_int_only:
                 n.attr['fillcolor'] = '#648fff'
-            elif n in self.plt_sink_int:
+            elif n in plt_sink_int:
                 n.attr['fillcolor'] = '#ffb000'
-            elif n in self.plt_src:
+            elif n in plt_src:
                 n.attr['fillcolor'] = '#dc267f'
             else:
                 n.attr['fillcolor'] = '#ffffff'
@@ -176,7 +329,9 @@ class Product(TranSys):
             for state_act, in_node in self.E.items():
                 out_node = state_act[0]
                 if out_node == cut_edge[0] and in_node == cut_edge[1]:
-                    graph_cut_edges.append((self.Sdict[out_node], self.Sdict[in_node]))
+                    graph_cut_edges.append(
+                        (str(self.Sdict[out_node]), str(self.Sdict[in_node]))
+                    )
         for e in G_agr.edges():
             if e in graph_cut_edges:
                 e.attr['color'] = 'red'
@@ -188,7 +343,7 @@ class Product(TranSys):
         G_agr.draw("imgs/"+fn+".pdf", prog='dot')
 
 
-def sync_prod(system, aut):
-    prod = Product(system, aut)
+def sync_prod(system, aut, int_ids=False):
+    prod = Product(system, aut, int_ids=int_ids)
     prod.pruned_sync_prod()
     return prod
@@ -0,0 +1,402 @@
+'''
+Solver backends for the optimization problem. Both backends solve the
+MatrixFormulation, the Gurobi backend can also solve a model built directly
+with gurobipy. The portfolio backend races several differently seeded and
+parameterized copies of a Gurobi model in a process pool. Without gurobipy
+only the HiGHS backend is available.
+'''
+import os
+import time
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from scipy.optimize import milp, Bounds, LinearConstraint
+try:
+    from gurobipy import GRB, Env, Model, read
+except ImportError:
+    GRB = Env = Model = read = None
+from floras.optimization.callbacks import init_callback_data
+
+BACKENDS = ['gurobi', 'highs']
+
+
+# Parameter sets cycled through by the default portfolio
+PORTFOLIO_PARAMS = [
+    {},
+    {'MIPFocus': 1},
+    {'MIPFocus': 2},
+    {'Presolve': 2},
+    {'Heuristics': 0.5},
+    {'Cuts': 2},
+]
+
+
+def get_backend(name, portfolio=None):
+    """
+    Get the backend for a solver name ('gurobi' or 'highs').
+
+    Args:
+        name: Name of the solver.
+        portfolio: Optional number of portfolio members or list of their
+        parameter dictionaries (gurobi only).
+    """
+    if name == 'highs':
+        if portfolio is not None:
+            print('The portfolio is only available for the gurobi backend.')
+        return HighsBackend()
+    elif name != 'gurobi':
+        print('Requested backend not available, options are \'gurobi\' or '
+              '\'highs\'. Using \'gurobi\'.')
+    if GRB is None:
+        print('gurobipy is not installed, using the \'highs\' backend.')
+        return HighsBackend()
+    if portfolio is not None:
+        return PortfolioBackend(portfolio)
+    return GurobiBackend()
+
+
+def gurobi_status(status, sol_count):
+    if status == GRB.OPTIMAL:
+        return 'optimal'
+    elif status == GRB.INFEASIBLE:
+        return 'inf'
+    elif status in [GRB.INF_OR_UNBD, GRB.UNBOUNDED]:
+        return 'inf/unbounded'
+    elif sol_count >= 1:
+        return 'feasible'
+    return 'not_solved'
+
+
+class GurobiBackend():
+    """
+    Backend solving the problem with Gurobi.
+
+    The status is one of 'optimal', 'feasible' (a solution was found but not
+    proven optimal), 'not_solved', 'inf' or 'inf/unbounded'.
+    """
+    name = 'gurobi'
+
+    def __init__(self):
+        self.model = None
+        self.x = None
+
+    def load(self, form):
+        """
+        Load a MatrixFormulation into a Gurobi model with the matrix API.
+
+        Returns:
+            model: The Gurobi model.
+        """
+        model = Model()
+        vtype = np.where(form.integrality, GRB.BINARY, GRB.CONTINUOUS)
+        self.x = model.addMVar(
+            form.n_vars, lb=form.lb, ub=form.ub, obj=form.c, vtype=vtype,
+            name=np.array(form.names)
+        )
+        model.ModelSense = GRB.MAXIMIZE
+        model.addMConstr(form.A, self.x, form.sense, form.rhs)
+        self.model = model
+        return model
+
+    def set_model(self, model):
+        """Use a model built directly with gurobipy."""
+        self.model = model
+        self.x = None
+
+    def set_time_limit(self, time_limit):
+        self.model.Params.TimeLimit = time_limit
+
+    def optimize(self, callback=None):
+        if callback is None:
+            self.model.optimize()
+        else:
+            self.model.optimize(callback=callback)
+
+    @property
+    def status(self):
+        return gurobi_status(self.model.status, self.model.SolCount)
+
+    def values(self, variables=None):
+        """
+        Values of the loaded matrix variables, or of the given gurobipy
+        variables, in the current solution.
+        """
+        if variables is None:
+            return self.x.X
+        return np.array(self.model.getAttr('X', variables))
+
+    def set_start(self, values, variables=None):
+        """
+        Set a MIP start for the loaded matrix variables (nan for no start
+        value), or for the given gurobipy variables.
+        """
+        if variables is None:
+            self.x.Start = np.where(np.isnan(values), GRB.UNDEFINED, values)
+        else:
+            self.model.setAttr('Start', variables, list(values))
+
+    def stats(self):
+        n_bin_vars = self.model.NumBinVars
+        return {
+            "runtime": self.model.Runtime,
+            "n_bin_vars": n_bin_vars,
+            "n_cont_vars": self.model.NumVars - n_bin_vars,
+            "n_constrs": self.model.NumConstrs,
+            "mip_gap": self.model.MIPGap,
+        }
+
+
+def portfolio_configs(n):
+    """
+    Default portfolio of n members, cycling through the PORTFOLIO_PARAMS
+    with a different seed for every member.
+    """
+    return [dict(PORTFOLIO_PARAMS[k % len(PORTFOLIO_PARAMS)], Seed=k) for k in range(n)]
+
+
+class PortfolioBackend(GurobiBackend):
+    """
+    Backend racing several copies of a Gurobi model with different seeds
+    and parameters in a process pool. The first member that proves
+    optimality wins and the others are stopped, otherwise the best
+    incumbent at the time limit wins. A member that raises an error is
+    recorded as failed and the winner is picked from the other members.
+    The results of all members and the winning configuration are reported
+    in the stats.
+
+    Args:
+        portfolio: Number of members (default configurations from
+        portfolio_configs) or list of Gurobi parameter dictionaries.
+    """
+    name = 'gurobi'
+
+    def __init__(self, portfolio):
+        super().__init__()
+        if isinstance(portfolio, int):
+            portfolio = portfolio_configs(portfolio)
+        self.configs = [dict(config) for config in portfolio]
+        self.time_limit = None
+        self.runtime = 0.0
+        self.runs = []
+        self.winner = None
+
+    def set_time_limit(self, time_limit):
+        self.time_limit = time_limit
+
+    def optimize(self, callback=None):
+        model = self.model
+        model.update()
+        start = np.array(model.getAttr('Start', model.getVars()))
+        threads = max(1, (os.cpu_count() or 1) // len(self.configs))
+        context = multiprocessing.get_context('spawn')
+        stop = context.Event()
+        self.runs, self.winner = [], None
+        begin = time.time()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'model.mps')
+            model.write(path)
+            with ProcessPoolExecutor(
+                max_workers=len(self.configs), mp_context=context,
+                initializer=set_stop_event, initargs=(stop,)
+            ) as pool:
+                futures = {
+                    pool.submit(
+                        solve_member, path, dict({'Threads': threads}, **config),
+                        self.time_limit, start, callback
+                    ): k
+                    for k, config in enumerate(self.configs)
+                }
+                for future in as_completed(futures):
+                    try:
+                        run = future.result()
+                    except Exception as err:
+                        print(f'portfolio member {futures[future]} failed: {err}')
+                        run = failed_run(err)
+                    run['config'] = self.configs[futures[future]]
+                    self.runs.append(run)
+                    if run['status'] == 'optimal' and self.winner is None:
+                        # first proven optimum, stop the other members
+                        self.winner = run
+                        stop.set()
+        self.runtime = time.time() - begin
+        if self.winner is None:
+            solved = [run for run in self.runs if run['x'] is not None]
+            finished = [run for run in self.runs if run['status'] != 'failed']
+            if solved:
+                self.winner = max(solved, key=lambda run: run['obj'])
+            elif finished:
+                self.winner = finished[0]
+            elif self.runs:
+                self.winner = self.runs[0]
+
+    @property
+    def status(self):
+        if self.winner['status'] == 'failed':
+            return 'not_solved'
+        return self.winner['status']
+
+    def values(self, variables=None):
+        x = self.winner['x']
+        if variables is None:
+            return x
+        return x[[var.index for var in variables]]
+
+    def stats(self):
+        n_bin_vars = self.model.NumBinVars
+        return {
+            "runtime": self.runtime,
+            "n_bin_vars": n_bin_vars,
+            "n_cont_vars": self.model.NumVars - n_bin_vars,
+            "n_constrs": self.model.NumConstrs,
+            "mip_gap": self.winner['mip_gap'],
+            "random_seed": self.winner['config'].get('Seed'),
+            "time_to_first_incumbent": self.winner['time_to_first_incumbent'],
+            "incumbents": self.winner['incumbents'],
+            "term_condition": self.winner['term_condition'],
+            "portfolio_winner": self.winner['config'],
+            "portfolio_runs": [
+                {key: run[key] for key in
+                 ['config', 'status', 'obj', 'runtime', 'term_condition']}
+                for run in self.runs
+            ],
+        }
+
+
+def failed_run(err):
+    """Run of a portfolio member that raised the error err."""
+    return {
+        "status": 'failed',
+        "obj": None,
+        "x": None,
+        "runtime": None,
+        "mip_gap": None,
+        "time_to_first_incumbent": None,
+        "incumbents": [],
+        "term_condition": 'error: ' + str(err),
+    }
+
+
+_stop_event = None
+
+
+def set_stop_event(event):
+    global _stop_event
+    _stop_event = event
+
+
+def solve_member(path, params, time_limit, start, callback):
+    """
+    Solve one portfolio member in a worker process.
+
+    Args:
+        path: Path of the model file.
+        params: Gurobi parameters of the member.
+        time_limit: Optional time limit in seconds.
+        start: MIP start values (GRB.UNDEFINED for no start value).
+        callback: Optional callback of the MILP (SolverCallback).
+
+    Returns:
+        run: Dictionary with the status, objective, solution, run time, MIP
+        gap, incumbents and termination condition of the member.
+    """
+    env = Env(empty=True)
+    env.setParam('OutputFlag', 0)
+    env.start()
+    model = read(path, env=env)
+    for name, value in params.items():
+        model.setParam(name, value)
+    if time_limit is not None:
+        model.Params.TimeLimit = time_limit
+    model.setAttr('Start', model.getVars(), start.tolist())
+    data = {}
+    init_callback_data(model, data)
+
+    def member_callback(model, where):
+        if _stop_event is not None and _stop_event.is_set():
+            model.terminate()
+        elif callback is not None:
+            callback(model, where)
+    model.optimize(member_callback)
+    solved = model.SolCount >= 1
+    return {
+        "status": gurobi_status(model.status, model.SolCount),
+        "obj": model.ObjVal if solved else None,
+        "x": np.array(model.getAttr('X', model.getVars())) if solved else None,
+        "runtime": model.Runtime,
+        "mip_gap": model.MIPGap if solved else None,
+        "time_to_first_incumbent": data["time_to_first_incumbent"],
+        "incumbents": data["incumbents"],
+        "term_condition": data["term_condition"],
+    }
+
+
+class HighsBackend():
+    """
+    Backend solving the MatrixFormulation with HiGHS through
+    scipy.optimize.milp. Callbacks are not available for this backend.
+    """
+    name = 'highs'
+
+    def __init__(self):
+        self.model = None
+        self.form = None
+        self.result = None
+        self.runtime = 0.0
+        self.options = {}
+
+    def load(self, form):
+        """
+        Load a MatrixFormulation, it is passed to scipy.optimize.milp when
+        solving.
+
+        Returns:
+            model: None, scipy has no model object.
+        """
+        self.form = form
+        return self.model
+
+    def set_time_limit(self, time_limit):
+        self.options['time_limit'] = time_limit
+
+    def optimize(self, callback=None):
+        form = self.form
+        row_lb, row_ub = form.row_bounds()
+        start = time.time()
+        self.result = milp(
+            -form.c,  # milp minimizes
+            integrality=form.integrality.astype(np.uint8),
+            bounds=Bounds(form.lb, form.ub),
+            constraints=LinearConstraint(form.A, row_lb, row_ub),
+            options=self.options
+        )
+        self.runtime = time.time() - start
+
+    @property
+    def status(self):
+        if self.result.status == 0:
+            return 'optimal'
+        elif self.result.status == 2:
+            return 'inf'
+        elif self.result.status == 3:
+            return 'inf/unbounded'
+        elif self.result.x is not None:
+            return 'feasible'
+        return 'not_solved'
+
+    def values(self, variables=None):
+        return self.result.x
+
+    def set_start(self, values, variables=None):
+        print('MIP starts are not available for the highs backend.')
+
+    def stats(self):
+        n_bin_vars = int(self.form.integrality.sum())
+        mip_gap = getattr(self.result, 'mip_gap', None)
+        return {
+            "runtime": self.runtime,
+            "n_bin_vars": n_bin_vars,
+            "n_cont_vars": self.form.n_vars - n_bin_vars,
+            "n_constrs": self.form.n_rows,
+            "mip_gap": None if mip_gap is None else float(mip_gap),
+        }
@@ -0,0 +1,397 @@
+'''
+Benders decomposition of the reactive problem. A master problem chooses the
+cuts and the partition of G, the flow on G and the reachability on S for
+every flow on S are checked by independent subproblems that are solved in a
+process pool and return optimality and feasibility cuts to the master.
+'''
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+try:
+    from gurobipy import GRB, Model, quicksum
+except ImportError:
+    GRB = Model = quicksum = None
+from floras.components.compact_graph import CompactGraph
+from floras.optimization.mincut import max_flow
+
+
+class BendersResult():
+    """
+    Best solution and bounds of the decomposition.
+
+    Args:
+        f_vals: Flow values aligned with the model edges.
+        d_vals: Cut values aligned with the model edges.
+        flow: Value of the flow.
+        objective: Objective of the solution (flow minus the cut penalty).
+        bound: Upper bound on the objective from the master problem.
+        iterations: Number of master iterations.
+    """
+    def __init__(self, f_vals, d_vals, flow, objective, bound, iterations):
+        self.f_vals = f_vals
+        self.d_vals = d_vals
+        self.flow = flow
+        self.objective = objective
+        self.bound = bound
+        self.iterations = iterations
+
+    @property
+    def status(self):
+        # the master is infeasible if its bound is -inf
+        if self.d_vals is None and self.bound == -np.inf:
+            return 'inf'
+        elif self.d_vals is None:
+            return 'not solved'
+        elif self.bound - self.objective <= 1e-6:
+            return 'optimal'
+        return 'feasible'
+
+
+def flow_cut(n, src, dst, capacity, sources, sinks):
+    """
+    Maximum flow from the sources to the sinks and a minimum cut.
+
+    Returns:
+        flow_value: Value of the maximum flow.
+        flows: Flow on every edge.
+        crossing: Boolean array of the edges leaving the source side of a
+        minimum cut.
+    """
+    S, T = n, n + 1
+    h_src = np.concatenate([src, np.full(len(sources), S), sinks]).astype(np.int64)
+    h_dst = np.concatenate([dst, sources, np.full(len(sinks), T)]).astype(np.int64)
+    capacity = np.asarray(capacity).astype(np.int64)
+    # the super source/sink edges are unbounded
+    cap = np.concatenate(
+        [capacity, np.full(len(sources) + len(sinks), capacity.sum() + 1)]
+    )
+    flow_value, flows = max_flow(n + 2, h_src, h_dst, S, T, cap)
+    # source side: reachable from S in the residual graph
+    forward = flows < cap
+    backward = flows > 0
+    residual = CompactGraph(
+        n + 2, np.concatenate([h_src[forward], h_dst[backward]]),
+        np.concatenate([h_dst[forward], h_src[backward]])
+    )
+    side = residual.reachable([S])
+    m = len(src)
+    crossing = side[h_src[:m]] & ~side[h_dst[:m]]
+    return float(flow_value), flows[:m].astype(float), crossing
+
+
+_subproblem = None
+
+
+def set_subproblem(data):
+    global _subproblem
+    _subproblem = data
+
+
+def solve_subproblem(task, d_vals):
+    """
+    Solve one subproblem for the cut values d_vals in a worker process (or
+    in the main process without a pool).
+
+    Args:
+        task: ('flow',) for the flow on G or ('reachability', commodities)
+        for the reachability check of a chunk of the flows on S.
+        d_vals: Cut values aligned with the model edges.
+
+    Returns:
+        result: (flow value, flows, crossing edges) for the flow, or the
+        list of violated reachability constraints.
+    """
+    data = _subproblem
+    if task[0] == 'flow':
+        capacity = np.where(d_vals > 0.5, 0.0, data['capacity'])
+        return flow_cut(
+            data['n'], data['src'], data['dst'], capacity, data['sources'],
+            data['sinks']
+        )
+    return data['reachability'].violated(d_vals, task[1])
+
+
+class BendersDecomposition():
+    """
+    Benders decomposition of the reactive problem.
+
+    The master problem has the cut variables d and the partition variables
+    m of the MILP, the partition and do not cut constraints, and a variable
+    theta for the flow. For a master solution, the maximum flow on G
+    without the cut edges gives the optimality cut
+
+        theta <= sum over e in C of u_e (1 - d_e)
+
+    for the edges C of a minimum cut (u_e the capacity, the flow has to be
+    at least 1 so this is also the feasibility cut of the flow), and every
+    flow on S whose sinks are not reachable gives a reachability cut (see
+    SReachability). The subproblems are solved in parallel by a pool of
+    worker processes.
+
+    Args:
+        milp: MILP object (prepared for the reactive case).
+        workers: Number of worker processes (default: number of CPUs, one
+        or less solves the subproblems in the main process).
+    """
+    def __init__(self, milp, workers=None):
+        self.milp = milp
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = workers
+        G = milp.G
+        self.cuttable = milp.edges_without_I_mask()
+        self.allowed = self.cuttable.copy()
+        for (i, j) in milp.GD.do_not_cut:
+            e = G.edge_id(i, j)
+            if e is not None:
+                self.allowed[e] = False
+        is_src = np.zeros(G.n_nodes, dtype=bool)
+        is_src[milp.src] = True
+        is_sink = np.zeros(G.n_nodes, dtype=bool)
+        is_sink[milp.sink] = True
+        # no flow into the sources or out of the sinks
+        capacity = np.where(is_src[G.dst] | is_sink[G.src], 0.0, milp.capacity)
+        self.capacity = capacity
+        self.is_src = is_src
+        self.data = {
+            'n': G.n_nodes,
+            'src': G.src,
+            'dst': G.dst,
+            'capacity': capacity,
+            'sources': np.flatnonzero(is_src),
+            'sinks': np.flatnonzero(is_sink),
+            'reachability': milp.s_reachability_check(),
+        }
+        self.model = None
+        self.d = None
+        self.theta = None
+        self.n_cuts = {'optimality': 0, 'feasibility': 0}
+        self.term_condition = None
+
+    def tasks(self):
+        commodities = self.data['reachability'].commodities
+        n_chunks = max(1, min(self.workers, len(commodities)))
+        chunks = [commodities[k::n_chunks] for k in range(n_chunks)]
+        return [('flow',)] + [('reachability', chunk) for chunk in chunks if chunk]
+
+    def setup_master(self):
+        milp = self.milp
+        G = milp.G
+        edges = np.flatnonzero(self.cuttable)
+        model = Model()
+        model.Params.OutputFlag = 0
+        d = model.addVars(edges.tolist(), vtype=GRB.BINARY, name='d')
+        for e in edges[~self.allowed[edges]].tolist():
+            d[e].UB = 0
+        m = model.addVars(milp.model_nodes_without_I, ub=1, name='m')
+        upper = flow_cut(
+            self.data['n'], G.src, G.dst, self.capacity, self.data['sources'],
+            self.data['sinks']
+        )[0]
+        theta = model.addVar(lb=1, ub=max(upper, 1), name='theta')
+        weights = milp.cut_weights
+        model.setObjective(
+            theta - milp.reg * quicksum(weights[e] * d[e] for e in edges.tolist()),
+            GRB.MAXIMIZE
+        )
+        srcs = [i for i in milp.model_nodes_without_I if i in milp.src_set]
+        sinks = [j for j in milp.model_nodes_without_I if j in milp.sink_set]
+        for i in srcs:
+            for j in sinks:
+                model.addConstr(m[i] - m[j] >= 1)
+        for e in edges.tolist():
+            model.addConstr(d[e] - m[G.src[e]] + m[G.dst[e]] >= 0)
+        self.model, self.d, self.theta = model, d, theta
+
+    def solve(self, time_limit=None, policy=None, max_iterations=1000):
+        """
+        Solve the problem by alternating the master problem and the
+        subproblems until the bounds meet or the termination policy is met.
+        The master problems are solved within the remaining time.
+
+        Args:
+            time_limit: Optional time limit in seconds.
+            policy: Optional TerminationPolicy, its time limit, gap, stall
+            and target are applied to the best solution and the bound of
+            every iteration.
+            max_iterations: Maximum number of master iterations.
+
+        Returns:
+            result: BendersResult.
+        """
+        start = time.time()
+        if policy is not None and policy.time_limit is not None:
+            limits = [t for t in [time_limit, policy.time_limit] if t is not None]
+            time_limit = min(limits)
+        self.term_condition = None
+        improved = start
+        self.setup_master()
+        n_edges = self.milp.G.number_of_edges()
+        weights = self.milp.cut_weights
+        best = None
+        bound = np.inf
+        iterations = 0
+        pool = None
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=set_subproblem, initargs=(self.data,)
+            )
+        else:
+            set_subproblem(self.data)
+        try:
+            while iterations < max_iterations:
+                if time_limit is not None:
+                    remaining = time_limit - (time.time() - start)
+                    if remaining <= 0:
+                        self.term_condition = "Timeout"
+                        break
+                    self.model.Params.TimeLimit = remaining
+                self.model.optimize()
+                iterations += 1
+                if self.model.status in [GRB.INFEASIBLE, GRB.INF_OR_UNBD]:
+                    bound = -np.inf
+                if self.model.status == GRB.TIME_LIMIT:
+                    self.term_condition = "Timeout"
+                if self.model.SolCount == 0:
+                    break
+                if self.model.status == GRB.OPTIMAL:
+                    bound = self.model.ObjVal
+                d_vals = np.zeros(n_edges)
+                for e, var in self.d.items():
+                    d_vals[e] = var.X
+                d_vals = np.round(d_vals)
+                results = self.run(pool, d_vals)
+                flow_value, flows, crossing = results[0]
+                violated = [cut for result in results[1:] for cut in result]
+                if not violated and flow_value >= 1:
+                    objective = flow_value - self.milp.reg * weights[d_vals > 0.5].sum()
+                    if best is None or objective > best.objective:
+                        best = BendersResult(
+                            flows, d_vals, flow_value, objective, bound, iterations
+                        )
+                        improved = time.time()
+                added = self.add_cuts(crossing, d_vals, flow_value, violated)
+                print(f'benders iteration {iterations}: bound {bound}, '
+                      f'best {best and best.objective}, cuts {added}')
+                if best is not None and bound - best.objective <= 1e-6:
+                    break
+                self.term_condition = self.policy_met(policy, best, bound, improved)
+                if self.term_condition is not None:
+                    break
+                if not added:
+                    if best is None:
+                        # no cut set leaves a flow of one
+                        bound = -np.inf
+                    break
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        if best is None:
+            return BendersResult(None, None, 0.0, -np.inf, bound, iterations)
+        best.bound = bound
+        best.iterations = iterations
+        return best
+
+    def policy_met(self, policy, best, bound, improved):
+        """
+        Termination condition of the policy met by the best solution and the
+        bound (None if the decomposition goes on).
+
+        Args:
+            policy: TerminationPolicy or None.
+            best: Best BendersResult so far or None.
+            bound: Upper bound on the objective.
+            improved: Time of the last improvement of the best solution.
+        """
+        if policy is None or best is None:
+            return None
+        gap = (bound - best.objective) / max(abs(best.objective), 1)
+        if policy.gap is not None and gap < policy.gap:
+            return "Mipgap low"
+        if policy.stall is not None and time.time() - improved > policy.stall:
+            return "Obj not changing"
+        ncuts = int(self.milp.cut_weights[best.d_vals > 0.5].sum())
+        if policy.target_reached({"flow": best.flow, "ncuts": ncuts}):
+            return "Target reached"
+        return None
+
+    def run(self, pool, d_vals):
+        # the flow on G first, then the reachability checks
+        tasks = self.tasks()
+        if pool is None:
+            return [solve_subproblem(task, d_vals) for task in tasks]
+        futures = [pool.submit(solve_subproblem, task, d_vals) for task in tasks]
+        return [future.result() for future in futures]
+
+    def add_cuts(self, crossing, d_vals, flow_value, violated):
+        """
+        Add the optimality cut of the flow (if theta exceeds it) and the
+        reachability cuts to the master.
+
+        Returns:
+            added: Number of cuts added.
+        """
+        added = 0
+        if self.theta.X > flow_value + 1e-6:
+            edges = np.flatnonzero(crossing & (self.capacity > 0))
+            constant = self.capacity[edges[~self.cuttable[edges]]].sum()
+            cut_edges = edges[self.cuttable[edges]]
+            self.model.addConstr(
+                self.theta <= constant + quicksum(
+                    self.capacity[e] * (1 - self.d[e]) for e in cut_edges.tolist()
+                )
+            )
+            self.n_cuts['optimality'] += 1
+            added += 1
+        for cut in violated:
+            self.model.addConstr(
+                quicksum(self.d[e] for e in cut.tolist()) <= len(cut) - 1
+            )
+            self.n_cuts['feasibility'] += 1
+            added += 1
+        return added
+
+
+def solve_benders(milp, workers=None, time_limit=None, print_cuts=False):
+    """
+    Solve the reactive problem with the Benders decomposition.
+
+    Args:
+        milp: MILP object (prepared for the reactive case).
+        workers: Number of worker processes for the subproblems.
+        time_limit: Optional time limit in seconds, the time limit of the
+        termination policy of the MILP also applies.
+        print_cuts: Whether to print the cut edges.
+
+    Returns:
+        d_vals: Dictionary of the cut edges and their cut values.
+        flow: Total flow out of the sources.
+        exit_status: 'opt' if the solution is proven optimal, 'feasible' if
+        a solution was found, 'inf' if the problem is infeasible and
+        'not solved' otherwise.
+    """
+    start = time.time()
+    decomposition = BendersDecomposition(milp, workers)
+    result = decomposition.solve(time_limit, milp.policy)
+    runtime = time.time() - start
+    print(f'benders run time: {runtime}')
+    print(f'benders objective: {result.objective} (bound {result.bound}), '
+          f'status: {result.status}, iterations: {result.iterations}')
+    milp.data.update({
+        "benders_runtime": runtime,
+        "benders_iterations": result.iterations,
+        "benders_bound": result.bound,
+        "benders_cuts": decomposition.n_cuts,
+        "benders_workers": decomposition.workers,
+        "term_condition": decomposition.term_condition,
+    })
+    if result.d_vals is None:
+        return {}, 0, result.status
+    d_vals, flow = milp.parse_cuts(result.f_vals, result.d_vals, print_cuts)
+    if result.status == 'optimal':
+        return d_vals, flow, 'opt'
+    return d_vals, flow, 'feasible'
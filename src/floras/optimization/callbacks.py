@@ -0,0 +1,214 @@
+'''
+Gurobi callbacks for the optimization: termination policies and the
+callback chain that records (and streams) every new incumbent.
+'''
+import time
+import numpy as np
+try:
+    from gurobipy import GRB, quicksum
+except ImportError:
+    GRB = quicksum = None
+
+
+class TerminationPolicy():
+    """
+    When to stop the optimization before it proves optimality.
+
+    Args:
+        time_limit: Stop after this many seconds (default 12 hours).
+        gap: Stop once the MIP gap is below this value (default None).
+        stall: Stop if the incumbent objective has not changed for this
+        many seconds (default 1 hour).
+        target_flow: Stop once an incumbent reaches this flow (default None).
+        max_cuts: Stop once an incumbent needs at most this many cuts, with
+        target_flow the incumbent has to satisfy both (default None).
+    """
+    def __init__(self, time_limit=3600 * 12, gap=None, stall=3600, target_flow=None,
+                 max_cuts=None):
+        self.time_limit = time_limit
+        self.gap = gap
+        self.stall = stall
+        self.target_flow = target_flow
+        self.max_cuts = max_cuts
+
+    def check(self, model, where, incumbent=None):
+        """
+        Terminate the model if the policy is met.
+
+        Args:
+            model: Gurobi model (with the attributes set by
+            init_callback_data).
+            where: Callback location.
+            incumbent: The new incumbent at a MIPSOL callback.
+        """
+        if where == GRB.Callback.MIPNODE:
+            obj = model.cbGet(GRB.Callback.MIPNODE_OBJBST)
+            sol_count = model.cbGet(GRB.Callback.MIPNODE_SOLCNT)
+            if abs(obj - model._cur_obj) > 1e-8:
+                # If so, update incumbent
+                model._cur_obj = obj
+                model._obj_time = time.time()
+            if self.stall is not None and sol_count >= 1:
+                if time.time() - model._obj_time > self.stall:
+                    self.stop(model, "Obj not changing")
+        elif where == GRB.Callback.MIP and self.gap is not None:
+            best_bound = model.cbGet(GRB.Callback.MIP_OBJBND)
+            best_obj = model.cbGet(GRB.Callback.MIP_OBJBST)
+            if best_obj < GRB.INFINITY and best_bound > -GRB.INFINITY:
+                mip_gap = abs(best_bound - best_obj) / max(abs(best_obj), 1)
+                if mip_gap < self.gap:
+                    self.stop(model, "Mipgap low")
+        elif where == GRB.Callback.MIPSOL and incumbent is not None:
+            if self.target_reached(incumbent):
+                self.stop(model, "Target reached")
+        if where in [GRB.Callback.MIPNODE, GRB.Callback.MIP]:
+            elapsed_time = time.time() - model._time
+            if self.time_limit is not None and elapsed_time > self.time_limit:
+                self.stop(model, "Timeout")
+
+    def target_reached(self, incumbent):
+        if self.target_flow is None and self.max_cuts is None:
+            return False
+        if self.target_flow is not None and incumbent["flow"] < self.target_flow - 1e-6:
+            return False
+        if self.max_cuts is not None and incumbent["ncuts"] > self.max_cuts:
+            return False
+        return incumbent["flow"] >= 1 - 1e-6
+
+    def stop(self, model, term_condition):
+        model._data["term_condition"] = term_condition
+        model.terminate()
+
+
+# The policies of the former cb and cb_mip callback functions
+POLICIES = {
+    'cb': TerminationPolicy(),
+    'cb_mip': TerminationPolicy(gap=0.05, stall=None),
+}
+
+
+def get_policy(callback):
+    """
+    Get the termination policy for the callback argument of the MILP, a
+    TerminationPolicy, 'cb', 'cb_mip' or None (no early termination).
+    """
+    if callback is None or isinstance(callback, TerminationPolicy):
+        return callback
+    if callback not in POLICIES:
+        print('Requested callback not available, options are \'cb\', \'cb_mip\', '
+              'a TerminationPolicy or None. Using \'cb\'.')
+        callback = 'cb'
+    return POLICIES[callback]
+
+
+class SolverCallback():
+    """
+    Callback chain: every new incumbent is recorded (time, objective, flow
+    and number of cuts), passed to on_incumbent and to the checkpoint, and
+    then checked by the termination policy.
+
+    Args:
+        policy: TerminationPolicy or None.
+        src_flow_cols: Columns of the flow variables out of the sources.
+        cut_cols: Column of the cut variable of every model edge (-1 if the
+        edge cannot be cut).
+        cut_names: Lists of the names (out_state, in_state) of the edges cut
+        with every model edge, needed to stream and checkpoint the cut sets.
+        on_incumbent: Optional function called with a dictionary of every
+        new incumbent (time, timestamp, obj, flow, ncuts and cuts).
+        checkpoint: Optional Checkpoint of the run.
+        cut_weights: Number of edges cut with every model edge (default one
+        per model edge).
+        lazy: Optional check of the candidate cuts (SReachability) whose
+        violated constraints are added as lazy constraints, a rejected
+        candidate is not recorded as incumbent.
+    """
+    def __init__(self, policy, src_flow_cols, cut_cols, cut_names=None,
+                 on_incumbent=None, checkpoint=None, cut_weights=None, lazy=None):
+        self.policy = policy
+        self.src_flow_cols = src_flow_cols
+        self.cut_cols = cut_cols
+        self.cut_names = cut_names
+        self.on_incumbent = on_incumbent
+        self.checkpoint = checkpoint
+        if cut_weights is None:
+            cut_weights = np.ones(len(cut_cols))
+        self.cut_weights = cut_weights
+        self.lazy = lazy
+
+    def __call__(self, model, where):
+        incumbent = None
+        x = None
+        if where == GRB.Callback.MIPSOL:
+            x = np.asarray(model.cbGetSolution(model._vars))
+            if self.lazy is not None and self.add_lazy(model, x):
+                return
+            incumbent = self.incumbent(model, x)
+            data = model._data
+            if data["time_to_first_incumbent"] is None:
+                data["time_to_first_incumbent"] = incumbent["time"]
+            data["incumbents"].append(
+                {key: incumbent[key] for key in ["time", "obj", "flow", "ncuts"]}
+            )
+            if self.on_incumbent is not None:
+                self.on_incumbent(incumbent)
+        if self.checkpoint is not None:
+            self.checkpoint.update(model, where, x, incumbent)
+        if self.policy is not None:
+            self.policy.check(model, where, incumbent)
+
+    def cut_values(self, x):
+        d_vals = np.zeros(len(self.cut_cols))
+        cuttable = self.cut_cols >= 0
+        d_vals[cuttable] = x[self.cut_cols[cuttable]]
+        return d_vals
+
+    def add_lazy(self, model, x):
+        """
+        Add the lazy constraints violated by the candidate solution x.
+
+        Returns:
+            added: Whether the candidate was rejected.
+        """
+        cuts = self.lazy.violated(self.cut_values(x))
+        for cut in cuts:
+            model.cbLazy(
+                quicksum(model._vars[col] for col in self.cut_cols[cut]) <= len(cut) - 1
+            )
+        model._data["lazy_cuts"] = model._data.get("lazy_cuts", 0) + len(cuts)
+        return len(cuts) > 0
+
+    def incumbent(self, model, x):
+        d_vals = self.cut_values(x)
+        cut_edges = np.flatnonzero(d_vals > 0.9)
+        incumbent = {
+            "time": model.cbGet(GRB.Callback.RUNTIME),
+            "timestamp": time.time(),
+            "obj": model.cbGet(GRB.Callback.MIPSOL_OBJ),
+            "flow": float(x[self.src_flow_cols].sum()),
+            "ncuts": int(self.cut_weights[cut_edges].sum()),
+        }
+        if self.cut_names is not None:
+            incumbent["cuts"] = [
+                name for e in cut_edges for name in self.cut_names[e]
+            ]
+        return incumbent
+
+
+def init_callback_data(model, data):
+    """
+    Set the model attributes used by the callbacks.
+
+    Args:
+        model: Gurobi model.
+        data: Dictionary to store the termination condition and incumbents.
+    """
+    data.setdefault("term_condition", None)
+    data["time_to_first_incumbent"] = None
+    data["incumbents"] = []
+    model._data = data
+    # Last updated objective and time (for callback function)
+    model._obj_time = time.time()  # Track the last improvement time
+    model._cur_obj = GRB.INFINITY  # Start with an infinite objective
+    model._time = time.time()  # Track when optimization starts
+    model._vars = model.getVars()
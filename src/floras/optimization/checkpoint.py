@@ -0,0 +1,146 @@
+'''
+Checkpoints of long MILP runs (gurobi backend). A checkpoint directory holds
+the model in MPS form, the pickled graph data and settings of the MILP, the
+columns of its flow, cut and partition variables, and the best incumbent
+(cut set, flow, objective and bound in incumbent.json, all variable values
+in start.npy) so that the run can be resumed with the incumbent as MIP start
+without rebuilding the product graphs and the model.
+'''
+import os
+import json
+import time
+import _pickle as pickle
+import numpy as np
+try:
+    from gurobipy import GRB, Env, read
+except ImportError:
+    GRB = Env = read = None
+
+MODEL_FILE = 'model.mps'
+GRAPHS_FILE = 'graphs.pkl'
+COLUMNS_FILE = 'columns.npz'
+INCUMBENT_FILE = 'incumbent.json'
+START_FILE = 'start.npy'
+
+
+class Checkpoint():
+    """
+    Checkpoint of a MILP run, the incumbent is written on improvement at most
+    every interval seconds and at the end of the run.
+
+    Args:
+        path: Checkpoint directory.
+        interval: Minimum time in seconds between two incumbent writes
+        (default 600).
+    """
+    def __init__(self, path, interval=600):
+        self.path = path
+        self.interval = interval
+        self.x = None
+        self.incumbent = None
+        self.bound = None
+        self.last_write = None
+
+    def start(self, model, graphs, columns):
+        """
+        Write the model, the graph data and the variable columns.
+
+        Args:
+            model: Gurobi model of the MILP.
+            graphs: Tuple (GD, SD, settings) of the MILP.
+            columns: Dictionary of the 'flow', 'cut' and 'partition' columns.
+        """
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+        model.update()
+        model.write(os.path.join(self.path, MODEL_FILE))
+        with open(os.path.join(self.path, GRAPHS_FILE), 'wb') as pckl_file:
+            pickle.dump(graphs, pckl_file)
+        np.savez(os.path.join(self.path, COLUMNS_FILE), **columns)
+        self.x, self.incumbent, self.bound = None, None, None
+        self.last_write = time.time()
+
+    def update(self, model, where, x=None, incumbent=None):
+        """
+        Keep the new incumbent and the bound, and write them if the last write
+        is older than the interval (called by the SolverCallback).
+        """
+        if incumbent is not None:
+            self.x, self.incumbent = x, incumbent
+            self.bound = model.cbGet(GRB.Callback.MIPSOL_OBJBND)
+        elif where == GRB.Callback.MIP:
+            self.bound = model.cbGet(GRB.Callback.MIP_OBJBND)
+        else:
+            return
+        if self.x is not None and time.time() - self.last_write > self.interval:
+            self.write()
+
+    def finish(self, model, incumbent, status):
+        """
+        Write the final incumbent and bound of the run.
+
+        Args:
+            model: Solved Gurobi model.
+            incumbent: Dictionary of the final incumbent (None if there is no
+            solution).
+            status: Status of the run.
+        """
+        if incumbent is not None:
+            self.x = np.array(model.getAttr('X', model.getVars()))
+            self.incumbent = incumbent
+        if model.SolCount >= 1 or model.status == GRB.OPTIMAL:
+            self.bound = model.ObjBound
+        self.write(status)
+
+    def write(self, status='running'):
+        if self.x is not None:
+            np.save(os.path.join(self.path, START_FILE), self.x)
+        incumbent = dict(self.incumbent or {})
+        # null if no bound is known yet (json has no infinity)
+        incumbent["bound"] = finite_or_none(self.bound)
+        incumbent["status"] = status
+        with open(os.path.join(self.path, INCUMBENT_FILE), 'w') as fp:
+            json.dump(incumbent, fp, allow_nan=False)
+        self.last_write = time.time()
+
+
+def read_checkpoint(path):
+    """
+    Read a checkpoint.
+
+    Args:
+        path: Checkpoint directory.
+
+    Returns:
+        graphs: Tuple (GD, SD, settings) of the MILP.
+        model: Gurobi model read from the MPS file.
+        columns: Dictionary of the 'flow', 'cut' and 'partition' columns.
+        start: Variable values of the incumbent (None if there is none).
+        incumbent: Dictionary of the written incumbent, bound and status
+        (None if there is none, the bound is None if it is not known).
+    """
+    with open(os.path.join(path, GRAPHS_FILE), 'rb') as pckl_file:
+        graphs = pickle.load(pckl_file)
+    env = Env(empty=True)
+    env.setParam('OutputFlag', 0)
+    env.start()
+    model = read(os.path.join(path, MODEL_FILE), env=env)
+    model.Params.OutputFlag = 1
+    with np.load(os.path.join(path, COLUMNS_FILE)) as npz:
+        columns = {key: npz[key] for key in npz.files}
+    start = None
+    if os.path.exists(os.path.join(path, START_FILE)):
+        start = np.load(os.path.join(path, START_FILE))
+    incumbent = None
+    if os.path.exists(os.path.join(path, INCUMBENT_FILE)):
+        with open(os.path.join(path, INCUMBENT_FILE), 'r') as fp:
+            incumbent = json.load(fp)
+        # older checkpoints store an unknown bound as Infinity
+        incumbent["bound"] = finite_or_none(incumbent.get("bound"))
+    return graphs, model, columns, start, incumbent
+
+
+def finite_or_none(value):
+    if value is None or not np.isfinite(value):
+        return None
+    return float(value)
@@ -0,0 +1,276 @@
+'''
+Decomposition of the virtual product graph by the layers of the automaton.
+The automaton state only moves forward through the DAG of its strongly
+connected components, which layers the product graph. The cuts separate the
+sources from the sinks on G without I, which lies in the layers before the
+tester accepts. These layers are solved as a sub-problem and the later
+layers, which only carry the flow from I to the sinks, are checked with a
+maximum flow for the stitched cut.
+'''
+import time
+import networkx as nx
+import numpy as np
+from floras.components.compact_graph import CompactGraph
+from floras.optimization.optimization import MILP
+from floras.optimization.presolve import Reduction
+from floras.optimization.benders import flow_cut
+
+
+class LayerDecomposition():
+    """
+    Automaton layers of the product graph, split into the layers before and
+    after the tester accepts.
+
+    The split is valid if every layer is either before or after the tester
+    accepts, no edge leads back from a layer after the tester accepts, the
+    sources are before and a sink is after the tester accepts.
+
+    Args:
+        GD: GraphData of the virtual product graph.
+    """
+    def __init__(self, GD):
+        self.GD = GD
+        self.layers = automaton_layers(GD)
+        n = len(self.layers)
+        self.is_post = np.zeros(n, dtype=bool)
+        self.is_post[GD.acc_test] = True
+        self.is_sink = np.zeros(n, dtype=bool)
+        self.is_sink[GD.sink] = True
+        self.reason = self.check()
+
+    @property
+    def valid(self):
+        return self.reason is None
+
+    def check(self):
+        # why the layers cannot be split (None if they can)
+        G = self.GD.compact
+        layers = self.layers[G.node_mask]
+        post = self.is_post[G.node_mask]
+        mixed = np.intersect1d(layers[post], layers[~post])
+        if len(mixed):
+            return f'layer {mixed[0]} holds states before and after the tester accepts'
+        if (self.is_post[G.src] & ~self.is_post[G.dst]).any():
+            return 'the tester acceptance is not permanent'
+        if self.is_post[self.GD.init].any():
+            return 'an initial state is accepted by the tester'
+        if not (self.is_post & self.is_sink).any():
+            return 'no sink is reached after the tester accepts'
+        return None
+
+    def sizes(self):
+        """Number of nodes and edges of every layer and its side."""
+        G = self.GD.compact
+        same = self.layers[G.src] == self.layers[G.dst]
+        sizes = []
+        for layer in np.unique(self.layers[G.node_mask]).tolist():
+            nodes = G.node_mask & (self.layers == layer)
+            sizes.append({
+                "layer": layer,
+                "nodes": int(nodes.sum()),
+                "edges": int((nodes[G.src] & same).sum()),
+                "side": 'after' if self.is_post[nodes].all() else 'before',
+            })
+        return sizes
+
+    def report(self):
+        parts = ', '.join(
+            f'{size["nodes"]} nodes/{size["edges"]} edges {size["side"]}'
+            for size in self.sizes()
+        )
+        print(f'decomposition: {len(self.sizes())} automaton layers ({parts}).')
+
+    def reduction(self, milp, G):
+        """
+        Reduction of G to the layers before the tester accepts. The edges
+        into the later layers are kept, and every entered I node gets an
+        edge to a sink after the tester accepts, with the capacity of the
+        edges into it. In the static case the edges in the later layers that
+        are coupled to the kept edges are counted, the split does not hold
+        if there are any.
+
+        Args:
+            milp: MILP of the sub-problem (before its graph is reduced).
+            G: CompactGraph of the virtual product graph without self-loops.
+
+        Returns:
+            reduction: Reduction of G.
+        """
+        n = G.n_nodes
+        src, dst = G.src, G.dst
+        pre = G.node_mask & ~self.is_post
+        kept = np.flatnonzero(pre[src])
+        cut_origins = [[e] for e in kept.tolist()]
+        coupled = 0
+        if milp.type == 'static':
+            milp.model_edges = G.edges
+            edge_class, _ = milp.physical_transitions()
+            classes = np.array([edge_class[edge] for edge in G.edges], dtype=np.int64)
+            # the later edges of a class are cut with its kept edges
+            coupled = int(np.isin(classes[~pre[src]], classes[kept]).sum())
+
+        entries = self.is_post[dst[kept]] & ~self.is_sink[dst[kept]]
+        into = np.bincount(dst[kept][entries], minlength=n)
+        entered = np.flatnonzero(into)
+        sink = np.flatnonzero(G.node_mask & self.is_post & self.is_sink)[0]
+        r_src = np.concatenate([src[kept], entered])
+        r_dst = np.concatenate([dst[kept], np.full(len(entered), sink)])
+        capacity = np.concatenate([np.ones(len(kept)), into[entered]]).astype(float)
+        cut_origins += [[] for _ in entered]
+        contracted = np.arange(len(r_src)) >= len(kept)
+
+        node_mask = pre.copy()
+        node_mask[dst[kept]] = True
+        node_mask[sink] = True
+        order = np.argsort(r_src, kind='stable')
+        graph = CompactGraph(
+            n, r_src[order], r_dst[order], node_attr=G.node_attr, node_mask=node_mask
+        )
+        stats = {
+            "nodes": G.number_of_nodes(),
+            "edges": G.number_of_edges(),
+            "reduced_nodes": graph.number_of_nodes(),
+            "reduced_edges": graph.number_of_edges(),
+            "coupled_edges": coupled,
+        }
+        return Reduction(
+            graph, capacity[order], [cut_origins[k] for k in order.tolist()],
+            contracted[order], stats
+        )
+
+
+def automaton_layers(GD):
+    """
+    Layer of every node of G: the strongly connected component of its
+    automaton state on the transitions of GD.graph, numbered in topological
+    order.
+
+    Returns:
+        layers: Array of the layer of every node (-1 for no node).
+    """
+    A = nx.DiGraph()
+    for i in GD.graph.nodes:
+        A.add_node(GD.node_dict[i][-1])
+    for (i, j) in GD.graph.edges:
+        A.add_edge(GD.node_dict[i][-1], GD.node_dict[j][-1])
+    C = nx.condensation(A)
+    order = {c: k for k, c in enumerate(nx.topological_sort(C))}
+    layer = {q: order[c] for q, c in C.graph['mapping'].items()}
+    layers = np.full(GD.compact.n_nodes, -1, dtype=np.int64)
+    for i in GD.graph.nodes:
+        layers[i] = layer[GD.node_dict[i][-1]]
+    return layers
+
+
+class LayerMILP(MILP):
+    """
+    MILP on the layers before the tester accepts (see LayerDecomposition),
+    its objective is an upper bound on the objective of the MILP on G.
+
+    Args:
+        GD: GraphData object representing the virtual product graph G.
+        SD: GraphData object representing the system virtual graph S.
+        decomposition: Valid LayerDecomposition of GD.
+        type: Type of the optimization ('static' or 'reactive').
+        kwargs: Further arguments of the MILP.
+    """
+    def __init__(self, GD, SD, decomposition, type='static', **kwargs):
+        self.decomposition = decomposition
+        super().__init__(GD, SD, type, presolve=True, **kwargs)
+
+    def presolve_graph(self, G):
+        return self.reduce_graph(G, self.decomposition.reduction(self, G))
+
+
+def stitched_flow(milp, d_vals):
+    """
+    Maximum flow on G without the edges cut by the sub-problem.
+
+    Args:
+        milp: Solved LayerMILP.
+        d_vals: Cut values aligned with its model edges.
+
+    Returns:
+        flow: Value of the maximum flow on G.
+    """
+    G = milp.unreduced_G
+    cut = np.zeros(G.number_of_edges(), dtype=bool)
+    for e in np.flatnonzero(d_vals > 0.9).tolist():
+        for (i, j) in milp.cut_origins[e]:
+            cut[G.edge_id(i, j)] = True
+    is_src = np.zeros(G.n_nodes, dtype=bool)
+    is_src[milp.GD.init] = True
+    is_sink = np.zeros(G.n_nodes, dtype=bool)
+    is_sink[milp.GD.sink] = True
+    # no flow into the sources or out of the sinks
+    usable = ~is_src[G.dst] & ~is_sink[G.src] & ~cut
+    return flow_cut(
+        G.n_nodes, G.src, G.dst, usable.astype(float), np.flatnonzero(is_src),
+        np.flatnonzero(is_sink)
+    )[0]
+
+
+def solve_decomposed(GD, SD, case, start=None, time_limit=None, **kwargs):
+    """
+    Solve the layers before the tester accepts and stitch the cut to G.
+
+    The sub-problem is a relaxation: every cut of G restricted to these
+    layers is feasible for it with at least the same flow and the same
+    number of cuts. The stitched cut is feasible on G, so it is optimal if
+    the maximum flow on G without it matches the flow of the sub-problem.
+    The layers are not split if the static coupling links them. The path
+    taken and the sizes of the layers are printed.
+
+    Args:
+        GD: GraphData of the virtual product graph.
+        SD: GraphData of the system virtual graph.
+        case: 'static' or 'reactive'.
+        start: Optional MIP start of the sub-problem (see MILP.warm_start).
+        time_limit: Optional time limit of the sub-problem in seconds.
+        kwargs: Further arguments of the MILP.
+
+    Returns:
+        d_vals: Dictionary of the cut edges and their cut values.
+        flow: Total flow out of the sources on G.
+        exit_status: 'opt' if the stitched cut is optimal, 'feasible' if it
+        keeps a flow on G (a start for the monolithic model) and 'not
+        solved' otherwise (the monolithic model has to be solved).
+    """
+    decomposition = LayerDecomposition(GD)
+    decomposition.report()
+    if not decomposition.valid:
+        print(f'decomposition: {decomposition.reason}, solving the monolithic model.')
+        return {}, 0, 'not solved'
+    begin = time.time()
+    milp = LayerMILP(GD, SD, decomposition, case, **kwargs)
+    stats = milp.reduction.stats
+    if stats["coupled_edges"]:
+        print(f'decomposition: the static coupling links {stats["coupled_edges"]} '
+              f'edges after the tester accepts, solving the monolithic model.')
+        return {}, 0, 'not solved'
+    print(f'decomposition: sub-problem of {stats["reduced_nodes"]} of '
+          f'{stats["nodes"]} nodes and {stats["reduced_edges"]} of '
+          f'{stats["edges"]} edges.')
+    d_vals, sub_flow, _ = milp.optimize(start=start, time_limit=time_limit)
+    if milp.data["status"] != 'optimal':
+        print(f'decomposition: sub-problem {milp.data["status"]}, solving the '
+              f'monolithic model.')
+        return {}, 0, 'not solved'
+    _, d_sub = milp.solution_arrays()
+    flow = stitched_flow(milp, d_sub)
+    milp.data["decomposition"] = {
+        "layers": decomposition.sizes(),
+        "sub_problem": stats,
+        "sub_flow": sub_flow,
+        "stitched_flow": flow,
+        "runtime": time.time() - begin,
+    }
+    if flow >= sub_flow - 1e-6:
+        print(f'decomposition: the stitched cut keeps the flow {flow} of the '
+              f'layers, it is optimal.')
+        return d_vals, flow, 'opt'
+    print(f'decomposition: the stitched cut keeps a flow of {flow} of {sub_flow}, '
+          f'solving the monolithic model.')
+    if flow >= 1:
+        return d_vals, flow, 'feasible'
+    return {}, 0, 'not solved'
@@ -0,0 +1,88 @@
+'''
+Lazy reachability constraints for the reactive problem. Instead of one copy
+of the flow on S for every history variable q and entry node of S, the cuts
+of a candidate solution are checked by a search on S and only the violated
+reachability constraints are added to the model.
+'''
+import numpy as np
+
+
+class SReachability():
+    """
+    Reachability of the sinks of S from the source of every flow on S under
+    the cuts of a candidate solution.
+
+    A cut on an edge of G (leaving a node with history variable q) blocks
+    the edges of S it is coupled to for the flows of q. If no sink can be
+    reached from a source, all S edges leaving the reached nodes R are
+    blocked and one of them has to be opened: with one cut edge g(e) of G
+    chosen for every such S edge e, the constraint is
+
+        sum over g in {g(e)} of d_g <= |{g(e)}| - 1.
+
+    Args:
+        S: CompactGraph of the virtual system graph (without self-loops).
+        s_sink: Sink nodes of S.
+        commodities: List of (name, q, source) of the flows on S.
+        couplings: Dictionary mapping every q to a tuple of arrays (edge ids
+        in S, edge ids in G) of its coupled edges.
+    """
+    def __init__(self, S, s_sink, commodities, couplings):
+        self.S = S
+        self.is_sink = np.zeros(S.n_nodes, dtype=bool)
+        self.is_sink[s_sink] = True
+        self.commodities = [
+            (q, source) for _, q, source in commodities if not self.is_sink[source]
+        ]
+        self.couplings = couplings
+
+    def violated(self, d_vals, commodities=None):
+        """
+        Reachability constraints violated by the cut values.
+
+        Args:
+            d_vals: Cut values aligned with the model edges.
+            commodities: Optional list of the (q, source) to check (default
+            all flows on S).
+
+        Returns:
+            cuts: List of arrays of the model edge ids g(e) of every violated
+            constraint.
+        """
+        cut = np.asarray(d_vals) > 0.5
+        graphs = {}
+        found = set()
+        cuts = []
+        if commodities is None:
+            commodities = self.commodities
+        for q, source in commodities:
+            s_edges, g_edges = self.couplings[q]
+            active = cut[g_edges]
+            if not active.any():
+                continue
+            if q not in graphs:
+                blocked = np.zeros(self.S.number_of_edges(), dtype=bool)
+                blocked[s_edges[active]] = True
+                graphs[q] = self.S.edge_subgraph(~blocked)
+            reached = graphs[q].reachable([source])
+            if (reached & self.is_sink).any():
+                continue
+            leaving = reached[self.S.src] & ~reached[self.S.dst]
+            constraint = self.opening(s_edges[active], g_edges[active], leaving)
+            if constraint not in found:
+                found.add(constraint)
+                cuts.append(np.array(constraint, dtype=np.int64))
+        return cuts
+
+    def opening(self, s_edges, g_edges, leaving):
+        # one cut edge of G for every blocked S edge leaving the reached
+        # nodes, reusing the chosen ones where possible
+        options = {}
+        for e, g in zip(s_edges.tolist(), g_edges.tolist()):
+            if leaving[e]:
+                options.setdefault(e, []).append(g)
+        chosen = set()
+        for gs in options.values():
+            if chosen.isdisjoint(gs):
+                chosen.add(gs[0])
+        return tuple(sorted(chosen))
@@ -0,0 +1,146 @@
+'''
+Solver independent matrix form of the optimization problem.
+'''
+import copy
+import numpy as np
+from scipy.sparse import coo_matrix
+
+
+class MatrixFormulation():
+    """
+    Mixed integer linear program in matrix form
+
+        maximize c^T x  subject to  A x (sense) rhs,  lb <= x <= ub,
+
+    where sense is '<', '>' or '=' for every row and the entries of x
+    flagged in integrality are binary/integer. Variables and constraints
+    are added in named blocks, the block slices are kept in var_blocks and
+    row_blocks.
+    """
+    def __init__(self):
+        self.var_blocks = {}
+        self.row_blocks = {}
+        self.n_vars = 0
+        self.n_rows = 0
+        self._c = []
+        self._lb = []
+        self._ub = []
+        self._integrality = []
+        self._names = []
+        self._rows = []
+        self._cols = []
+        self._vals = []
+        self._sense = []
+        self._rhs = []
+        self.A = None
+
+    def add_variables(self, name, n, lb=0.0, ub=1.0, obj=0.0, integer=False,
+                      labels=None):
+        """
+        Add a block of n variables.
+
+        Args:
+            name: Name of the block.
+            n: Number of variables.
+            lb, ub, obj: Bounds and objective coefficients (scalars or arrays).
+            integer: Whether the variables are integer.
+            labels: Optional labels of the variables, their names are
+            name[label] (default: name[k]).
+
+        Returns:
+            offset: Index of the first variable of the block in x.
+        """
+        offset = self.n_vars
+        self.var_blocks[name] = slice(offset, offset + n)
+        self._c.append(np.broadcast_to(np.asarray(obj, dtype=float), (n,)))
+        self._lb.append(np.broadcast_to(np.asarray(lb, dtype=float), (n,)))
+        self._ub.append(np.broadcast_to(np.asarray(ub, dtype=float), (n,)))
+        self._integrality.append(np.full(n, integer, dtype=bool))
+        if labels is None:
+            labels = range(n)
+        self._names.extend(name + '[' + str(label) + ']' for label in labels)
+        self.n_vars += n
+        return offset
+
+    def add_constraints(self, name, n, rows, cols, vals, sense, rhs):
+        """
+        Add a block of n constraint rows given as coordinate triplets.
+
+        Args:
+            name: Name of the block.
+            n: Number of rows in the block.
+            rows: Row of each entry within the block (0, ..., n - 1).
+            cols: Variable index of each entry.
+            vals: Coefficient of each entry.
+            sense: Sense of the rows ('<', '>' or '=').
+            rhs: Right hand side (scalar or array of length n).
+        """
+        offset = self.n_rows
+        self.row_blocks[name] = slice(offset, offset + n)
+        rows = np.asarray(rows, dtype=np.int64)
+        self._rows.append(rows + offset)
+        self._cols.append(np.asarray(cols, dtype=np.int64))
+        self._vals.append(np.broadcast_to(np.asarray(vals, dtype=float), rows.shape))
+        self._sense.append(np.full(n, sense))
+        self._rhs.append(np.broadcast_to(np.asarray(rhs, dtype=float), (n,)))
+        self.n_rows += n
+
+    def relaxation(self):
+        """Copy of the formulation with all variables continuous."""
+        lp = copy.copy(self)
+        lp._integrality = [
+            np.zeros(len(block), dtype=bool) for block in self._integrality
+        ]
+        return lp
+
+    def finalize(self):
+        """Assemble the constraint matrix A in CSR form."""
+        self.A = coo_matrix(
+            (self._concat(self._vals, float),
+             (self._concat(self._rows, np.int64), self._concat(self._cols, np.int64))),
+            shape=(self.n_rows, self.n_vars)
+        ).tocsr()
+        return self
+
+    def _concat(self, parts, dtype):
+        if not parts:
+            return np.zeros(0, dtype=dtype)
+        return np.concatenate(parts).astype(dtype, copy=False)
+
+    @property
+    def c(self):
+        return self._concat(self._c, float)
+
+    @property
+    def lb(self):
+        return self._concat(self._lb, float)
+
+    @property
+    def ub(self):
+        return self._concat(self._ub, float)
+
+    @property
+    def integrality(self):
+        return self._concat(self._integrality, bool)
+
+    @property
+    def names(self):
+        return self._names
+
+    @property
+    def sense(self):
+        return self._concat(self._sense, '<U1')
+
+    @property
+    def rhs(self):
+        return self._concat(self._rhs, float)
+
+    def row_bounds(self):
+        """
+        Lower and upper bounds of the rows, lb <= A x <= ub.
+        """
+        sense = self.sense
+        rhs = self.rhs
+        row_lb = np.where(sense == '<', -np.inf, rhs)
+        row_ub = np.where(sense == '>', np.inf, rhs)
+        return row_lb, row_ub
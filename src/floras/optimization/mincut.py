@@ -0,0 +1,388 @@
+'''
+Combinatorial solver for the static problem using maximum flows on the
+virtual product graph. It finds an incumbent (flow and cut) and an upper
+bound on the flow, and can be used standalone or as a MIP start.
+'''
+import time
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import maximum_flow
+from floras.components.compact_graph import CompactGraph
+
+
+class MinCutResult():
+    """
+    Incumbent and bound found by the min-cut solver.
+
+    Args:
+        f_vals: Flow values aligned with the model edges.
+        d_vals: Cut values aligned with the model edges.
+        m_vals: Partition values aligned with the model nodes without I.
+        flow: Value of the flow of the incumbent.
+        bound: Upper bound on the flow of any feasible cut.
+        cut_weights: Number of edges cut with every model edge (default one
+        per model edge).
+    """
+    def __init__(self, f_vals, d_vals, m_vals, flow, bound, cut_weights=None):
+        self.f_vals = f_vals
+        self.d_vals = d_vals
+        self.m_vals = m_vals
+        self.flow = flow
+        self.bound = bound
+        if cut_weights is None:
+            cut_weights = np.ones(len(d_vals))
+        self.cut_weights = cut_weights
+
+    @property
+    def ncuts(self):
+        return int(self.cut_weights[self.d_vals > 0.9].sum())
+
+    @property
+    def status(self):
+        """
+        'optimal' if the flow matches the bound without cuts, 'flow-optimal'
+        if the flow matches the bound (the number of cuts is the smallest
+        one found for the kept paths, it is not proven minimal),
+        'feasible' if there is a flow but the bound is not reached, and
+        'not solved' if no flow could be kept (the heuristic failed, the
+        problem can still be feasible).
+        """
+        if self.flow < 1:
+            return 'not solved'
+        elif self.flow >= self.bound and self.ncuts == 0:
+            return 'optimal'
+        elif self.flow >= self.bound:
+            return 'flow-optimal'
+        return 'feasible'
+
+
+def mincut(milp, coupling=None):
+    """
+    Find a cut and flow for the static problem with maximum flows.
+
+    The flow has to pass through an intermediate node, which is relaxed to a
+    maximum flow on a two layer copy of G (before and after visiting I) that
+    gives the upper bound. The paths of that flow are kept greedily if they
+    do not share an edge with the kept paths and the sources can still be
+    separated from the sinks on G without I by a cut that does not touch the
+    kept paths. The cut is a minimum cut for the kept paths. With coupling,
+    all edges of a physical transition on a kept path are protected and the
+    cut is closed under the static and bidirectional couplings. Edges of a
+    presolved graph carry up to their capacity in paths and are weighted by
+    the number of edges they cut. If a path is not kept because protecting
+    its transitions connects the sources to the sinks, the one of these
+    transitions whose exclusion leaves the largest flow is excluded and the
+    flow is decomposed again, until no path can be kept and no transition is
+    excluded.
+
+    Args:
+        milp: MILP object (prepared for the static case).
+        coupling: Whether to respect the static coupling of the cuts
+        (default: True for the static case).
+
+    Returns:
+        result: MinCutResult.
+    """
+    if coupling is None:
+        coupling = milp.type == 'static'
+    G = milp.G
+    n = G.n_nodes
+    src, dst = G.src, G.dst
+    is_src = np.zeros(n, dtype=bool)
+    is_src[milp.src] = True
+    is_sink = np.zeros(n, dtype=bool)
+    is_sink[milp.sink] = True
+    is_I = np.zeros(n, dtype=bool)
+    is_I[milp.cleaned_intermed] = True
+    # edges that can carry flow (no flow into the sources or out of the sinks)
+    usable = ~is_src[dst] & ~is_sink[src]
+    keep = milp.edges_without_I_mask()
+    if coupling:
+        edge_class, _ = milp.physical_transitions()
+        classes = np.array(
+            [edge_class[edge] for edge in milp.model_edges], dtype=np.int64
+        )
+    else:
+        classes = np.arange(len(src))
+    # cutting an edge cuts all edges of its class
+    weights = np.bincount(classes, weights=milp.cut_weights)[classes].astype(np.int64)
+    capacity = milp.capacity.astype(np.int64)
+
+    layered = layered_graph(n, src, dst, usable, is_src, is_sink, is_I)
+    cut = {
+        'paths': [],
+        'used': np.zeros(len(src), dtype=np.int64),
+        'protected': np.zeros(len(src), dtype=bool),
+        'side': source_side(
+            n, src, dst, keep, weights, np.zeros(len(src), dtype=bool),
+            is_src, is_sink, is_I
+        ),
+    }
+    excluded = np.zeros(len(src), dtype=bool)
+    bound = None
+    while True:
+        # candidate paths from a maximum flow on the unused edges
+        flow_value, candidates = layered_paths(
+            layered, np.where(excluded, 0, capacity - cut['used'])
+        )
+        if bound is None:
+            bound = flow_value
+        added = False
+        changed = False
+        for path in candidates:
+            if add_path(path, cut, n, src, dst, keep, weights, classes, capacity,
+                        is_src, is_sink, is_I):
+                added = True
+                continue
+            blocking = blocking_classes(path, cut, n, src, dst, keep, classes,
+                                        is_src, is_sink, is_I)
+            if len(blocking):
+                # try the paths without the transition that is needed least
+                residual = capacity - cut['used']
+                flows = [
+                    layered_paths(
+                        layered, np.where(excluded | (classes == c), 0, residual)
+                    )[0]
+                    for c in blocking
+                ]
+                excluded |= classes == blocking[int(np.argmax(flows))]
+                changed = True
+        if not added and not changed:
+            break
+    paths, side = cut['paths'], cut['side']
+
+    f_vals = cut['used'].astype(float)
+    d_vals = np.zeros(len(src))
+    if side is not None:
+        crossing = keep & side[src] & ~side[dst]
+        d_vals[np.isin(classes, classes[crossing])] = 1
+        m_vals = side[milp.model_nodes_without_I].astype(float)
+    else:
+        m_vals = np.zeros(len(milp.model_nodes_without_I))
+    return MinCutResult(
+        f_vals, d_vals, m_vals, float(len(paths)), float(bound), milp.cut_weights
+    )
+
+
+def add_path(path, cut, n, src, dst, keep, weights, classes, capacity, is_src,
+             is_sink, is_I):
+    """
+    Keep the path if the kept paths leave capacity on its edges and the
+    sources can still be separated from the sinks without cutting it.
+
+    Returns:
+        added: Whether the path was kept.
+    """
+    if len(np.unique(path)) < len(path) or (cut['used'][path] >= capacity[path]).any():
+        return False
+    protected = cut['protected'] | np.isin(classes, classes[path])
+    side = source_side(n, src, dst, keep, weights, protected, is_src, is_sink, is_I)
+    if side is None:
+        return False
+    cut['paths'].append(path)
+    cut['used'][path] += 1
+    cut['protected'] = protected
+    cut['side'] = side
+    return True
+
+
+def blocking_classes(path, cut, n, src, dst, keep, classes, is_src, is_sink,
+                     is_I):
+    """
+    Classes of the path that connect the sources to the sinks on G without I
+    through protected edges if the path is protected.
+
+    Returns:
+        blocking: Array of the classes in the order of the path (empty if
+        the path was not kept for another reason).
+    """
+    new = np.isin(classes, classes[path]) & ~cut['protected']
+    protected = keep & (cut['protected'] | new)
+    G = CompactGraph(n, src[protected], dst[protected])
+    forward = G.reachable(np.flatnonzero(is_src & ~is_I))
+    backward = G.coreachable(np.flatnonzero(is_sink & ~is_I))
+    route = protected & forward[src] & backward[dst] & new
+    if not route.any():
+        return np.zeros(0, dtype=np.int64)
+    blocking = classes[path][np.isin(classes[path], classes[route])]
+    _, first = np.unique(blocking, return_index=True)
+    return blocking[np.sort(first)]
+
+
+def layered_graph(n, src, dst, usable, is_src, is_sink, is_I):
+    """
+    Two layer copy of G, layer 0 holds the nodes not in I before a node in I
+    is visited and layer 1 all nodes after, with a super source 2n and a
+    super sink 2n + 1.
+
+    Returns:
+        layered: Tuple (number of nodes, edge out nodes, edge in nodes, edge
+        id in G of every edge or -1 for the super source and sink edges).
+    """
+    S, T = 2 * n, 2 * n + 1
+    e = np.flatnonzero(usable)
+    before = e[~is_I[src[e]] & ~is_I[dst[e]]]
+    enter = e[~is_I[src[e]] & is_I[dst[e]]]
+    sources = np.flatnonzero(is_src)
+    sinks = np.flatnonzero(is_sink)
+    h_src = np.concatenate(
+        [src[before], src[enter], n + src[e], np.full(len(sources), S), n + sinks]
+    )
+    h_dst = np.concatenate([
+        dst[before], n + dst[enter], n + dst[e],
+        np.where(is_I[sources], n + sources, sources), np.full(len(sinks), T)
+    ])
+    h_edge = np.concatenate(
+        [before, enter, e, np.full(len(sources) + len(sinks), -1)]
+    )
+    return 2 * n + 2, h_src, h_dst, h_edge
+
+
+def layered_paths(layered, residual):
+    """
+    Maximum flow through I on the layered graph with the residual capacity
+    of the edges of G, decomposed into paths.
+
+    Returns:
+        flow_value: Value of the maximum flow.
+        paths: List of the edge id arrays in G of the paths.
+    """
+    n, h_src, h_dst, h_edge = layered
+    cap = np.where(h_edge < 0, 0, residual[np.maximum(h_edge, 0)])
+    free = (h_edge < 0) | (cap > 0)
+    h_src, h_dst, h_edge = h_src[free], h_dst[free], h_edge[free]
+    flow_value, flows = max_flow(n, h_src, h_dst, n - 2, n - 1, cap[free])
+    paths = []
+    for path in decompose(h_src, h_dst, flows, n - 2, n - 1):
+        edges = h_edge[path]
+        paths.append(edges[edges >= 0])
+    return flow_value, paths
+
+
+def source_side(n, src, dst, keep, weights, protected, is_src, is_sink, is_I):
+    """
+    Source side of a minimum cut separating the sources from the sinks on G
+    without I that does not cut protected edges.
+
+    Returns:
+        side: Boolean array over the nodes (None if there is no such cut).
+    """
+    S, T = n, n + 1
+    big = int(weights[keep].sum()) + 1
+    e = np.flatnonzero(keep)
+    sources = np.flatnonzero(is_src & ~is_I)
+    sinks = np.flatnonzero(is_sink & ~is_I)
+    c_src = np.concatenate([src[e], np.full(len(sources), S), sinks])
+    c_dst = np.concatenate([dst[e], sources, np.full(len(sinks), T)])
+    cap = np.concatenate([
+        np.where(protected[e], big, weights[e]),
+        np.full(len(sources) + len(sinks), big)
+    ])
+    C = csr_matrix((cap, (c_src, c_dst)), shape=(n + 2, n + 2))
+    result = maximum_flow(C, S, T)
+    if result.flow_value >= big:
+        return None
+    # nodes reachable from S in the residual graph
+    R = (C - result.flow).tocoo()
+    positive = R.data > 0
+    residual = CompactGraph(n + 2, R.row[positive], R.col[positive])
+    return residual.reachable([S])[:n]
+
+
+def max_flow(n, src, dst, s, t, capacity=None):
+    """
+    Maximum flow with the given capacities (default unit capacities), the
+    super source/sink edges are unbounded.
+
+    Returns:
+        flow_value: Value of the maximum flow.
+        flows: Flow on every edge.
+    """
+    if capacity is None:
+        capacity = np.ones(len(src), dtype=np.int64)
+    cap = np.where((src == s) | (dst == t), int(capacity.sum()) + 1, capacity)
+    C = csr_matrix((cap, (src, dst)), shape=(n, n))
+    result = maximum_flow(C, s, t)
+    flows = np.asarray(result.flow[src, dst]).reshape(-1)
+    return result.flow_value, np.maximum(flows, 0)
+
+
+def decompose(src, dst, flows, s, t):
+    """
+    Decompose a flow from s to t into paths (cycles are dropped).
+
+    Returns:
+        paths: List of edge id lists of the paths from s to t.
+    """
+    remaining = flows.astype(np.int64)
+    src, dst = src.tolist(), dst.tolist()
+    out = {}
+    for e in np.flatnonzero(remaining > 0).tolist():
+        out.setdefault(src[e], []).append(e)
+    paths = []
+    while True:
+        path, nodes, position = [], [s], {s: 0}
+        u = s
+        while u != t:
+            edges = out.get(u, [])
+            while edges and remaining[edges[-1]] == 0:
+                edges.pop()
+            if not edges:
+                return paths
+            e = edges[-1]
+            v = dst[e]
+            if v in position:
+                # drop the cycle through v
+                k = position[v]
+                for ce in path[k:] + [e]:
+                    remaining[ce] -= 1
+                for node in nodes[k + 1:]:
+                    del position[node]
+                path, nodes = path[:k], nodes[:k + 1]
+                u = v
+                continue
+            path.append(e)
+            nodes.append(v)
+            position[v] = len(path)
+            u = v
+        for e in path:
+            remaining[e] -= 1
+        paths.append(path)
+
+
+def solve_mincut(milp, coupling=None, print_cuts=False):
+    """
+    Solve the static problem with the min-cut solver only.
+
+    Args:
+        milp: MILP object (prepared for the static case).
+        coupling: Whether to respect the static coupling of the cuts.
+        print_cuts: Whether to print the cut edges.
+
+    Returns:
+        d_vals: Dictionary of the cut edges and their cut values.
+        flow: Total flow out of the sources.
+        exit_status: 'opt' if the result is proven optimal, 'feasible' if
+        a flow was found and 'not solved' otherwise.
+    """
+    start = time.time()
+    result = mincut(milp, coupling)
+    runtime = time.time() - start
+    print(f'min-cut run time: {runtime}')
+    print(f'min-cut flow: {result.flow} (bound {result.bound}), '
+          f'status: {result.status}')
+    exit_status = {'optimal': 'opt', 'flow-optimal': 'feasible'}.get(
+        result.status, result.status
+    )
+    milp.data.update({
+        "status": result.status,
+        "exit_status": exit_status,
+        "mincut_runtime": runtime,
+        "mincut_bound": result.bound,
+    })
+    if result.status == 'not solved':
+        return {}, 0, 'not solved'
+    d_vals, flow = milp.parse_cuts(result.f_vals, result.d_vals, print_cuts)
+    milp.data["flow"] = flow
+    milp.data["ncuts"] = len(d_vals)
+    return d_vals, flow, exit_status
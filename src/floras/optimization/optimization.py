@@ -1,14 +1,25 @@
 '''
 Class to set up optimization problem, solve it, and parse the output.
 '''
-from gurobipy import GRB
-from gurobipy import *  # noqa: F403
+try:
+    from gurobipy import GRB, Model, quicksum
+except ImportError:
+    # only the matrix assembly with the highs backend is available
+    GRB = Model = quicksum = None
 import time
 import numpy as np
-import networkx as nx
-from floras.optimization.utils import find_map_G_S
+from floras.optimization.utils import find_map_G_S, successors_by_state, read_cuts
+from floras.optimization.matrix_form import MatrixFormulation
+from floras.optimization.backends import get_backend
+from floras.optimization.mincut import mincut
+from floras.optimization.benders import flow_cut
+from floras.optimization.presolve import presolve
+from floras.optimization.lazy import SReachability
+from floras.optimization.callbacks import (
+    SolverCallback, get_policy, init_callback_data
+)
+from floras.optimization.checkpoint import Checkpoint, read_checkpoint
 # from gurobipy import *
-from copy import deepcopy
 import os
 import json
 from ipdb import set_trace as st
@@ -22,22 +33,110 @@ class MILP():
         GD: GraphData object representing the virtual product graph G.
         SD: GraphData object representing the system virtual graph S.
         type: Type of the optimization to call (default is static).
-        callback: If callback function should be used (default 'cb').
+        callback: Termination policy, 'cb' (stop if the objective has not
+        changed in 1 hour or after 12 hours), 'cb_mip' (stop at a 5% MIP gap
+        or after 12 hours), a TerminationPolicy or None (default 'cb').
+        aggregate: Use a single cut variable per physical (undirected)
+        transition in the static case (default False).
+        assembly: How to build the model, 'matrix' assembles sparse
+        constraint matrices for Gurobi's matrix API, 'tupledict' adds the
+        constraints one expression at a time (default 'matrix').
+        backend: Solver backend, 'gurobi' or 'highs' (default 'gurobi').
+        The 'highs' backend only supports the matrix assembly.
+        portfolio: Optional number of differently seeded and parameterized
+        copies of the model (or list of their Gurobi parameters) to race in
+        a process pool (gurobi backend only).
+        on_incumbent: Optional function called with every new incumbent, a
+        dictionary with its run time, timestamp, objective, flow, number of
+        cuts and cut edges (gurobi backend without portfolio only).
+        checkpoint: Optional directory to write checkpoints of the run to
+        (gurobi backend without portfolio only).
+        checkpoint_interval: Minimum time in seconds between two incumbent
+        writes of the checkpoint (default 600).
+        presolve: Reduce G before building the model (see presolve), nodes
+        that are not on a path from a source to a sink are trimmed and, in
+        the static case, chains of uncoupled edges are contracted
+        (default False).
+        lazy: Reactive case only, check the reachability of the sinks of S
+        for every flow on S under the candidate cuts and add the violated
+        constraints lazily instead of a copy of the flow on S for each
+        (default False). Gurobi adds them in the callback, the highs
+        backend re-solves with the violated constraints until none is left.
     """
-    def __init__(self, GD, SD, type='static', callback='cb'):
+    def __init__(self, GD, SD, type='static', callback='cb', aggregate=False,
+                 assembly='matrix', backend='gurobi', portfolio=None,
+                 on_incumbent=None, checkpoint=None, checkpoint_interval=600,
+                 presolve=False, lazy=False):
         self.type = type
         self.GD = GD
         self.SD = SD
         self.callback = callback
+        self.policy = get_policy(callback)
+        self.resumed_from = None
+        if lazy and type != 'reactive':
+            print('Lazy constraints are only available for the reactive case.')
+            lazy = False
+        if lazy and portfolio is not None:
+            print('Lazy constraints are not available for the portfolio.')
+            portfolio = None
+        self.lazy = lazy
+        self.s_reachability = None
+        if assembly not in ['matrix', 'tupledict']:
+            print('Requested assembly not available, using \'matrix\'.')
+            assembly = 'matrix'
+        self.solver = get_backend(backend, portfolio)
+        self.backend = self.solver.name
+        # the callback chain needs a single gurobi model
+        single_gurobi = self.backend == 'gurobi' and portfolio is None
+        if on_incumbent is not None and not single_gurobi:
+            print('Incumbents are only streamed for the gurobi backend without '
+                  'portfolio.')
+            on_incumbent = None
+        self.on_incumbent = on_incumbent
+        if checkpoint is not None and not single_gurobi:
+            print('Checkpoints are only written for the gurobi backend without '
+                  'portfolio.')
+            checkpoint = None
+        self.checkpoint = None
+        if checkpoint is not None:
+            self.checkpoint = Checkpoint(checkpoint, checkpoint_interval)
+        if self.backend != 'gurobi' and assembly != 'matrix':
+            print('The ' + self.backend + ' backend uses the matrix assembly.')
+            assembly = 'matrix'
+        self.assembly = assembly
+        self.data = dict()
+        self.form = None
+        if aggregate and type != 'static':
+            print('Variable aggregation is only available for the static case.')
+            aggregate = False
+        self.aggregate = aggregate
+        self.edge_class = None
         self.cleaned_intermed = []
         self.model_edges = []
         self.model_nodes = []
         self.src = []
         self.s_sink = []
+        self.in_edges = {}
+        self.out_edges = {}
+        self.s_in_edges = {}
+        self.s_out_edges = {}
         self.model_s_edges = []
         self.model_s_nodes = []
         self.model = None
+        self.flow_vars = None
+        self.cut_vars = None
+        self.cut_edge_ids = None
+        self.partition_vars = None
+        self.flow_cols = None
+        self.cut_cols = None
         self.map_G_to_S = None
+        self._s_couplings = None
+        self.build_time = None
+        self.presolve = presolve
+        self.reduction = None
+        self.capacity = None
+        self.cut_weights = None
+        self.cut_origins = None
         self.G, self.S, self.G_minus_I = self.prepare()
 
     def prepare(self):
@@ -45,75 +144,158 @@ class MILP():
         Prepares the edges and nodes needed for the optimization variables.
 
         Returns:
-            G: Networkx virtual product graph.
-            S: Networkx virtual system graph.
-            G_minus_I: Networkx virtual product graph without I nodes.
-
-        """
-        self.cleaned_intermed = [
-            x for x in self.GD.acc_test if x not in self.GD.acc_sys
-        ]
-        # create G and remove self-loops
-        G = self.GD.graph
-        to_remove = []
-        for i, j in G.edges:
-            if i == j:
-                to_remove.append((i, j))
-        G.remove_edges_from(to_remove)
+            G: CompactGraph of the virtual product graph.
+            S: CompactGraph of the virtual system graph.
+            G_minus_I: CompactGraph of the virtual product graph without I nodes.
+
+        """
+        acc_sys = set(self.GD.acc_sys)
+        self.cleaned_intermed = [x for x in self.GD.acc_test if x not in acc_sys]
+        # G without self-loops
+        G = self.GD.compact.without_self_loops()
+        self.unreduced_G = G
+        # the cut penalty is relative to the size of the unreduced G
+        self.reg = 1 / max(G.number_of_edges(), 1)
+        self.capacity = np.ones(G.number_of_edges())
+        self.cut_weights = np.ones(G.number_of_edges())
+        self.cut_origins = None
+        self.src = self.GD.init
+        self.sink = self.GD.sink
+        if self.presolve:
+            G = self.presolve_graph(G)
 
         # remove intermediate nodes
-        G_minus_I = deepcopy(G)
-        G_minus_I.remove_nodes_from(self.cleaned_intermed)
+        G_minus_I = G.remove_nodes(self.cleaned_intermed)
 
-        self.model_edges = list(G.edges)
-        self.model_nodes = list(G.nodes)
+        self.model_edges = G.edges
+        self.model_nodes = G.nodes
 
-        self.model_edges_without_I = list(G_minus_I.edges)
-        self.model_nodes_without_I = list(G_minus_I.nodes)
+        self.model_edges_without_I = G_minus_I.edges
+        self.model_nodes_without_I = G_minus_I.nodes
 
-        self.src = self.GD.init
-        self.sink = self.GD.sink
         self.inter = self.cleaned_intermed
+        self.src_set = set(self.src)
+        self.sink_set = set(self.sink)
+        self.in_edges, self.out_edges = index_edges(self.model_nodes, self.model_edges)
 
-        # create S and remove self-loops
+        # S without self-loops
         if self.type != 'static':
-            S = self.SD.graph
-            to_remove = []
-            for i, j in S.edges:
-                if i == j:
-                    to_remove.append((i, j))
-            S.remove_edges_from(to_remove)
-            self.model_s_edges = list(S.edges)
-            self.model_s_nodes = list(S.nodes)
+            S = self.SD.compact.without_self_loops()
+            self.model_s_edges = S.edges
+            self.model_s_nodes = S.nodes
             self.s_sink = self.SD.acc_sys
+            self.s_sink_set = set(self.s_sink)
+            self.s_in_edges, self.s_out_edges = index_edges(
+                self.model_s_nodes, self.model_s_edges
+            )
         else:
             S = None
 
         return G, S, G_minus_I
 
+    def presolve_graph(self, G):
+        """
+        Reduce G with the presolve and keep the map of the reduced edges to
+        the edges of G. The coupling classes of the static case allow the
+        contraction of chains, the reactive case is only trimmed as the cuts
+        are coupled to the flows on S.
+
+        Args:
+            G: CompactGraph of the virtual product graph without self-loops.
+
+        Returns:
+            G: CompactGraph of the reduced graph.
+        """
+        classes = None
+        if self.type == 'static':
+            self.model_edges = G.edges
+            edge_class, _ = self.physical_transitions()
+            classes = [edge_class[edge] for edge in self.model_edges]
+        reduction = presolve(G, self.src, self.sink, self.cleaned_intermed, classes)
+        if reduction.graph.number_of_edges() == 0:
+            print('presolve: no sink can be reached from a source, keeping G.')
+            return G
+        reduction.report()
+        return self.reduce_graph(G, reduction)
+
+    def reduce_graph(self, G, reduction):
+        """
+        Use the reduced graph of a Reduction of G (see presolve and
+        decompose) and keep the map of the reduced edges to the edges of G.
+
+        Args:
+            G: CompactGraph of the virtual product graph without self-loops.
+            reduction: Reduction of G.
+
+        Returns:
+            G: CompactGraph of the reduced graph.
+        """
+        self.reduction = reduction
+        edges = G.edges
+        reduced = reduction.graph
+        keep = reduced.node_mask
+        self.src = [i for i in self.src if keep[i]]
+        self.sink = [j for j in self.sink if keep[j]]
+        self.cleaned_intermed = [i for i in self.cleaned_intermed if keep[i]]
+        self.capacity = reduction.capacity
+        self.cut_origins = [[edges[e] for e in origins]
+                            for origins in reduction.cut_origins]
+        self.cut_weights = np.array(
+            [len(origins) for origins in reduction.cut_origins], dtype=float
+        )
+        return reduced
+
+    def origin_names(self):
+        """
+        Names (out_state, in_state) of the edges of the unreduced G that are
+        cut with every model edge.
+        """
+        node_dict = self.GD.node_dict
+        if self.cut_origins is None:
+            return [[(node_dict[i], node_dict[j])] for (i, j) in self.model_edges]
+        return [[(node_dict[i], node_dict[j]) for (i, j) in origins]
+                for origins in self.cut_origins]
+
     def static_model(self):
         '''
         Set up the model for the static case.
         '''
-        self.model = Model()  # noqa: F405
+        self.model = Model()
         # Define variables
         f = self.model.addVars(self.model_edges, name="flow")
         m = self.model.addVars(self.model_nodes_without_I, name="m")
-        d = self.model.addVars(self.model_edges, vtype=GRB.BINARY, name="d")
+        if self.aggregate:
+            # one cut variable per physical transition, shared by its edges
+            self.edge_class, n_classes = self.physical_transitions()
+            d_phys = self.model.addVars(n_classes, vtype=GRB.BINARY, name="d")
+            d = {(i, j): d_phys[self.edge_class[i, j]] for (i, j) in self.model_edges}
+        else:
+            d = self.model.addVars(self.model_edges, vtype=GRB.BINARY, name="d")
+        self.flow_vars = [f[i, j] for (i, j) in self.model_edges]
+        self.cut_vars = [d[i, j] for (i, j) in self.model_edges]
+        self.cut_edge_ids = np.arange(len(self.model_edges))
+        self.partition_vars = [m[i] for i in self.model_nodes_without_I]
 
         # Define Objective
-        term = sum(f[i, j] for (i, j) in self.model_edges if i in self.src)
-        ncuts = sum(d[i, j] for (i, j) in self.model_edges)
-        reg = 1 / len(self.model_edges)
-        self.model.setObjective(term - reg * ncuts, GRB.MAXIMIZE)
+        term = quicksum(f[i, j] for s in self.src_set for (i, j) in self.out_edges[s])
+        ncuts = quicksum(
+            w * d[i, j] for (i, j), w in zip(self.model_edges, self.cut_weights)
+        )
+        self.model.setObjective(term - self.reg * ncuts, GRB.MAXIMIZE)
 
         # Add the constraints
-        self.bounds_constraints(f, d, m)
+        if self.aggregate:
+            self.bounds_constraints(f, d_phys, m, d_domain=range(n_classes))
+        else:
+            self.bounds_constraints(f, d, m)
         self.conservation_constraints(f)
         self.preserve_flow_constraints(f)
         self.no_flow_in_source_out_sink_constraints(f)
         self.cut_constraints(f, d)
         self.partition_constraints(d, m)
+        if self.aggregate:
+            # the static and bidirectional couplings hold by construction
+            return
         self.bidirectional_constraints(d)
 
         if self.GD.custom_map:
@@ -121,21 +303,50 @@ class MILP():
         else:
             self.static_constraints(d)
 
+    def physical_transitions(self):
+        """
+        Number the physical (undirected) transitions of the transition system
+        that the model edges project to. The edges of a physical transition
+        are the ones coupled by the static and bidirectional constraints.
+
+        Returns:
+            edge_class: Dictionary mapping each model edge to the number of
+            its physical transition.
+            n_classes: Number of physical transitions.
+        """
+        groups = self.projected_edge_groups(custom=bool(self.GD.custom_map))
+        edge_class = {}
+        class_ids = {}
+        for (out_state, in_state), group in groups.items():
+            if (in_state, out_state) in class_ids:
+                cid = class_ids[(in_state, out_state)]
+            else:
+                cid = class_ids.setdefault((out_state, in_state), len(class_ids))
+            for edge in group:
+                edge_class[edge] = cid
+        return edge_class, len(class_ids)
+
     def reactive_model(self):
         # for the flow on S
         self.map_G_to_S = find_map_G_S(self.GD, self.SD)
 
-        self.model = Model()  # noqa: F405
+        self.model = Model()
         # Define variables
         f = self.model.addVars(self.model_edges, name="flow")
         m = self.model.addVars(self.model_nodes_without_I, name="m")
         d = self.model.addVars(self.model_edges_without_I, vtype=GRB.BINARY, name="d")
+        self.flow_vars = [f[i, j] for (i, j) in self.model_edges]
+        self.cut_vars = [d[i, j] for (i, j) in self.model_edges_without_I]
+        self.cut_edge_ids = np.flatnonzero(self.edges_without_I_mask())
+        self.partition_vars = [m[i] for i in self.model_nodes_without_I]
 
         # Define Objective
-        term = sum(f[i, j] for (i, j) in self.model_edges if i in self.src)
-        ncuts = sum(d[i, j] for (i, j) in self.model_edges_without_I)
-        reg = 1 / len(self.model_edges)
-        self.model.setObjective(term - reg * ncuts, GRB.MAXIMIZE)
+        term = quicksum(f[i, j] for s in self.src_set for (i, j) in self.out_edges[s])
+        weights = self.cut_weights[self.edges_without_I_mask()]
+        ncuts = quicksum(
+            w * d[i, j] for (i, j), w in zip(self.model_edges_without_I, weights)
+        )
+        self.model.setObjective(term - self.reg * ncuts, GRB.MAXIMIZE)
 
         # add constraints
         self.bounds_constraints(f, d, m)
@@ -146,44 +357,18 @@ class MILP():
         self.partition_constraints(d, m)
         self.do_not_cut_edges(d)
 
-        # --------- add feasibility constraints to preserve flow on S for every q
-        node_list = []
-        for node in self.G.nodes:
-            node_list.append(self.GD.node_dict[node])
-
-        qs = list(set([node[-1] for node in node_list]))
-
-        # get the source/sink pairs (sink always T) for the history variables q
-        s_srcs = {}
-        for q in qs:
-            transition_nodes = []
-            for edge in self.G.edges:
-                out_edge = self.GD.node_dict[edge[0]]
-                in_edge = self.GD.node_dict[edge[1]]
-                if in_edge[-1] == q and out_edge[-1] != q:
-                    node = edge[1]
-                    s_nodes = self.map_G_to_S[node]
-                    for target in self.s_sink:
-                        for s_node in s_nodes:
-                            if nx.has_path(self.S, s_node, target):
-                                transition_nodes.append(s_node)
-            clean_transition_nodes = list(set(transition_nodes))
-            s_srcs.update({q: clean_transition_nodes})
-        s_srcs.update({'q0': self.SD.init})
-
-        s_data = []
-        for q in qs:
-            for k, s in enumerate(s_srcs[q]):
-                name = 'fS_' + str(q) + '_' + str(k)
-                source = s
-                s_data.append((name, q, source))
+        if self.lazy:
+            # the flows on S are replaced by lazy reachability constraints
+            return
 
+        # --------- add feasibility constraints to preserve flow on S for every q
+        s_data = self.s_flow_sources()
         f_s = [None for entry in s_data]
         for k, entry in enumerate(s_data):
             name = entry[0]
             curr_q = entry[1]
             s_src = [entry[2]]
-            if entry[2] not in self.s_sink:
+            if entry[2] not in self.s_sink_set:
 
                 f_s[k] = self.model.addVars(self.model_s_edges, name=name)
 
@@ -202,9 +387,9 @@ class MILP():
                 # Preserve flow of 1 in S
                 self.model.addConstr(
                     (
-                        1 <= sum(
-                            f_s[k][i, j] for (i, j) in self.model_s_edges
-                            if j in self.s_sink
+                        1 <= quicksum(
+                            f_s[k][i, j] for t in self.s_sink
+                            for (i, j) in self.s_in_edges.get(t, [])
                         )
                     ),
                     name=name + '_conserve_flow_1'
@@ -213,10 +398,10 @@ class MILP():
                 # conservation on S
                 self.model.addConstrs(
                     (
-                        sum(f_s[k][i, j] for (i, j) in self.model_s_edges if j == l)
-                        == sum(f_s[k][i, j] for (i, j) in self.model_s_edges if i == l)
+                        quicksum(f_s[k][i, j] for (i, j) in self.s_in_edges[l])
+                        == quicksum(f_s[k][i, j] for (i, j) in self.s_out_edges[l])
                         for l in self.model_s_nodes if l not in s_src  # noqa: E741
-                        and l not in self.s_sink
+                        and l not in self.s_sink_set
                     ),
                     name=name + '_conservation'
                 )
@@ -225,32 +410,337 @@ class MILP():
                 self.model.addConstrs(
                     (
                         f_s[k][i, j] == 0 for (i, j) in self.model_s_edges
-                        if j in s_src or i in self.s_sink
+                        if j in s_src or i in self.s_sink_set
                     ),
                     name=name + '_sink_src'
                 )
 
                 # Match the edge cuts from G to S
-                for (i, j) in self.model_edges_without_I:
-                    if self.GD.node_dict[i][-1] == curr_q:
-                        imaps = self.map_G_to_S[i]
-                        jmaps = self.map_G_to_S[j]
-
-                        for imap in imaps:
-                            for jmap in jmaps:
-                                if (imap, jmap) in self.SD.edges:
-                                    self.model.addConstr(
-                                        f_s[k][imap, jmap] + d[i, j] <= 1
-                                    )
-
-    def bounds_constraints(self, f, d, m):
+                for (i, j), (imap, jmap) in self.s_edge_couplings(curr_q):
+                    self.model.addConstr(f_s[k][imap, jmap] + d[i, j] <= 1)
+
+    def s_flow_sources(self):
+        """
+        Sources of the flows on S that have to be preserved, one for every
+        history variable q and S node entered when the product moves to q.
+
+        Returns:
+            s_data: List of (name, q, source) for every flow on S.
+        """
+        # the flows on S are kept for all of G, also for trimmed nodes
+        G = self.unreduced_G
+        node_list = []
+        for node in G.nodes:
+            node_list.append(self.GD.node_dict[node])
+
+        qs = list(set([node[-1] for node in node_list]))
+
+        # get the source/sink pairs (sink always T) for the history variables q,
+        # the S nodes that can reach a sink come from one backward search
+        coreach = self.SD.coreach_sys
+        transition_nodes = {q: [] for q in qs}
+        for (i, j) in G.edges:
+            q = self.GD.node_dict[j][-1]
+            if self.GD.node_dict[i][-1] != q:
+                transition_nodes[q].extend(
+                    s_node for s_node in self.map_G_to_S[j] if coreach[s_node]
+                )
+        s_srcs = {q: list(set(nodes)) for q, nodes in transition_nodes.items()}
+        s_srcs.update({'q0': self.SD.init})
+
+        s_data = []
+        for q in qs:
+            for k, s in enumerate(s_srcs[q]):
+                name = 'fS_' + str(q) + '_' + str(k)
+                source = s
+                s_data.append((name, q, source))
+        return s_data
+
+    def s_edge_couplings(self, q):
+        """
+        Pairs of edges (i, j) of G without I leaving a node with history
+        variable q and edges (imap, jmap) of S they map to. A cut on (i, j)
+        blocks the flow on (imap, jmap) of the flows on S for q.
+        """
+        if self._s_couplings is None:
+            # the pairs of all q in one pass, the S edges out of imap are
+            # indexed by the transition system state of their in node
+            successors = successors_by_state(self.S, self.SD.node_dict)
+            node_dict = self.GD.node_dict
+            self._s_couplings = {}
+            for (i, j) in self.model_edges_without_I:
+                couplings = self._s_couplings.setdefault(node_dict[i][-1], [])
+                state = node_dict[j][0]
+                for imap in self.map_G_to_S[i]:
+                    for jmap in successors.get((imap, state), []):
+                        couplings.append(((i, j), (imap, jmap)))
+        return self._s_couplings.get(q, [])
+
+    def s_reachability_check(self):
+        """
+        Reachability check of the flows on S for the lazy constraints.
+
+        Returns:
+            check: SReachability of the flows on S.
+        """
+        if self.map_G_to_S is None:
+            self.map_G_to_S = find_map_G_S(self.GD, self.SD)
+        s_data = self.s_flow_sources()
+        couplings = {}
+        for q in {entry[1] for entry in s_data}:
+            pairs = self.s_edge_couplings(q)
+            couplings[q] = (
+                np.array([self.S.edge_id(*s_edge) for _, s_edge in pairs],
+                         dtype=np.int64),
+                np.array([self.G.edge_id(*g_edge) for g_edge, _ in pairs],
+                         dtype=np.int64),
+            )
+        return SReachability(self.S, self.s_sink, s_data, couplings)
+
+    def static_matrix(self):
+        """
+        Matrix form of the static model. The bounds, the capacity and the no
+        flow into the source or out of the sink constraints become variable
+        bounds and the static and bidirectional couplings chain the cut
+        variables of every physical transition.
+
+        Returns:
+            form: The MatrixFormulation.
+        """
+        form = MatrixFormulation()
+        edges = self.matrix_edge_data()
+        n_edges = self.G.number_of_edges()
+        edge_class, n_classes = self.physical_transitions()
+        classes = np.array(
+            [edge_class[edge] for edge in self.model_edges], dtype=np.int64
+        )
+        f0 = self.add_flow_variables(form, edges)
+        weights = self.cut_weights
+        if self.aggregate:
+            self.edge_class = edge_class
+            class_weights = np.bincount(classes, weights=weights, minlength=n_classes)
+            d0 = form.add_variables(
+                'd', n_classes, obj=-self.reg * class_weights, integer=True
+            )
+            d_col = d0 + classes
+        else:
+            d0 = form.add_variables(
+                'd', n_edges, obj=-self.reg * weights, integer=True,
+                labels=edges['labels']
+            )
+            d_col = d0 + np.arange(n_edges)
+        self.add_flow_rows(form, edges, f0, d_col, np.arange(n_edges))
+        self.flow_cols = f0 + np.arange(n_edges)
+        self.cut_cols = d_col
+
+        if not self.aggregate:
+            # chain the cut variables of every physical transition
+            order = np.argsort(classes, kind='stable')
+            a, b = order[:-1], order[1:]
+            same = classes[a] == classes[b]
+            a, b = d_col[a[same]], d_col[b[same]]
+            n = len(a)
+            form.add_constraints(
+                'static', n, np.tile(np.arange(n), 2), np.concatenate([a, b]),
+                np.repeat([1.0, -1.0], n), '=', 0
+            )
+        return form.finalize()
+
+    def reactive_matrix(self):
+        """
+        Matrix form of the reactive model, including one flow on S for every
+        history variable and entry node of S.
+
+        Returns:
+            form: The MatrixFormulation.
+        """
+        self.map_G_to_S = find_map_G_S(self.GD, self.SD)
+        form = MatrixFormulation()
+        edges = self.matrix_edge_data()
+        n_edges = self.G.number_of_edges()
+        keep = edges['keep']
+        n_d = int(keep.sum())
+        f0 = self.add_flow_variables(form, edges)
+
+        # no cuts on edges that would introduce dead ends
+        d_index = np.full(n_edges, -1, dtype=np.int64)
+        d_index[keep] = np.arange(n_d)
+        d_ub = np.ones(n_d)
+        for (i, j) in self.GD.do_not_cut:
+            e = self.G.edge_id(i, j)
+            if e is not None and d_index[e] >= 0:
+                d_ub[d_index[e]] = 0
+        d0 = form.add_variables(
+            'd', n_d, ub=d_ub, obj=-self.reg * self.cut_weights[keep], integer=True,
+            labels=[label for label, k in zip(edges['labels'], keep) if k]
+        )
+        d_col = np.where(keep, d0 + d_index, -1)
+        self.add_flow_rows(form, edges, f0, d_col, np.flatnonzero(keep))
+        self.flow_cols = f0 + np.arange(n_edges)
+        self.cut_cols = d_col
+        if self.lazy:
+            # the flows on S are replaced by lazy reachability constraints
+            return form.finalize()
+
+        # --------- flows on S for every q
+        S = self.S
+        is_s_sink = np.zeros(S.n_nodes, dtype=bool)
+        is_s_sink[self.s_sink] = True
+        s_labels = [str(i) + ',' + str(j) for (i, j) in self.model_s_edges]
+        into_sink = np.flatnonzero(is_s_sink[S.dst])
+        for name, q, source in self.s_flow_sources():
+            if source in self.s_sink_set:
+                continue
+            fs_ub = np.where((S.dst == source) | is_s_sink[S.src], 0.0, 1.0)
+            fs0 = form.add_variables(
+                name, S.number_of_edges(), ub=fs_ub, labels=s_labels
+            )
+            form.add_constraints(
+                name + '_conserve_flow_1', 1, np.zeros(len(into_sink)),
+                fs0 + into_sink, 1, '>', 1
+            )
+            s_nodes = [node for node in self.model_s_nodes
+                       if node != source and node not in self.s_sink_set]
+            self.add_conservation_rows(form, name + '_conservation', S, s_nodes, fs0)
+
+            couplings = self.s_edge_couplings(q)
+            n = len(couplings)
+            g_edges = np.array(
+                [self.G.edge_id(i, j) for (i, j), _ in couplings], dtype=np.int64
+            )
+            s_edges = np.array(
+                [S.edge_id(imap, jmap) for _, (imap, jmap) in couplings],
+                dtype=np.int64
+            )
+            form.add_constraints(
+                name + '_cuts', n, np.tile(np.arange(n), 2),
+                np.concatenate([fs0 + s_edges, d_col[g_edges]]), 1, '<', 1
+            )
+        return form.finalize()
+
+    def matrix_edge_data(self):
+        """
+        Arrays over the edge ids and nodes of G used to assemble the matrix
+        form.
+        """
+        G = self.G
+        is_src = np.zeros(G.n_nodes, dtype=bool)
+        is_src[self.src] = True
+        is_sink = np.zeros(G.n_nodes, dtype=bool)
+        is_sink[self.sink] = True
+        m_index = np.full(G.n_nodes, -1, dtype=np.int64)
+        m_index[self.model_nodes_without_I] = np.arange(
+            len(self.model_nodes_without_I)
+        )
+        return {
+            'src': G.src,
+            'dst': G.dst,
+            'is_src': is_src,
+            'is_sink': is_sink,
+            'keep': self.edges_without_I_mask(),
+            'm_index': m_index,
+            'labels': [str(i) + ',' + str(j) for (i, j) in self.model_edges],
+        }
+
+    def edges_without_I_mask(self):
+        """Boolean array over the edge ids of G of the edges of G without I."""
+        not_I = self.G_minus_I.node_mask
+        return not_I[self.G.src] & not_I[self.G.dst]
+
+    def add_flow_variables(self, form, edges):
+        # flow variables (objective: flow out of the sources) and partition
+        # variables, no flow into the sources or out of the sinks
+        src, dst = edges['src'], edges['dst']
+        no_flow = edges['is_src'][dst] | edges['is_sink'][src]
+        f_ub = np.where(no_flow, 0.0, self.capacity)
+        f_obj = edges['is_src'][src].astype(float)
+        f0 = form.add_variables(
+            'flow', len(src), ub=f_ub, obj=f_obj, labels=edges['labels']
+        )
+        form.add_variables(
+            'm', len(self.model_nodes_without_I), labels=self.model_nodes_without_I
+        )
+        return f0
+
+    def add_flow_rows(self, form, edges, f0, d_col, d_edges):
+        """
+        Add the conservation, preserve flow, cut and partition rows.
+
+        Args:
+            form: The MatrixFormulation.
+            edges: Edge data from matrix_edge_data.
+            f0: Offset of the flow variables.
+            d_col: Column of the cut variable of every edge id.
+            d_edges: Edge ids that can be cut.
+        """
+        src, dst = edges['src'], edges['dst']
+        is_src, is_sink = edges['is_src'], edges['is_sink']
+        m_index = edges['m_index']
+        m0 = form.var_blocks['m'].start
+
+        nodes = [node for node in self.model_nodes
+                 if node not in self.src_set and node not in self.sink_set]
+        self.add_conservation_rows(form, 'conservation', self.G, nodes, f0)
+
+        out_src = np.flatnonzero(is_src[src])
+        form.add_constraints(
+            'conserve_F', 1, np.zeros(len(out_src)), f0 + out_src, 1, '>', 1
+        )
+
+        n = len(d_edges)
+        capacity = self.capacity[d_edges]
+        form.add_constraints(
+            'cut_cons', n, np.tile(np.arange(n), 2),
+            np.concatenate([f0 + d_edges, d_col[d_edges]]),
+            np.concatenate([np.ones(n), capacity]), '<', capacity
+        )
+
+        srcs = [i for i in self.model_nodes_without_I if is_src[i]]
+        sinks = [j for j in self.model_nodes_without_I if is_sink[j]]
+        pairs = np.array(
+            [(i, j) for i in srcs for j in sinks], dtype=np.int64
+        ).reshape(-1, 2)
+        n = len(pairs)
+        form.add_constraints(
+            'partition', n, np.tile(np.arange(n), 2),
+            m0 + np.concatenate([m_index[pairs[:, 0]], m_index[pairs[:, 1]]]),
+            np.repeat([1.0, -1.0], n), '>', 1
+        )
+
+        kept = np.flatnonzero(edges['keep'])
+        n = len(kept)
+        form.add_constraints(
+            'max_flow_cut', n, np.tile(np.arange(n), 3),
+            np.concatenate(
+                [d_col[kept], m0 + m_index[src[kept]], m0 + m_index[dst[kept]]]
+            ),
+            np.repeat([1.0, -1.0, 1.0], n), '>', 0
+        )
+
+    def add_conservation_rows(self, form, name, graph, nodes, f0):
+        # inflow - outflow = 0 at the given nodes
+        row = np.full(graph.n_nodes, -1, dtype=np.int64)
+        row[np.asarray(nodes, dtype=np.int64)] = np.arange(len(nodes))
+        e = np.arange(graph.number_of_edges())
+        r_in, r_out = row[graph.dst], row[graph.src]
+        form.add_constraints(
+            name, len(nodes),
+            np.concatenate([r_in[r_in >= 0], r_out[r_out >= 0]]),
+            f0 + np.concatenate([e[r_in >= 0], e[r_out >= 0]]),
+            np.concatenate([np.ones((r_in >= 0).sum()), -np.ones((r_out >= 0).sum())]),
+            '=', 0
+        )
+
+    def bounds_constraints(self, f, d, m, d_domain=None):
         # Define constraints
-        if self.type == 'static':
+        if d_domain is not None:
+            pass
+        elif self.type == 'static':
             d_domain = self.model_edges
         else:
             d_domain = self.model_edges_without_I
         # Nonnegativity - lower bounds
-        self.model.addConstrs((d[i, j] >= 0 for (i, j) in d_domain), name='d_nonneg')
+        self.model.addConstrs((d[e] >= 0 for e in d_domain), name='d_nonneg')
         self.model.addConstrs(
             (m[i] >= 0 for i in self.model_nodes_without_I), name='mu_nonneg'
         )
@@ -260,31 +750,36 @@ class MILP():
 
         # upper bounds
         self.model.addConstrs(
-            (d[i, j] <= 1 for (i, j) in d_domain), name='d_upper_b'
+            (d[e] <= 1 for e in d_domain), name='d_upper_b'
         )
         self.model.addConstrs(
             (m[i] <= 1 for i in self.model_nodes_without_I), name='mu_upper_b'
         )
         # capacity (upper bound for f)
         self.model.addConstrs(
-            (f[i, j] <= 1 for (i, j) in self.model_edges), name='capacity'
+            (f[i, j] <= c for (i, j), c in zip(self.model_edges, self.capacity)),
+            name='capacity'
         )
 
     def conservation_constraints(self, f):
         # conservation
         self.model.addConstrs(
             (
-                sum(f[i, j] for (i, j) in self.model_edges if j == l) ==
-                sum(f[i, j] for (i, j) in self.model_edges if i == l)
-                for l in self.model_nodes if l not in self.src  # noqa: E741
-                and l not in self.sink
+                quicksum(f[i, j] for (i, j) in self.in_edges[l]) ==
+                quicksum(f[i, j] for (i, j) in self.out_edges[l])
+                for l in self.model_nodes if l not in self.src_set  # noqa: E741
+                and l not in self.sink_set
             ), name='conservation'
         )
 
     def preserve_flow_constraints(self, f):
         # preserve flow of at least 1
         self.model.addConstr(
-            (1 <= sum(f[i, j] for (i, j) in self.model_edges if i in self.src)),
+            (
+                1 <= quicksum(
+                    f[i, j] for s in self.src_set for (i, j) in self.out_edges[s]
+                )
+            ),
             name='conserve_F'
         )
 
@@ -292,8 +787,8 @@ class MILP():
         # no flow into source or out of sink
         self.model.addConstrs(
             (
-                f[i, j] == 0 for (i, j) in self.model_edges if j in self.src
-                or i in self.sink
+                f[i, j] == 0 for (i, j) in self.model_edges if j in self.src_set
+                or i in self.sink_set
             ), name="no_out_sink_in_src"
         )
 
@@ -303,105 +798,158 @@ class MILP():
         else:
             d_domain = self.model_edges_without_I
         # cut constraint (cut edges have zero flow)
+        capacity = dict(zip(self.model_edges, self.capacity))
         self.model.addConstrs(
-            (f[i, j] + d[i, j] <= 1 for (i, j) in d_domain), name='cut_cons'
+            (
+                f[i, j] + capacity[i, j] * d[i, j] <= capacity[i, j]
+                for (i, j) in d_domain
+            ), name='cut_cons'
         )
 
     def partition_constraints(self, d, m):
         # source sink partitions
-        for i in self.model_nodes_without_I:
-            for j in self.model_nodes_without_I:
-                if i in self.src and j in self.sink:
-                    self.model.addConstr(m[i] - m[j] >= 1)
+        srcs = [i for i in self.model_nodes_without_I if i in self.src_set]
+        sinks = [j for j in self.model_nodes_without_I if j in self.sink_set]
+        for i in srcs:
+            for j in sinks:
+                self.model.addConstr(m[i] - m[j] >= 1)
 
         # max flow cut constraint (cut variable d partitions the groups)
         self.model.addConstrs(
             (d[i, j] - m[i] + m[j] >= 0 for (i, j) in self.model_edges_without_I)
         )
 
-    def static_constraints(self, d):
-        # --------- map static obstacles to other edges in G
-        for count, (i, j) in enumerate(self.model_edges):
+    def projected_edge_groups(self, custom=False):
+        """
+        Group the model edges by the transition of the transition system
+        they project to. An edge contracted by the presolve replaces a chain
+        of uncoupled edges and forms its own group.
+
+        Args:
+            custom: Whether to map the states with the custom map.
+
+        Returns:
+            groups: Dictionary mapping each projected transition
+            (out_state, in_state) to its list of model edges.
+        """
+        groups = {}
+        contracted = None
+        if self.reduction is not None:
+            contracted = self.reduction.contracted
+        for e, (i, j) in enumerate(self.model_edges):
+            if contracted is not None and contracted[e]:
+                groups[('chain', e), ('chain', e, 'end')] = [(i, j)]
+                continue
             out_state = self.GD.node_dict[i][0]
             in_state = self.GD.node_dict[j][0]
-            for (imap, jmap) in self.model_edges[count+1:]:
-                if (
-                    out_state == self.GD.node_dict[imap][0] and
-                    in_state == self.GD.node_dict[jmap][0]
-                ):
-                    self.model.addConstr(d[i, j] == d[imap, jmap])
+            if custom:
+                out_state = self.GD.custom_map[out_state]
+                in_state = self.GD.custom_map[in_state]
+            groups.setdefault((out_state, in_state), []).append((i, j))
+        return groups
+
+    def chain_constraints(self, d, group):
+        # tie the cut variables of the group together along a chain
+        for (i, j), (imap, jmap) in zip(group[:-1], group[1:]):
+            self.model.addConstr(d[i, j] == d[imap, jmap])
+
+    def static_constraints(self, d):
+        # --------- map static obstacles to other edges in G
+        for group in self.projected_edge_groups().values():
+            self.chain_constraints(d, group)
 
     def do_not_cut_edges(self, d):
         # ---------- do not cut edges that would introduce dead ends
-        do_not_cut = [edge for edge in self.GD.do_not_cut if edge in self.model_edges]
+        model_edges = set(self.model_edges)
+        do_not_cut = [edge for edge in self.GD.do_not_cut if edge in model_edges]
         self.model.addConstrs(
             (d[i, j] == 0 for (i, j) in do_not_cut), name='d_do_not_cut'
         )
 
     def custom_static_constraints(self, d):
-        for count, (i, j) in enumerate(self.model_edges):
-            out_state = self.GD.custom_map[self.GD.node_dict[i][0]]
-            in_state = self.GD.custom_map[self.GD.node_dict[j][0]]
-            for (imap, jmap) in self.model_edges[count + 1:]:
-                if (
-                    out_state == self.GD.custom_map[self.GD.node_dict[imap][0]] and
-                    in_state == self.GD.custom_map[self.GD.node_dict[jmap][0]]
-                ):
-                    self.model.addConstr(d[i, j] == d[imap, jmap])
+        for group in self.projected_edge_groups(custom=True).values():
+            self.chain_constraints(d, group)
 
     def bidirectional_constraints(self, d):
         # ---------  add bidirectional cuts on G (for static examples)
-        if self.GD.custom_map:
-            for count, (i, j) in enumerate(self.model_edges):
-                out_state = self.GD.custom_map[self.GD.node_dict[i][0]]
-                in_state = self.GD.custom_map[self.GD.node_dict[j][0]]
-                for (imap, jmap) in self.model_edges[count + 1:]:
-                    if (
-                        in_state == self.GD.custom_map[self.GD.node_dict[imap][0]] and
-                        out_state == self.GD.custom_map[self.GD.node_dict[jmap][0]]
-                    ):
-                        self.model.addConstr(d[i, j] == d[imap, jmap])
-        else:
-            for count, (i, j) in enumerate(self.model_edges):
-                out_state = self.GD.node_dict[i][0]
-                in_state = self.GD.node_dict[j][0]
-                for (imap, jmap) in self.model_edges[count + 1:]:
-                    if (
-                        in_state == self.GD.node_dict[imap][0] and
-                        out_state == self.GD.node_dict[jmap][0]
-                    ):
-                        self.model.addConstr(d[i, j] == d[imap, jmap])
+        groups = self.projected_edge_groups(custom=bool(self.GD.custom_map))
+        done = set()
+        for (out_state, in_state), group in groups.items():
+            if out_state == in_state:
+                self.chain_constraints(d, group)
+            elif (in_state, out_state) in groups and (out_state, in_state) not in done:
+                done.add((in_state, out_state))
+                self.chain_constraints(d, group + groups[(in_state, out_state)])
 
     def setup_model(self):
         """
         Setting up the model for the optimization.
         Declares variables and bounds, adds constraints depending on type.
+        The time spent building the model is stored in self.build_time.
         """
-        if self.type == 'static':
+        start = time.time()
+        if self.type == 'static' and self.assembly == 'matrix':
+            self.form = self.static_matrix()
+            self.model = self.solver.load(self.form)
+        elif self.type == 'reactive' and self.assembly == 'matrix':
+            self.form = self.reactive_matrix()
+            self.model = self.solver.load(self.form)
+        elif self.type == 'static':
             self.static_model()
+            self.solver.set_model(self.model)
         elif self.type == 'reactive':
             self.reactive_model()
+            self.solver.set_model(self.model)
         else:
             print(
                 'Requested optimization type not available, '
                 'options are \'static\' or \'reactive\'.'
             )
+        if self.model is not None:
+            self.model.update()
+        self.build_time = time.time() - start
 
-    def solve_problem(self):
+    def solve_problem(self, time_limit=None):
         """
         Solve the model.
+
+        Args:
+            time_limit: Optional time limit in seconds.
         """
         # --------- set parameters
         # store model data for logging
-        self.model._data = dict()  # Store termination conditions
-        self.model._data["term_condition"] = None
+        self.data = dict()  # Store termination conditions
+        self.data["term_condition"] = None
+        self.data["build_time"] = self.build_time
+        self.data["aggregate"] = self.aggregate
+        self.data["backend"] = self.backend
+        self.data["random_seed"] = None
+        self.data["time_to_first_incumbent"] = None
+        self.data["incumbents"] = []
+        self.data["checkpoint"] = self.checkpoint and self.checkpoint.path
+        self.data["resumed_from"] = self.resumed_from
+        self.data["presolve"] = self.reduction and self.reduction.stats
+        self.data["lazy"] = self.lazy
+        if self.lazy:
+            self.data["lazy_cuts"] = 0
+            if self.s_reachability is None:
+                self.s_reachability = self.s_reachability_check()
+        if time_limit is not None:
+            self.solver.set_time_limit(time_limit)
+
+        if self.backend != 'gurobi':
+            if self.lazy:
+                self.solve_lazy_rounds()
+            else:
+                self.solver.optimize()
+            return
+
+        if self.lazy:
+            self.model.Params.LazyConstraints = 1
 
-        # Last updated objective and time (for callback function)
-        self.model._obj_time = time.time()  # Track the last improvement time
-        self.model._cur_obj = GRB.INFINITY  # Start with an infinite objective
-        self.model._time = time.time()  # Track when optimization starts
+        init_callback_data(self.model, self.data)
         self.model.Params.Seed = np.random.randint(0, 100)
-        self.model._data["random_seed"] = self.model.Params.Seed
+        self.data["random_seed"] = self.model.Params.Seed
 
         self.model.setParam("Method", -1)  # -1 enables automatic algorithm selection
         # self.model.setParam("ConcurrentMIP", 1)  # Enable concurrent MIP mode
@@ -413,197 +961,428 @@ class MILP():
         # self.model.setParam("TimeLimit", 1800) # 30 minutes time limit
         # self.model.setParam("Heuristics", 0.5) # Increase heuristic effort
 
+        if self.checkpoint is not None:
+            flow_cols, cut_cols = self.solution_columns()
+            columns = {
+                "flow": flow_cols,
+                "cut": cut_cols,
+                "partition": self.partition_columns(),
+            }
+            settings = {
+                "type": self.type, "aggregate": self.aggregate,
+                "presolve": self.presolve, "lazy": self.lazy
+            }
+            self.checkpoint.start(self.model, (self.GD, self.SD, settings), columns)
+
         # optimize
-        if self.callback == "cb":
-            self.model.optimize(callback=cb)
+        self.solver.optimize(callback=self.solver_callback())
+
+    def solve_lazy_rounds(self):
+        """
+        Cutting plane loop for the backends without lazy constraint
+        callbacks: solve, add the violated reachability constraints of the
+        solution as rows and solve again until no constraint is violated.
+        """
+        runtime = 0.0
+        rounds = 0
+        while True:
+            self.solver.optimize()
+            runtime += self.solver.runtime
+            rounds += 1
+            if self.solver.status not in ['optimal', 'feasible']:
+                break
+            _, d_vals = self.solution_arrays()
+            cuts = self.s_reachability.violated(d_vals)
+            if not cuts:
+                break
+            self.data["lazy_cuts"] += len(cuts)
+            rows = np.concatenate([np.full(len(cut), k) for k, cut in enumerate(cuts)])
+            cols = self.cut_cols[np.concatenate(cuts)]
+            self.form.add_constraints(
+                'lazy_' + str(rounds), len(cuts), rows, cols, 1, '<',
+                [len(cut) - 1 for cut in cuts]
+            )
+            self.solver.load(self.form.finalize())
+        self.solver.runtime = runtime
+        self.data["lazy_rounds"] = rounds
+
+    def solver_callback(self):
+        """
+        Callback chain recording the incumbents, streaming them to
+        on_incumbent and applying the termination policy.
+        """
+        flow_cols, cut_cols = self.solution_columns()
+        is_src = np.zeros(self.G.n_nodes, dtype=bool)
+        is_src[self.src] = True
+        cut_names = None
+        if self.on_incumbent is not None or self.checkpoint is not None:
+            cut_names = self.origin_names()
+        return SolverCallback(
+            self.policy, flow_cols[is_src[self.G.src]], cut_cols, cut_names,
+            self.on_incumbent, self.checkpoint, self.cut_weights, self.s_reachability
+        )
+
+    def solution_columns(self):
+        """
+        Columns of the flow and cut variables in the vector of all model
+        variables.
+
+        Returns:
+            flow_cols: Column of the flow variable of every model edge.
+            cut_cols: Column of the cut variable of every model edge (-1 if
+            the edge cannot be cut).
+        """
+        if self.form is not None:
+            return self.flow_cols, self.cut_cols
+        flow_cols = np.array([var.index for var in self.flow_vars], dtype=np.int64)
+        cut_cols = np.full(len(self.model_edges), -1, dtype=np.int64)
+        cut_cols[self.cut_edge_ids] = [var.index for var in self.cut_vars]
+        return flow_cols, cut_cols
+
+    def partition_columns(self):
+        """Columns of the partition variables of the model nodes without I."""
+        if self.form is not None:
+            return np.arange(self.form.n_vars)[self.form.var_blocks['m']]
+        return np.array([var.index for var in self.partition_vars], dtype=np.int64)
+
+    @classmethod
+    def from_checkpoint(cls, path, **kwargs):
+        """
+        MILP with the model and graph data of a checkpoint, with the
+        incumbent of the checkpoint as MIP start.
+
+        Args:
+            path: Checkpoint directory.
+            kwargs: Further arguments of the MILP (callback, on_incumbent,
+            checkpoint, ...).
+
+        Returns:
+            milp: MILP object, ready to be solved.
+        """
+        start = time.time()
+        (GD, SD, settings), model, columns, x, incumbent = read_checkpoint(path)
+        milp = cls(
+            GD, SD, settings["type"], aggregate=settings["aggregate"],
+            presolve=settings.get("presolve", False),
+            lazy=settings.get("lazy", False), **kwargs
+        )
+        milp.use_model(model, columns)
+        if x is not None:
+            milp.solver.set_start(x, model.getVars())
+        if incumbent is not None:
+            bound = incumbent["bound"]
+            print(f'checkpoint {incumbent["status"]}: flow {incumbent.get("flow")}, '
+                  f'bound {"unknown" if bound is None else bound}')
+        milp.resumed_from = path
+        milp.build_time = time.time() - start
+        return milp
+
+    def use_model(self, model, columns):
+        """
+        Use a Gurobi model of this MILP read from a file.
+
+        Args:
+            model: Gurobi model.
+            columns: Dictionary of the 'flow', 'cut' and 'partition' columns.
+        """
+        variables = model.getVars()
+        cut_cols = columns["cut"]
+        self.form = None
+        self.model = model
+        self.flow_vars = [variables[col] for col in columns["flow"]]
+        self.cut_edge_ids = np.flatnonzero(cut_cols >= 0)
+        self.cut_vars = [variables[col] for col in cut_cols[cut_cols >= 0]]
+        self.partition_vars = [variables[col] for col in columns["partition"]]
+        self.solver.set_model(model)
+
+    def set_start(self, f_vals=None, d_vals=None, m_vals=None):
+        """
+        Set a MIP start (after setting up the model).
+
+        Args:
+            f_vals: Flow values aligned with the model edges.
+            d_vals: Cut values aligned with the model edges.
+            m_vals: Partition values aligned with the model nodes without I.
+        """
+        if self.form is not None:
+            start = np.full(self.form.n_vars, np.nan)
+            if f_vals is not None:
+                start[self.flow_cols] = f_vals
+            if d_vals is not None:
+                cuttable = self.cut_cols >= 0
+                start[self.cut_cols[cuttable]] = np.asarray(d_vals)[cuttable]
+            if m_vals is not None:
+                start[self.form.var_blocks['m']] = m_vals
+            self.solver.set_start(start)
+            return
+        if f_vals is not None:
+            self.solver.set_start(f_vals, self.flow_vars)
+        if d_vals is not None:
+            self.solver.set_start(np.asarray(d_vals)[self.cut_edge_ids], self.cut_vars)
+        if m_vals is not None:
+            self.solver.set_start(m_vals, self.partition_vars)
+
+    def cut_start(self, cuts):
+        """
+        Cut values for a given cut set, e.g. from a previous result. In the
+        static case the cuts are matched by the transition they project to,
+        so they carry over to a changed tester, and closed under the static
+        coupling.
+
+        Args:
+            cuts: Iterable of the cut edges (out_state, in_state) named by
+            their product states.
+
+        Returns:
+            d_vals: Array of the cut values aligned with the model edges.
+        """
+        cuts = set(cuts)
+        names = self.origin_names()
+        d_vals = np.zeros(len(self.model_edges))
+        if self.type == 'static':
+            transitions = {
+                (self.project(i), self.project(j)) for (i, j) in cuts
+            }
+            hit = np.array(
+                [any((self.project(i), self.project(j)) in transitions
+                     for (i, j) in origins) for origins in names],
+                dtype=bool
+            )
+            edge_class, _ = self.physical_transitions()
+            classes = np.array([edge_class[edge] for edge in self.model_edges])
+            d_vals[np.isin(classes, classes[hit])] = 1
         else:
-            self.model.optimize()
+            do_not_cut = set(self.GD.do_not_cut)
+            for e, origins in enumerate(names):
+                if (any(name in cuts for name in origins)
+                        and self.model_edges[e] not in do_not_cut):
+                    d_vals[e] = 1
+        return d_vals
+
+    def start_values(self, d_vals):
+        """
+        Flow and partition values of a cut: the maximum flow on G without
+        the cut edges and the nodes of G without I that the sources still
+        reach without the cut edges.
+
+        Args:
+            d_vals: Cut values aligned with the model edges.
 
-    def parse_solution(self, print=False):
+        Returns:
+            flow: Value of the maximum flow.
+            f_vals: Flow values aligned with the model edges.
+            m_vals: Partition values aligned with the model nodes without I.
+        """
+        G = self.G
+        cut = np.asarray(d_vals) > 0.5
+        is_src = np.zeros(G.n_nodes, dtype=bool)
+        is_src[self.src] = True
+        is_sink = np.zeros(G.n_nodes, dtype=bool)
+        is_sink[self.sink] = True
+        # no flow into the sources or out of the sinks
+        usable = ~is_src[G.dst] & ~is_sink[G.src] & ~cut
+        flow, f_vals, _ = flow_cut(
+            G.n_nodes, G.src, G.dst, np.where(usable, self.capacity, 0),
+            np.flatnonzero(is_src), np.flatnonzero(is_sink)
+        )
+        reached = G.edge_subgraph(self.edges_without_I_mask() & ~cut).reachable(
+            np.flatnonzero(is_src & self.G_minus_I.node_mask)
+        )
+        m_vals = reached[self.model_nodes_without_I].astype(float)
+        return flow, f_vals, m_vals
+
+    def project(self, state):
+        # transition system state of a product state (custom map applied)
+        if self.GD.custom_map:
+            return self.GD.custom_map.get(state[0], state[0])
+        return state[0]
+
+    def warm_start(self, start):
+        """
+        Set a MIP start (after setting up the model).
+
+        Args:
+            start: 'mincut' starts from the solution of the min-cut solver
+            (static case only), a path starts from the cuts stored in that
+            result file, and an iterable of cut edges (e.g. the cuts returned
+            by a previous solve) starts from those cuts with their flow and
+            partition values (see start_values). The flows on S of the
+            reactive case are completed by the solver.
+        """
+        if isinstance(start, str) and start == 'mincut':
+            if self.type != 'static':
+                print('The min-cut start is only available for the static case.')
+                return
+            result = mincut(self)
+            print(f'min-cut start: flow {result.flow} (bound {result.bound})')
+            if result.status == 'not solved':
+                print('The min-cut solver found no flow, solving without start.')
+                return
+            self.set_start(result.f_vals, result.d_vals, result.m_vals)
+            return
+        if isinstance(start, str):
+            if not os.path.exists(start):
+                print('Start file ' + start + ' not found, solving without start.')
+                return
+            start = read_cuts(start)
+        d_vals = self.cut_start(start)
+        flow, f_vals, m_vals = self.start_values(d_vals)
+        print(f'cut start: {int(d_vals.sum())} cut edges, flow {flow}')
+        self.set_start(f_vals, d_vals, m_vals)
+
+    def parse_solution(self, print_cuts=False):
         """
         Parse the solution.
 
+        Args:
+            print_cuts: Whether to print the cut edges.
+
         Returns:
-            d_vals: Vector of cut values for each edge (d^e=1 is cut).
-            flow: Vector of flow values for each edge.
+            d_vals: Dictionary of the cut edges (named by their product
+            states) and their cut values.
+            flow: Total flow out of the sources.
             exit_status: Exit status of the optimization.
         """
-        self.model._data["runtime"] = self.model.Runtime
-        self.model._data["flow"] = None
-        self.model._data["ncuts"] = None
+        self.data["flow"] = None
+        self.data["ncuts"] = None
         # Storing problem variables:
-        self.model._data["n_bin_vars"] = self.model.NumBinVars
-        self.model._data["n_cont_vars"] = self.model.NumVars - self.model.NumBinVars
-        self.model._data["n_constrs"] = self.model.NumConstrs
-        self.model._data["mip_gap"] = self.model.MIPGap
+        self.data.update(self.solver.stats())
 
-        f_vals = []
-        d_vals = []
+        d_parsed = {}
         flow = None
         exit_status = None
-        # f = self.model.getVarByName("flow")
-        # d = self.model.getVarByName("d")
+        status = self.solver.status
 
-        if self.model.status == 4:
-            self.model.Params.DualReductions = 0
+        if status == 'inf/unbounded':
+            if self.model is not None:
+                self.model.Params.DualReductions = 0
             exit_status = 'inf'
-            self.model._data["status"] = "inf/unbounded"
+            self.data["status"] = "inf/unbounded"
             return 0, 0, exit_status
-        elif self.model.status == 11 and self.model.SolCount < 1:
+        elif status == 'not_solved':
             exit_status = 'not solved'
-            self.model._data["status"] = "not_solved"
-            self.model._data["exit_status"] = exit_status
-        elif self.model.status == 2 or (
-            self.model.status == 11 and self.model.SolCount >= 1
-        ):
-            if self.model.status == 2:
-                self.model._data["status"] = "optimal"
-                self.model._data["term_condition"] = "optimal found"
-            else:
-                # feasible. may be optimal.
-                self.model._data["status"] = "feasible"
+            self.data["status"] = "not_solved"
+            self.data["exit_status"] = exit_status
+        elif status in ['optimal', 'feasible']:
+            self.data["status"] = status
+            if status == 'optimal':
+                self.data["term_condition"] = "optimal found"
 
             # --------- parse output
-            d_vals = dict()
-            f_vals = dict()
-
-            for (i, j) in self.model_edges:
-                f_vals.update(
-                    {
-                        (i, j):
-                        self.model.getVarByName('flow[' + str(i) + ',' + str(j) + ']').X
-                    }
+            f_vals, d_vals = self.solution_arrays()
+            d_parsed, flow = self.parse_cuts(f_vals, d_vals, print_cuts)
+            self.data["flow"] = flow
+            self.data["ncuts"] = len(d_parsed)
+            self.data["cuts"] = [list(edge) for edge in d_parsed]
+            if self.checkpoint is not None:
+                self.checkpoint.finish(
+                    self.model, {"flow": flow, "ncuts": len(d_parsed),
+                                 "cuts": list(d_parsed)}, status
                 )
-            if self.type == 'static':
-                for (i, j) in self.model_edges:
-                    d_vals.update(
-                        {
-                            (i, j):
-                            self.model.getVarByName('d[' + str(i) + ','+str(j) + ']').X
-                        }
-                    )
-            elif self.type == 'reactive':
-                for (i, j) in self.model_edges_without_I:
-                    d_vals.update(
-                        {
-                            (i, j): self.model.getVarByName(
-                                'd[' + str(i) + ',' + str(j) + ']'
-                            ).X
-                        }
-                    )
-
-            flow = sum(
-                self.model.getVarByName('flow[' + str(i) + ',' + str(j) + ']').X
-                for (i, j) in self.model_edges if i in self.src
-            )
-            self.model._data["flow"] = flow
-            ncuts = 0
-
-            d_parsed = {}
-            for key in d_vals.keys():
-                if d_vals[key] > 0.9:
-                    ncuts += 1
-                    d_parsed.update({
-                        (self.GD.node_dict[key[0]], self.GD.node_dict[key[1]]):
-                        d_vals[key]
-                    })
-                    if print:
-                        print(
-                            '{0} to {1} at {2}'.format(
-                                self.GD.node_dict[key[0]],
-                                self.GD.node_dict[key[1]], d_vals[key]
-                            )
-                        )
-
-            self.model._data["ncuts"] = ncuts
             exit_status = 'opt'
-            self.model._data["exit_status"] = exit_status
-        elif self.model.status == 3:
+            self.data["exit_status"] = exit_status
+        elif status == 'inf':
             exit_status = 'inf'
-            self.model._data["status"] = "inf"
+            self.data["status"] = "inf"
         else:
             st()
 
         if not os.path.exists("log"):
             os.makedirs("log")
         with open('log/opt_data.json', 'w') as fp:
-            json.dump(self.model._data, fp)
+            json.dump(self.data, fp)
 
         return d_parsed, flow, exit_status
 
-    def optimize(self):
+    def solution_arrays(self):
+        """
+        Read the flow and cut values of the current solution in bulk.
+
+        Returns:
+            f_vals: Array of the flow values aligned with the model edges.
+            d_vals: Array of the cut values aligned with the model edges
+            (zero on edges that cannot be cut).
+        """
+        d_vals = np.zeros(len(self.model_edges))
+        if self.form is not None:
+            x = self.solver.values()
+            f_vals = x[self.flow_cols]
+            cuttable = self.cut_cols >= 0
+            d_vals[cuttable] = x[self.cut_cols[cuttable]]
+        else:
+            f_vals = self.solver.values(self.flow_vars)
+            d_vals[self.cut_edge_ids] = self.solver.values(self.cut_vars)
+        return f_vals, d_vals
+
+    def parse_cuts(self, f_vals, d_vals, print_cuts=False):
+        """
+        Parse the cut edges and the total flow from the solution arrays.
+
+        Args:
+            f_vals: Array of the flow values aligned with the model edges.
+            d_vals: Array of the cut values aligned with the model edges.
+            print_cuts: Whether to print the cut edges.
+
+        Returns:
+            d_parsed: Dictionary of the cut edges and their cut values.
+            flow: Total flow out of the sources.
+        """
+        is_src = np.zeros(self.G.n_nodes, dtype=bool)
+        is_src[self.src] = True
+        flow = float(f_vals[is_src[self.G.src]].sum())
+
+        # a cut on a reduced edge cuts all of its edges in the unreduced G
+        names = self.origin_names()
+        d_parsed = {}
+        for e in np.flatnonzero(d_vals > 0.9):
+            for (i, j) in names[e]:
+                d_parsed.update({(i, j): float(d_vals[e])})
+                if print_cuts:
+                    print('{0} to {1} at {2}'.format(i, j, d_vals[e]))
+        return d_parsed, flow
+
+    def optimize(self, start=None, time_limit=None):
         """
         Setup the model, solve the problem, and parse the solution.
+
+        Args:
+            start: Optional MIP start, 'mincut', the path of a result file or
+            a cut set (see warm_start).
+            time_limit: Optional time limit in seconds, the best incumbent at
+            the time limit is returned (for the portfolio the best one of all
+            members).
         """
-        self.setup_model()
-        self.solve_problem()
-        print(f'model run time: {self.model.Runtime}')
-        print(f'model bin vars: {self.model.NumBinVars}')
-        print(f'model continuous vars: {self.model.NumVars - self.model.NumBinVars}')
-        print(f'model constraints: {self.model.NumConstrs}')
+        if self.model is None:
+            self.setup_model()
+        if start is not None:
+            self.warm_start(start)
+        self.solve_problem(time_limit)
+        stats = self.solver.stats()
+        print(f'model build time: {self.build_time}')
+        print(f'model run time: {stats["runtime"]}')
+        print(f'model bin vars: {stats["n_bin_vars"]}')
+        print(f'model continuous vars: {stats["n_cont_vars"]}')
+        print(f'model constraints: {stats["n_constrs"]}')
+        print(f'model time to first incumbent: {self.data["time_to_first_incumbent"]}')
         d_vals, flow, exit_status = self.parse_solution()
         return d_vals, flow, exit_status
 
 
-def cb_mip(model, where):
-    """
-    Callback function to terminate the program if:
-    1. The objective has not improved significantly.
-    2. The MIP gap is below a threshold.
-    3. A timeout is reached (default: 12 hours).
-    """
-    if where == GRB.Callback.MIPNODE:
-        # Best known solution at the current node
-        obj = model.cbGet(GRB.Callback.MIPNODE_OBJBST)
-        sol_count = model.cbGet(GRB.Callback.MIPNODE_SOLCNT)
-
-        # Update incumbent objective and time if improvement occurs
-        if sol_count > 0 and abs(obj - model._cur_obj) > 1e-8:
-            model._cur_obj = obj
-            model._obj_time = time.time()
-
-    elif where == GRB.Callback.MIP:
-        # Retrieve best bound and objective
-        best_bound = model.cbGet(GRB.Callback.MIP_OBJBND)
-        best_obj = model.cbGet(GRB.Callback.MIP_OBJBST)
-
-        # Calculate the MIP gap if feasible
-        if best_obj < GRB.INFINITY and best_bound > -GRB.INFINITY:
-            mip_gap = abs(best_bound - best_obj) / max(abs(best_obj), 1)
-            model._mipgap = mip_gap
-
-            # Terminate if MIP gap is below the threshold (e.g., 5%)
-            if mip_gap < 0.05:
-                model._data["term_condition"] = "Mipgap low"
-                model.terminate()
-
-        # Terminate if total runtime exceeds 12 hours
-        elapsed_time = time.time() - model._time
-        if elapsed_time > 3600 * 12:
-            model._data["term_condition"] = "Timeout"
-            model.terminate()
-
-
-def cb(model, where):
+def index_edges(nodes, edges):
     """
-    Callback function to terminate the program if the objective has not
-    improved in 1 hour or no solution was found in 12 hours.
+    Index the edges by their in and out nodes.
+
+    Args:
+        nodes: List of nodes.
+        edges: List of edges (i, j).
+
+    Returns:
+        in_edges: Dictionary mapping each node to its incoming edges.
+        out_edges: Dictionary mapping each node to its outgoing edges.
     """
-    if where == GRB.Callback.MIPNODE:
-        obj = model.cbGet(GRB.Callback.MIPNODE_OBJBST)
-        sol_count = model.cbGet(GRB.Callback.MIPNODE_SOLCNT)
-
-        if abs(obj - model._cur_obj) > 1e-8:
-            # If so, update incumbent
-            model._cur_obj = obj
-            model._obj_time = time.time()
-
-        if sol_count >= 1:  # if objective didnt change in 1 hr
-            if time.time() - model._obj_time > 3600:
-                model._data["term_condition"] = "Obj not changing"
-                model.terminate()
-
-        # Total termination time if the optimizer has not found anything in 5 min:
-        if time.time() - model._time > 3600*12:
-            model._data["term_condition"] = "Timeout"
-            model.terminate()
+    in_edges = {node: [] for node in nodes}
+    out_edges = {node: [] for node in nodes}
+    for (i, j) in edges:
+        out_edges[i].append((i, j))
+        in_edges[j].append((i, j))
+    return in_edges, out_edges
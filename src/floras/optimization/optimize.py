@@ -1,15 +1,104 @@
+import time
 from floras.optimization.setup_graphs import setup_nodes_and_edges
 from floras.optimization.optimization import MILP
+from floras.optimization.mincut import solve_mincut
+from floras.optimization.benders import solve_benders
+from floras.optimization.relax import solve_relax
+from floras.optimization.decompose import solve_decomposed
 
 
 def solve(virtual, system, b_pi, virtual_sys, case='static',
-          print_solution=True, plot_results=False, callback='cb'):
-    GD, SD = setup_nodes_and_edges(virtual, virtual_sys, b_pi, case=case)
-
-    milp = MILP(GD, SD, case, callback=callback)
-    d, flow, exit_status = milp.optimize()
-    if exit_status == 'opt':
+          print_solution=True, plot_results=False, callback='cb', aggregate=False,
+          assembly='matrix', backend='gurobi', mode='milp', start=None,
+          portfolio=None, on_incumbent=None, checkpoint=None, resume=None,
+          presolve=False, workers=None, time_limit=None, decomposition=False):
+    exit_status = None
+    if resume is not None:
+        # the graphs and the model are read from the checkpoint
+        milp = MILP.from_checkpoint(
+            resume, callback=callback, on_incumbent=on_incumbent, checkpoint=checkpoint
+        )
+    else:
+        GD, SD = setup_nodes_and_edges(virtual, virtual_sys, b_pi, case=case)
+        kwargs = dict(
+            callback=callback, aggregate=aggregate, assembly=assembly,
+            backend=backend, portfolio=portfolio, on_incumbent=on_incumbent
+        )
+        if decomposition and (mode != 'milp' or checkpoint is not None):
+            print('The decomposition is only used with the \'milp\' mode and '
+                  'without checkpoints.')
+        elif decomposition:
+            begin = time.time()
+            d, flow, exit_status = solve_decomposed(
+                GD, SD, case, start=start, time_limit=time_limit, **kwargs
+            )
+            if exit_status == 'feasible':
+                # the stitched cut starts the monolithic model
+                start = list(d)
+            time_limit = remaining_time(time_limit, begin)
+        if exit_status != 'opt':
+            milp = MILP(
+                GD, SD, case, checkpoint=checkpoint, presolve=presolve,
+                lazy=mode == 'lazy', **kwargs
+            )
+    if exit_status != 'opt':
+        d, flow, exit_status = run_mode(milp, mode, start, workers, time_limit)
+    # a feasible result of the min-cut solver or the decomposition is not
+    # proven optimal
+    if exit_status in ['opt', 'feasible']:
         if plot_results:
             cuts = [x for x in d.keys() if d[x] >= 0.9]
             virtual.save_result_plot(cuts, 'virtual_with_cuts')
         return d, flow
+
+
+def run_mode(milp, mode, start=None, workers=None, time_limit=None):
+    """
+    Solve the problem of the MILP with the requested mode.
+
+    Args:
+        milp: MILP object.
+        mode: 'milp', 'lazy', 'relax', 'mincut' or 'benders'.
+        start: Optional MIP start (see MILP.warm_start).
+        workers: Number of worker processes for the Benders subproblems.
+        time_limit: Optional time limit in seconds, shared by the mode and
+        the MILP it falls back to.
+
+    Returns:
+        d_vals: Dictionary of the cut edges and their cut values.
+        flow: Total flow out of the sources.
+        exit_status: Exit status of the optimization.
+    """
+    begin = time.time()
+    if mode == 'mincut' and milp.type == 'static':
+        d_vals, flow, exit_status = solve_mincut(milp)
+        if exit_status != 'not solved':
+            return d_vals, flow, exit_status
+        print('The min-cut solver found no flow, solving the MILP.')
+        return milp.optimize(start=start, time_limit=remaining_time(time_limit, begin))
+    elif mode == 'benders' and milp.type == 'reactive':
+        d_vals, flow, exit_status = solve_benders(
+            milp, workers=workers, time_limit=time_limit
+        )
+        if exit_status != 'not solved':
+            return d_vals, flow, exit_status
+        print('The Benders decomposition found no solution, solving the MILP.')
+        return milp.optimize(start=start, time_limit=remaining_time(time_limit, begin))
+    elif mode == 'relax':
+        d_vals, flow, exit_status = solve_relax(milp, time_limit=time_limit)
+        if exit_status != 'not solved':
+            return d_vals, flow, exit_status
+        print('The rounding found no feasible cut, solving the MILP.')
+        return milp.optimize(start=start, time_limit=remaining_time(time_limit, begin))
+    if mode not in ['milp', 'lazy']:
+        print('Requested mode not available, options are \'milp\', '
+              '\'relax\', \'mincut\' (static case only), \'lazy\' or '
+              '\'benders\' (reactive case only).')
+    return milp.optimize(start=start, time_limit=time_limit)
+
+
+def remaining_time(time_limit, begin):
+    """Time left of the time limit since begin (None without time limit)."""
+    if time_limit is None:
+        return None
+    return max(time_limit - (time.time() - begin), 0)
@@ -0,0 +1,158 @@
+'''
+Presolve of the virtual product graph for the optimization. Nodes that are
+not on a path from a source to a sink are trimmed, chains of edges whose
+cuts are not coupled to other edges are contracted into a single edge and
+the resulting parallel edges are merged into one edge with a capacity. The
+reduction keeps the original edges behind every reduced edge to map the
+cuts of a solution back.
+'''
+import numpy as np
+from floras.components.compact_graph import CompactGraph
+
+
+class Reduction():
+    """
+    Reduced graph and its map to the edges of the original graph.
+
+    Args:
+        graph: CompactGraph of the reduced graph (the node ids are kept).
+        capacity: Array of the number of parallel paths of every edge.
+        cut_origins: List of the original edge ids that are cut when an edge
+        of the reduced graph is cut, for every edge of the reduced graph.
+        contracted: Boolean array of the edges that replace a chain or
+        parallel edges.
+        stats: Dictionary of the sizes before and after the reduction.
+    """
+    def __init__(self, graph, capacity, cut_origins, contracted, stats):
+        self.graph = graph
+        self.capacity = capacity
+        self.cut_origins = cut_origins
+        self.contracted = contracted
+        self.stats = stats
+
+    def report(self):
+        stats = self.stats
+        print(f'presolve: {stats["nodes"]} -> {stats["reduced_nodes"]} nodes, '
+              f'{stats["edges"]} -> {stats["reduced_edges"]} edges (trimmed '
+              f'{stats["trimmed_nodes"]} nodes, contracted {stats["chains"]} '
+              f'chains, merged {stats["merged_edges"]} parallel edges)')
+
+
+def presolve(G, sources, sinks, intermed, classes=None):
+    """
+    Reduce the graph for the optimization.
+
+    A node that cannot be reached from a source or cannot reach a sink
+    carries no flow and never has to be cut off, so it is trimmed with its
+    edges. With classes (static case), a cut class that keeps some of its
+    edges is charged for its trimmed edges, and chains through nodes with a
+    single in and out edge, whose edges are the only kept members of their
+    classes, are contracted. Cutting the chain costs the cheapest cut of its
+    edges. Nodes in sources, sinks and intermed are never
+    contracted, and chains that would be parallel to an edge with coupled
+    cuts are kept.
+
+    Args:
+        G: CompactGraph of the virtual product graph (without self-loops).
+        sources: Source nodes.
+        sinks: Sink nodes.
+        intermed: Intermediate nodes.
+        classes: Cut class of every edge of G, edges of a class are cut
+        together (default None: cuts are coupled otherwise, no contraction).
+
+    Returns:
+        reduction: Reduction of G.
+    """
+    n = G.n_nodes
+    src, dst = G.src, G.dst
+    n_edges = len(src)
+    keep_node = G.reachable(sources) & G.coreachable(sinks) & G.node_mask
+    keep_edge = keep_node[src] & keep_node[dst]
+
+    cut_origins = [[e] for e in range(n_edges)]
+    free = np.zeros(n_edges, dtype=bool)
+    if classes is not None:
+        classes = np.asarray(classes, dtype=np.int64)
+        # the first kept edge of a class is charged for its trimmed edges
+        n_classes = classes.max() + 1 if n_edges else 0
+        kept = np.flatnonzero(keep_edge)
+        free = np.bincount(classes[kept], minlength=n_classes)[classes] == 1
+        first = np.full(n_classes, -1, dtype=np.int64)
+        first[classes[kept[::-1]]] = kept[::-1]
+        for e in np.flatnonzero(~keep_edge & (first[classes] >= 0)).tolist():
+            cut_origins[first[classes[e]]].append(e)
+
+    # contractible nodes: one in and one out edge, both not coupled
+    special = np.zeros(n, dtype=bool)
+    special_nodes = list(sources) + list(sinks) + list(intermed)
+    special[np.asarray(special_nodes, dtype=np.int64)] = True
+    kept = np.flatnonzero(keep_edge)
+    in_deg = np.bincount(dst[kept], minlength=n)
+    out_deg = np.bincount(src[kept], minlength=n)
+    in_edge = np.full(n, -1, dtype=np.int64)
+    out_edge = np.full(n, -1, dtype=np.int64)
+    in_edge[dst[kept]] = kept
+    out_edge[src[kept]] = kept
+    contractible = keep_node & ~special & (in_deg == 1) & (out_deg == 1)
+    nodes = np.flatnonzero(contractible)
+    contractible[nodes] = free[in_edge[nodes]] & free[out_edge[nodes]]
+
+    chains = []
+    for e in kept[~contractible[src[kept]] & contractible[dst[kept]]].tolist():
+        path = [e]
+        v = dst[e]
+        while contractible[v]:
+            path.append(out_edge[v])
+            v = dst[path[-1]]
+        if v != src[e]:
+            chains.append((int(src[e]), int(v), path))
+    coupled_pairs = {
+        (u, v) for u, v, f in zip(src[kept].tolist(), dst[kept].tolist(), free[kept])
+        if not f
+    }
+    chains = [chain for chain in chains if chain[:2] not in coupled_pairs]
+
+    # reduced edges: (u, v) -> [capacity, cut origins, contracted]
+    in_chain = np.zeros(n_edges, dtype=bool)
+    removed = np.zeros(n, dtype=bool)
+    items = {}
+    for u, w, path in chains:
+        in_chain[path] = True
+        removed[dst[path[:-1]]] = True
+        item = items.setdefault((u, w), [0, [], True])
+        item[0] += 1
+        cheapest = min(path, key=lambda e: len(cut_origins[e]))
+        item[1].extend(cut_origins[cheapest])
+    for e in np.flatnonzero(keep_edge & ~in_chain).tolist():
+        edge = (int(src[e]), int(dst[e]))
+        if edge in items:
+            # parallel to contracted chains
+            items[edge][0] += 1
+            items[edge][1].extend(cut_origins[e])
+        else:
+            items[edge] = [1, list(cut_origins[e]), False]
+    merged_edges = sum(item[0] - 1 for item in items.values())
+
+    edges = list(items)
+    r_src = np.array([u for u, _ in edges], dtype=np.int64)
+    r_dst = np.array([v for _, v in edges], dtype=np.int64)
+    order = np.argsort(r_src, kind='stable')
+    node_mask = keep_node & ~removed
+    graph = CompactGraph(
+        n, r_src[order], r_dst[order], node_attr=G.node_attr, node_mask=node_mask
+    )
+    values = [items[edges[k]] for k in order.tolist()]
+    capacity = np.array([item[0] for item in values], dtype=float)
+    contracted = np.array([item[2] for item in values], dtype=bool)
+    stats = {
+        "nodes": G.number_of_nodes(),
+        "edges": n_edges,
+        "reduced_nodes": graph.number_of_nodes(),
+        "reduced_edges": graph.number_of_edges(),
+        "trimmed_nodes": int((G.node_mask & ~keep_node).sum()),
+        "chains": len(chains),
+        "merged_edges": merged_edges,
+    }
+    return Reduction(
+        graph, capacity, [item[1] for item in values], contracted, stats
+    )
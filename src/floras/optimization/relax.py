@@ -0,0 +1,332 @@
+'''
+Approximate solver using the LP relaxation of the MILP. The cut values of the
+LP solution are rounded and repaired to a feasible cut with maximum flows,
+and the LP objective bounds the objective of the optimal cut.
+'''
+import time
+import numpy as np
+from floras.optimization.backends import get_backend, GurobiBackend
+from floras.optimization.benders import flow_cut
+from floras.optimization.mincut import layered_graph, layered_paths, source_side
+
+
+class RelaxResult():
+    """
+    Rounded solution and LP bound of the relaxation.
+
+    Args:
+        f_vals: Flow values aligned with the model edges.
+        d_vals: Cut values aligned with the model edges.
+        flow: Value of the flow.
+        objective: Objective of the rounded solution (flow minus the cut
+        penalty).
+        bound: Objective of the LP relaxation.
+        repairs: Dictionary with the number of edges cut and opened by the
+        repair of the rounded cut.
+    """
+    def __init__(self, f_vals, d_vals, flow, objective, bound, repairs):
+        self.f_vals = f_vals
+        self.d_vals = d_vals
+        self.flow = flow
+        self.objective = objective
+        self.bound = bound
+        self.repairs = repairs
+
+    @property
+    def status(self):
+        # no feasible cut was found, the problem can still be feasible
+        if self.d_vals is None:
+            return 'not solved'
+        elif self.bound - self.objective <= 1e-6:
+            return 'optimal'
+        return 'feasible'
+
+
+def solve_lp(milp, time_limit=None):
+    """
+    Solve the LP relaxation of the model of the MILP.
+
+    Args:
+        milp: MILP object.
+        time_limit: Optional time limit in seconds.
+
+    Returns:
+        f_vals: Array of the flow values aligned with the model edges.
+        d_vals: Array of the cut values aligned with the model edges.
+        bound: Objective of the LP (None if it was not solved to optimality).
+    """
+    if milp.model is None and milp.form is None:
+        milp.setup_model()
+    if milp.form is not None:
+        lp = milp.form.relaxation()
+        backend = get_backend(milp.backend)
+        backend.load(lp)
+        if milp.model is not None and backend.model is not None:
+            # keep the parameters of the MILP model (model.relax() does)
+            backend.model.Params.OutputFlag = milp.model.Params.OutputFlag
+    else:
+        backend = GurobiBackend()
+        backend.set_model(milp.model.relax())
+    if time_limit is not None:
+        backend.set_time_limit(time_limit)
+    backend.optimize()
+    if backend.status != 'optimal':
+        return None, None, None
+    flow_cols, cut_cols = milp.solution_columns()
+    if milp.form is not None:
+        x = backend.values()
+        bound = float(lp.c @ x)
+    else:
+        x = backend.values(backend.model.getVars())
+        bound = backend.model.ObjVal
+    cuttable = cut_cols >= 0
+    d_vals = np.zeros(len(cut_cols))
+    d_vals[cuttable] = x[cut_cols[cuttable]]
+    return x[flow_cols], d_vals, bound
+
+
+class Rounding():
+    """
+    Rounding of the LP cut values to a feasible cut.
+
+    Every coupled group of edges (the physical transitions in the static
+    case) is cut if its mean LP value is at least 1/2. The repair then
+    alternates three checks until all of them pass:
+
+    - the sources are separated from the sinks on G without I, otherwise a
+      minimum cut of the remaining edges is added and the groups that are
+      not needed for the separation are opened in the order of their LP
+      values,
+    - in the reactive case, the sinks of S can be reached by every flow on S
+      (see SReachability), otherwise the cut edge with the smallest LP value
+      of every violated constraint is opened,
+    - the maximum flow on G without the cut edges is at least 1, otherwise
+      the path through I with the smallest LP cut values is opened.
+
+    Edges are only opened if the sources can still be separated from the
+    sinks without them, and opened edges are not cut again, so the repair
+    ends. The repair also starts from the groups with LP value 1 and the
+    better cut is kept, then the paths through I are opened one by one
+    while this improves the objective.
+
+    Args:
+        milp: MILP object.
+        d_lp: LP cut values aligned with the model edges.
+    """
+    def __init__(self, milp, d_lp):
+        self.milp = milp
+        G = milp.G
+        n = G.n_nodes
+        self.is_src = np.zeros(n, dtype=bool)
+        self.is_src[milp.src] = True
+        self.is_sink = np.zeros(n, dtype=bool)
+        self.is_sink[milp.sink] = True
+        self.is_I = np.zeros(n, dtype=bool)
+        self.is_I[milp.cleaned_intermed] = True
+        self.keep = milp.edges_without_I_mask()
+        allowed = np.ones(G.number_of_edges(), dtype=bool)
+        self.check = None
+        if milp.type == 'static':
+            edge_class, _ = milp.physical_transitions()
+            self.classes = np.array(
+                [edge_class[edge] for edge in milp.model_edges], dtype=np.int64
+            )
+        else:
+            self.classes = np.arange(G.number_of_edges())
+            allowed = self.keep.copy()
+            for (i, j) in milp.GD.do_not_cut:
+                e = G.edge_id(i, j)
+                if e is not None:
+                    allowed[e] = False
+            self.check = milp.s_reachability_check()
+        classes = self.classes
+        self.weights = np.bincount(
+            classes, weights=milp.cut_weights
+        )[classes].astype(np.int64)
+        self.class_score = np.bincount(classes, weights=d_lp) / np.bincount(classes)
+        self.score = self.class_score[classes]
+        # no flow into the sources or out of the sinks
+        self.usable = ~self.is_src[G.dst] & ~self.is_sink[G.src]
+        self.capacity = np.where(self.usable, milp.capacity, 0).astype(np.int64)
+        self.protected = np.isin(classes, classes[~allowed])
+        self.rounded = (self.score >= 0.5) & ~self.protected
+        self.paths = None
+
+    def separated(self, cut):
+        G = self.milp.G
+        reached = G.edge_subgraph(self.keep & ~cut).reachable(
+            np.flatnonzero(self.is_src & ~self.is_I)
+        )
+        return not (reached & self.is_sink & ~self.is_I).any()
+
+    def source_side(self, edges, protected):
+        G = self.milp.G
+        return source_side(
+            G.n_nodes, G.src, G.dst, edges, self.weights, protected, self.is_src,
+            self.is_sink, self.is_I
+        )
+
+    def flow(self, cut):
+        G = self.milp.G
+        return flow_cut(
+            G.n_nodes, G.src, G.dst, np.where(cut, 0, self.capacity),
+            np.flatnonzero(self.is_src), np.flatnonzero(self.is_sink)
+        )
+
+    def objective(self, cut):
+        milp = self.milp
+        return self.flow(cut)[0] - milp.reg * milp.cut_weights[cut].sum()
+
+    def open_edges(self, cut, protected, edges):
+        # open the groups of the edges if a separation is left without them
+        opened = np.isin(self.classes, self.classes[edges])
+        if self.source_side(self.keep, protected | opened) is None:
+            return None
+        return cut & ~opened, protected | opened
+
+    def prune(self, cut):
+        # open the cut groups that are not needed to separate the sources
+        classes = self.classes
+        cut_classes = np.unique(classes[cut])
+        order = np.argsort(self.class_score[cut_classes], kind='stable')
+        for c in cut_classes[order]:
+            opened = cut & (classes != c)
+            if self.separated(opened):
+                cut = opened
+        return cut
+
+    def through_paths(self):
+        # paths through I of a maximum flow on G, smallest LP cut values first
+        if self.paths is None:
+            G = self.milp.G
+            layered = layered_graph(
+                G.n_nodes, G.src, G.dst, self.usable, self.is_src, self.is_sink,
+                self.is_I
+            )
+            self.paths = layered_paths(layered, self.capacity)[1]
+            self.paths.sort(key=lambda path: self.score[path].sum())
+        return self.paths
+
+    def repair(self, cut, protected):
+        """
+        Repair the cut until it is feasible.
+
+        Returns:
+            repaired: Tuple of the feasible cut and the protected edges (None
+            if the repair failed).
+        """
+        while True:
+            if not self.separated(cut):
+                side = self.source_side(self.keep & ~cut, protected)
+                if side is None:
+                    return None
+                G = self.milp.G
+                crossing = self.keep & ~cut & side[G.src] & ~side[G.dst]
+                cut = cut | np.isin(self.classes, self.classes[crossing])
+                cut = self.prune(cut)
+            violated = []
+            if self.check is not None:
+                violated = self.check.violated(cut.astype(float))
+            for cons in violated:
+                # the edge with the smallest LP value that can be opened
+                for e in cons[np.argsort(self.score[cons], kind='stable')]:
+                    opened = self.open_edges(cut, protected, [e])
+                    if opened is not None:
+                        cut, protected = opened
+                        break
+                else:
+                    return None
+            if violated:
+                continue
+            if self.flow(cut)[0] >= 1:
+                return cut, protected
+            for path in self.through_paths():
+                opened = None
+                if cut[path].any():
+                    opened = self.open_edges(cut, protected, path)
+                if opened is not None:
+                    cut, protected = opened
+                    break
+            else:
+                return None
+
+    def round(self):
+        """
+        Round and repair the cut, then open the paths through I that
+        improve the objective.
+
+        Returns:
+            d_vals: Cut values aligned with the model edges (None if no
+            feasible cut was found).
+            repairs: Dictionary with the number of edges cut and opened by
+            the repair.
+        """
+        # also start from the cut values the LP is sure of
+        sure = (self.score >= 1 - 1e-6) & ~self.protected
+        repaired = [self.repair(start.copy(), self.protected)
+                    for start in [self.rounded, sure]]
+        repaired = [candidate for candidate in repaired if candidate is not None]
+        if not repaired:
+            return None, {}
+        cut, protected = max(
+            repaired, key=lambda candidate: self.objective(candidate[0])
+        )
+        objective = self.objective(cut)
+        for path in self.through_paths():
+            if not cut[path].any():
+                continue
+            opened = self.open_edges(cut, protected, path)
+            candidate = opened and self.repair(*opened)
+            if candidate and self.objective(candidate[0]) > objective + 1e-9:
+                cut, protected = candidate
+                objective = self.objective(cut)
+        repairs = {
+            "cut": int((cut & ~self.rounded).sum()),
+            "opened": int((self.rounded & ~cut).sum()),
+        }
+        return cut.astype(float), repairs
+
+
+def solve_relax(milp, time_limit=None, print_cuts=False):
+    """
+    Solve the LP relaxation of the problem and round its cut.
+
+    Args:
+        milp: MILP object.
+        time_limit: Optional time limit for the LP in seconds.
+        print_cuts: Whether to print the cut edges.
+
+    Returns:
+        d_vals: Dictionary of the cut edges and their cut values.
+        flow: Total flow out of the sources.
+        exit_status: 'opt' if the cut meets the LP bound, 'feasible' if a
+        feasible cut was found and 'not solved' otherwise.
+    """
+    start = time.time()
+    _, d_lp, bound = solve_lp(milp, time_limit)
+    lp_time = time.time() - start
+    result = RelaxResult(None, None, 0.0, -np.inf, bound, {})
+    if bound is not None:
+        rounding = Rounding(milp, d_lp)
+        d_vals, repairs = rounding.round()
+        if d_vals is not None:
+            flow, f_vals, _ = rounding.flow(d_vals > 0.5)
+            objective = rounding.objective(d_vals > 0.5)
+            result = RelaxResult(f_vals, d_vals, flow, objective, bound, repairs)
+    runtime = time.time() - start
+    print(f'relax run time: {runtime} (LP {lp_time})')
+    print(f'relax objective: {result.objective} (LP bound {result.bound}), '
+          f'status: {result.status}, repairs: {result.repairs}')
+    milp.data.update({
+        "relax_runtime": runtime,
+        "relax_lp_time": lp_time,
+        "relax_bound": result.bound,
+        "relax_objective": result.objective,
+        "relax_repairs": result.repairs,
+    })
+    if result.status == 'not solved':
+        return {}, 0, 'not solved'
+    d_vals, flow = milp.parse_cuts(result.f_vals, result.d_vals, print_cuts)
+    if result.status == 'optimal':
+        return d_vals, flow, 'opt'
+    return d_vals, flow, 'feasible'
@@ -1,12 +1,28 @@
 """Contains GraphData class for optimization and parses the virtual graphs
 into the required form."""
+import numpy as np
 import networkx as nx
+from floras.components.compact_graph import CompactGraph
 
 
 class GraphData:
+    """
+    Graph data for the optimization on the integer nodes of a virtual graph.
+
+    Args:
+        nodes: Integer nodes.
+        edges: Edges (i, j) between the nodes.
+        node_dict: Dictionary mapping the nodes to the product states.
+        inv_node_dict: Dictionary mapping the product states to the nodes.
+        acc_sys: System accepting nodes.
+        acc_test: Tester accepting nodes.
+        init: Initial nodes.
+        custom_map: Custom map of the transition system states (optional).
+        compact: CompactGraph of the nodes and edges (built if not given).
+    """
     def __init__(
             self, nodes, edges, node_dict, inv_node_dict, acc_sys, acc_test,
-            init, custom_map=None
+            init, custom_map=None, compact=None
     ):
         self.nodes = nodes
         self.edges = edges
@@ -15,98 +31,93 @@ class GraphData:
         self.acc_sys = acc_sys
         self.acc_test = acc_test
         self.init = init
-        self.graph = self.setup_graph(nodes, edges)
+        if compact is None:
+            compact = self.setup_compact_graph(nodes, edges)
+        self.compact = compact
+        self._graph = None
         self.int = self.acc_test
         self.sink = self.acc_sys
         self.custom_map = custom_map
+        self.coreach_sys = None  # nodes that can reach a node in acc_sys
+        self.coreach_test = None  # nodes that can reach a node in acc_test
         self.do_not_cut = self.find_do_not_cut_edges()
 
+    @property
+    def graph(self):
+        """networkx graph of the nodes and edges (built on first access)."""
+        if self._graph is None:
+            self._graph = self.setup_graph(self.nodes, self.edges)
+        return self._graph
+
     def setup_graph(self, nodes, edges):
         G = nx.DiGraph()
         G.add_nodes_from(nodes)
         G.add_edges_from(edges)
         return G
 
+    def setup_compact_graph(self, nodes, edges):
+        n_nodes = max(nodes) + 1 if len(nodes) > 0 else 0
+        node_mask = np.zeros(n_nodes, dtype=bool)
+        node_mask[list(nodes)] = True
+        src = [edge[0] for edge in edges]
+        dst = [edge[1] for edge in edges]
+        return CompactGraph(n_nodes, src, dst, node_mask=node_mask)
+
     def find_do_not_cut_edges(self):
-        do_not_cut = []
-        for edge in self.graph.edges:
-            reach_T = False
-            reach_I = False
-            for accsys in self.acc_sys:
-                if nx.has_path(self.graph, edge[0], accsys):
-                    reach_T = True
-                    break
-            if reach_T:
-                for acctest in self.acc_test:
-                    if nx.has_path(self.graph, edge[0], acctest):
-                        reach_I = True
-                        break
-            if reach_T and not reach_I:
-                do_not_cut.append(edge)
+        """
+        Find the edges that would introduce dead ends if cut: their out node
+        can reach a system accepting node but no tester accepting node.
+        Uses one backward search from each of the accepting sets, the results
+        are kept in self.coreach_sys and self.coreach_test.
+
+        Returns:
+            do_not_cut: List of edges that must not be cut.
+        """
+        self.coreach_sys = self.compact.coreachable(self.acc_sys)
+        self.coreach_test = self.compact.coreachable(self.acc_test)
+        src = self.compact.src
+        dst = self.compact.dst
+        keep = self.coreach_sys[src] & ~self.coreach_test[src]
+        do_not_cut = list(zip(src[keep].tolist(), dst[keep].tolist()))
         return do_not_cut
 
 
-def setup_nodes_and_edges(virtual, virtual_sys, b_pi, case='static'):
-    # setup nodes and map
-    nodes = []
-    node_dict = {}
-    inv_node_dict = {}
-    for i, node in enumerate(virtual.G_initial.nodes):
-        nodes.append(i)
-        node_dict.update({i: virtual.reverse_Sdict[node]})
-        inv_node_dict.update({virtual.reverse_Sdict[node]: i})
+def graph_data_from_product(virtual, custom_map=None, tester=True):
+    """
+    Set up the GraphData of a virtual graph, sharing the product's
+    CompactGraph (the nodes are the numbers of the product states).
+
+    Args:
+        virtual: Product after pruned_sync_prod.
+        custom_map: Custom map of the transition system states.
+        tester: Whether to collect the tester accepting nodes.
+    """
+    compact = virtual.graph
+    nodes = list(range(compact.n_nodes))
+    node_dict = dict(enumerate(virtual.S))
+    inv_node_dict = {node: i for i, node in node_dict.items()}
     # find initial state
     init = []
     for initial in virtual.I:
         init.append(inv_node_dict[initial])
     # find accepting states for system and tester
-    acc_sys = []
-    acc_test = []
-    for node in nodes:
-        if node_dict[node] in virtual.sink:
-            acc_sys.append(node)
-        if node_dict[node] in virtual.int:
-            acc_test.append(node)
-    # setup edges
-    edges = []
-    for edge in virtual.G_initial.edges:
-        out_node = virtual.reverse_Sdict[edge[0]]
-        in_node = virtual.reverse_Sdict[edge[1]]
-        edges.append((inv_node_dict[out_node], inv_node_dict[in_node]))
-
-    GD = GraphData(
-        nodes, edges, node_dict, inv_node_dict, acc_sys, acc_test,
-        init, custom_map=virtual.transys.custom_map
+    acc_sys = np.flatnonzero(compact.node_attr["acc_sys"]).tolist()
+    if tester:
+        acc_test = np.flatnonzero(compact.node_attr["acc_test"]).tolist()
+    else:
+        acc_test = []
+    return GraphData(
+        nodes, compact.edges, node_dict, inv_node_dict, acc_sys, acc_test,
+        init, custom_map=custom_map, compact=compact
     )
 
+
+def setup_nodes_and_edges(virtual, virtual_sys, b_pi, case='static'):
+    GD = graph_data_from_product(virtual, custom_map=virtual.transys.custom_map)
+
     if case != 'static':
         # setup system graph
-        S_nodes = []
-        S_node_dict = {}
-        S_inv_node_dict = {}
-        for i, node in enumerate(virtual_sys.G_initial.nodes):
-            S_nodes.append(i)
-            S_node_dict.update({i: virtual_sys.reverse_Sdict[node]})
-            S_inv_node_dict.update({virtual_sys.reverse_Sdict[node]: i})
-        # find initial state
-        S_init = []
-        for initial in virtual_sys.I:
-            S_init.append(S_inv_node_dict[initial])
-        # find accepting states for system
-        S_acc_sys = []
-        for node in S_nodes:
-            if S_node_dict[node] in virtual_sys.sink:
-                S_acc_sys.append(node)
-        # setup edges
-        S_edges = []
-        for edge in virtual_sys.G_initial.edges:
-            out_node = virtual_sys.reverse_Sdict[edge[0]]
-            in_node = virtual_sys.reverse_Sdict[edge[1]]
-            S_edges.append((S_inv_node_dict[out_node], S_inv_node_dict[in_node]))
-
-        S = GraphData(
-            S_nodes, S_edges, S_node_dict, S_inv_node_dict, S_acc_sys, [], S_init
-        )
+        S = graph_data_from_product(virtual_sys, tester=False)
     else:
         S = None
 
@@ -1,16 +1,63 @@
+import json
+
+
 def find_map_G_S(GD, SD):
-    G_truncated = {}
-    S_annot = {}
+    """
+    Map every node of G to the nodes of S with the same transition system
+    state, using an index of the S nodes by their state.
+
+    Returns:
+        map_G_to_S: Dictionary mapping each node of G to its list of S nodes.
+    """
+    s_nodes = {}
+    for node in SD.node_dict:
+        s_nodes.setdefault(SD.node_dict[node][0], []).append(node)
     map_G_to_S = {}
     for node in GD.node_dict:
-        G_truncated.update({node: GD.node_dict[node][0]})
-    for node in SD.node_dict:
-        S_annot.update({node: SD.node_dict[node][0]})
-    for node in G_truncated:
-        sys_node_list = []
-        for sys_node in S_annot:
-            if G_truncated[node] == S_annot[sys_node]:
-                sys_node_list.append(sys_node)
-        map_G_to_S.update({node: sys_node_list})
+        map_G_to_S.update({node: list(s_nodes.get(GD.node_dict[node][0], []))})
 
     return map_G_to_S
+
+
+def successors_by_state(S, node_dict):
+    """
+    Index of the edges of S by their out node and the transition system
+    state of their in node.
+
+    Args:
+        S: CompactGraph of the virtual system graph.
+        node_dict: Dictionary mapping the nodes of S to their states.
+
+    Returns:
+        successors: Dictionary mapping (out node, state) to the sorted list
+        of the in nodes of the edges.
+    """
+    successors = {}
+    for i, j in zip(S.src.tolist(), S.dst.tolist()):
+        successors.setdefault((i, node_dict[j][0]), []).append(j)
+    for in_nodes in successors.values():
+        in_nodes.sort()
+    return successors
+
+
+def read_cuts(filename):
+    """
+    Read the cut edges stored in a result file (log/opt_data.json).
+
+    Args:
+        filename: Path of the result file.
+
+    Returns:
+        cuts: List of the cut edges (out_state, in_state) named by their
+        product states.
+    """
+    with open(filename, 'r') as fp:
+        data = json.load(fp)
+    return [tuple(as_tuple(state) for state in edge) for edge in data.get("cuts", [])]
+
+
+def as_tuple(value):
+    # json stores the tuples of the state names as lists
+    if isinstance(value, list):
+        return tuple(as_tuple(item) for item in value)
+    return value
@@ -0,0 +1,77 @@
+"""Small static, reactive and grid instances shared by the tests."""
+
+import pytest
+from floras.components.automata import (
+    get_system_automaton,
+    get_tester_automaton,
+    get_product_automaton
+)
+from floras.components.transition_system import TransitionSystemInput, TranSys
+from floras.components.product import sync_prod
+
+
+def virtual_graphs(transition_system_input, sys_formula, test_formula):
+    """Transition system, product automaton and virtual graphs of a problem."""
+    sys_aut, spot_aut_sys = get_system_automaton(sys_formula)
+    test_aut, spot_aut_test = get_tester_automaton(test_formula)
+    prod_aut = get_product_automaton(spot_aut_sys, spot_aut_test)
+    transys = TranSys(transition_system_input)
+    virtual_sys = sync_prod(transys, sys_aut)
+    virtual = sync_prod(transys, prod_aut)
+    return virtual, transys, prod_aut, virtual_sys
+
+
+@pytest.fixture
+def static_problem():
+    states_list = [0, 1, 2, 3, 4, 5]
+    transitions_dict = {0: [1, 2, 3],
+                        1: [2, 3, 4],
+                        2: [3, 4, 5],
+                        3: [4],
+                        4: [5, 0],
+                        5: [5]}
+    labels_dict = {0: ['a'], 5: ['goal'], 3: ['int']}
+    transition_system_input = TransitionSystemInput(
+        states_list, transitions_dict, labels_dict, [0]
+    )
+    return virtual_graphs(transition_system_input, 'F(goal)', 'F(int)')
+
+
+@pytest.fixture
+def reactive_problem():
+    states_list = ['init', 'd1', 'd2', 'int_goal', 'p1', 'p2', 'goal']
+    transitions_dict = {'init': ['d1', 'd2'], 'd1': ['d2', 'int_goal'],
+                        'd2': ['d1', 'int_goal'], 'int_goal': ['p1', 'p2'],
+                        'p1': ['p2', 'goal'], 'p2': ['p1', 'goal'], 'goal': []}
+    labels_dict = {'d1': ['door_1'], 'd2': ['door_2'], 'p1': ['door_1'],
+                   'p2': ['door_2'], 'int_goal': ['beaver'], 'goal': ['goal']}
+    transition_system_input = TransitionSystemInput(
+        states_list, transitions_dict, labels_dict, ['init']
+    )
+    return virtual_graphs(
+        transition_system_input, 'F(beaver & F(goal))', 'F(door_1) & F(door_2)'
+    )
+
+
+@pytest.fixture
+def grid_problem():
+    """
+    Static problem on an open 4 x 4 grid (four neighbors and staying in
+    place) with the goal 'T' and the intermediate states 'I'.
+    """
+    def problem(init, goal, intermediate):
+        states = [(i, j) for i in range(4) for j in range(4)]
+        transitions = {}
+        for i, j in states:
+            transitions[(i, j)] = [
+                (i + di, j + dj)
+                for di, dj in [(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)]
+                if 0 <= i + di < 4 and 0 <= j + dj < 4
+            ]
+        labels = {goal: ['T']}
+        labels.update({state: ['I'] for state in intermediate})
+        transition_system_input = TransitionSystemInput(
+            states, transitions, labels, [init]
+        )
+        return virtual_graphs(transition_system_input, 'F(T)', 'F(I)')
+    return problem
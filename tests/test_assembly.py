@@ -0,0 +1,24 @@
+"""Testing the matrix assembly of the MILP against the tupledict assembly."""
+
+import pytest
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+
+
+@pytest.mark.parametrize('problem, case', [
+    ('static_problem', 'static'), ('reactive_problem', 'reactive')
+])
+def test_matrix_matches_tupledict(problem, case, request):
+    virtual, transys, prod_aut, virtual_sys = request.getfixturevalue(problem)
+    GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case=case)
+    results = {}
+    for assembly in ['matrix', 'tupledict']:
+        milp = MILP(GD, SD, case, callback=None, assembly=assembly)
+        d, flow, exit_status = milp.optimize()
+        assert exit_status == 'opt'
+        results[assembly] = (milp.model.ObjVal, flow, d)
+
+    objective, flow, d = results['matrix']
+    assert objective == pytest.approx(results['tupledict'][0])
+    assert flow == results['tupledict'][1]
+    assert d == results['tupledict'][2]
@@ -0,0 +1,25 @@
+"""Testing the compiled transition tables of the automata."""
+
+from itertools import combinations
+import spot
+from floras.components.automata import (
+    get_system_automaton,
+    get_tester_automaton,
+    get_product_automaton
+)
+
+
+def test_transition_table_matches_containment():
+    sys_aut, spot_aut_sys = get_system_automaton('F(beaver & F(goal))')
+    test_aut, spot_aut_test = get_tester_automaton('F(door_1) & F(door_2 | goal)')
+    prod_aut = get_product_automaton(spot_aut_sys, spot_aut_test)
+
+    props = [spot.formula.ap(name) for name in ['beaver', 'goal', 'door_1', 'door_2']]
+    labels = [set(c) for r in range(len(props) + 1) for c in combinations(props, r)]
+    for aut in [sys_aut, test_aut, prod_aut]:
+        for q in aut.Q:
+            for label in labels:
+                expected = aut.get_transition_by_containment(q, label)
+                assert aut.get_transition(q, label) == expected
+                # second lookup is served from the table
+                assert aut.get_transition(q, label) == expected
@@ -0,0 +1,58 @@
+"""Testing the HiGHS backend against the Gurobi backend and without gurobipy."""
+
+import sys
+import importlib
+import pytest
+import floras.optimization
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+
+
+@pytest.mark.parametrize('problem, case', [
+    ('static_problem', 'static'), ('reactive_problem', 'reactive')
+])
+def test_highs_matches_gurobi(problem, case, request):
+    virtual, transys, prod_aut, virtual_sys = request.getfixturevalue(problem)
+    GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case=case)
+    results = {}
+    for backend in ['gurobi', 'highs']:
+        milp = MILP(GD, SD, case, callback=None, backend=backend)
+        d, flow, exit_status = milp.optimize()
+        assert exit_status == 'opt'
+        assert milp.data["status"] == 'optimal'
+        results[backend] = (milp.form.c @ milp.solver.values(), flow, d)
+
+    objective, flow, d = results['highs']
+    assert objective == pytest.approx(results['gurobi'][0])
+    assert flow == results['gurobi'][1]
+    # the solvers may pick different cuts of the same size
+    assert len(d) == len(results['gurobi'][2])
+    if case == 'static':
+        assert d == results['gurobi'][2]
+
+
+def test_highs_without_gurobipy(static_problem, monkeypatch):
+    virtual, transys, prod_aut, virtual_sys = static_problem
+    GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case='static')
+    d_gurobi, flow_gurobi, _ = MILP(GD, SD, 'static', callback=None).optimize()
+
+    # import the optimization modules again with gurobipy unavailable, the
+    # modules and package attributes are restored after the test
+    monkeypatch.setitem(sys.modules, 'gurobipy', None)
+    modules = [name for name in sys.modules if name.startswith('floras.optimization.')]
+    for name in modules:
+        monkeypatch.delitem(sys.modules, name)
+        module = name.rsplit('.', 1)[1]
+        monkeypatch.setattr(floras.optimization, module,
+                            getattr(floras.optimization, module))
+    optimize = importlib.import_module('floras.optimization.optimize')
+
+    d, flow = optimize.solve(
+        virtual, transys, prod_aut, virtual_sys, case='static', backend='highs',
+        callback=None
+    )
+    assert flow == flow_gurobi
+    assert d == d_gurobi
+    # the gurobi backend falls back to highs
+    milp = optimize.MILP(GD, SD, 'static', callback=None)
+    assert milp.backend == 'highs'
@@ -0,0 +1,79 @@
+"""Testing the Benders decomposition."""
+
+import time
+import numpy as np
+from floras.optimization.benders import (
+    flow_cut, solve_benders, BendersDecomposition, BendersResult
+)
+from floras.optimization.callbacks import TerminationPolicy
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+from floras.optimization.optimize import solve
+import floras.optimization.optimize as optimize_module
+
+# two paths from the source 0 to the sink 3 joined by the edge (1, 2)
+SRC = np.array([0, 0, 1, 1, 2])
+DST = np.array([1, 2, 2, 3, 3])
+
+
+def test_flow_cut():
+    flow_value, flows, crossing = flow_cut(4, SRC, DST, np.ones(5), [0], [3])
+    assert flow_value == 2
+    assert flows[[0, 1]].sum() == 2
+    assert crossing.sum() == 2
+
+    # cutting the edge (2, 3) leaves one unit through (1, 3)
+    capacity = np.array([1, 1, 1, 1, 0])
+    flow_value, flows, crossing = flow_cut(4, SRC, DST, capacity, [0], [3])
+    assert flow_value == 1
+    assert flows[4] == 0
+    # the capacities of the crossing edges add up to the flow
+    assert capacity[crossing].sum() == 1
+
+
+def test_benders_fallback(reactive_problem, monkeypatch):
+    # without a solution from the decomposition the MILP is solved
+    def no_solution(milp, workers=None, time_limit=None):
+        return {}, 0, 'not solved'
+    monkeypatch.setattr(optimize_module, 'solve_benders', no_solution)
+    virtual, transys, prod_aut, virtual_sys = reactive_problem
+    d_milp, flow_milp = solve(
+        virtual, transys, prod_aut, virtual_sys, case='reactive', callback=None
+    )
+    d, flow = solve(
+        virtual, transys, prod_aut, virtual_sys, case='reactive', mode='benders',
+        callback=None
+    )
+    assert flow == flow_milp
+    assert len(d) == len(d_milp)
+
+
+def test_benders_policy(reactive_problem):
+    virtual, transys, prod_aut, virtual_sys = reactive_problem
+    GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case='reactive')
+    d_milp, flow_milp, _ = MILP(GD, SD, 'reactive', callback=None).optimize()
+
+    milp = MILP(GD, SD, 'reactive', callback=None)
+    d, flow, exit_status = solve_benders(milp, workers=1)
+    assert exit_status == 'opt'
+    assert flow == flow_milp
+    assert len(d) == len(d_milp)
+
+    # the time limit of the policy stops the decomposition
+    milp = MILP(GD, SD, 'reactive', callback=TerminationPolicy(time_limit=0))
+    d, flow, exit_status = solve_benders(milp, workers=1)
+    assert exit_status == 'not solved'
+    assert milp.data["term_condition"] == "Timeout"
+    assert milp.data["benders_iterations"] == 0
+
+    # the gap and the stall of the policy are applied to the best solution
+    decomposition = BendersDecomposition(milp, workers=1)
+    best = BendersResult(None, np.zeros(len(milp.model_edges)), 1.0, 0.9, 1.0, 1)
+    policy = TerminationPolicy(gap=0.2, stall=None)
+    assert decomposition.policy_met(policy, best, 1.0, time.time()) == "Mipgap low"
+    policy = TerminationPolicy(gap=0.05, stall=None)
+    assert decomposition.policy_met(policy, best, 1.0, time.time()) is None
+    policy = TerminationPolicy(stall=10)
+    assert decomposition.policy_met(
+        policy, best, 1.0, time.time() - 20
+    ) == "Obj not changing"
@@ -0,0 +1,25 @@
+"""Testing the incumbent file of the checkpoints."""
+
+import json
+import pytest
+from floras.optimization.checkpoint import Checkpoint, INCUMBENT_FILE
+
+
+def strict_json(path):
+    def reject(constant):
+        raise ValueError(constant)
+    with open(path, 'r') as fp:
+        return json.load(fp, parse_constant=reject)
+
+
+@pytest.mark.parametrize('bound, expected', [
+    (None, None), (float('inf'), None), (float('-inf'), None), (2.5, 2.5)
+])
+def test_unknown_bound_is_null(tmp_path, bound, expected):
+    checkpoint = Checkpoint(str(tmp_path))
+    checkpoint.incumbent = {"flow": 1.0, "ncuts": 2, "cuts": []}
+    checkpoint.bound = bound
+    checkpoint.write()
+    incumbent = strict_json(tmp_path / INCUMBENT_FILE)
+    assert incumbent["bound"] == expected
+    assert incumbent["status"] == 'running'
@@ -0,0 +1,67 @@
+"""Testing the decomposition of the product graph by automaton layers."""
+
+from floras.optimization.setup_graphs import GraphData, setup_nodes_and_edges
+from floras.optimization.decompose import (
+    automaton_layers, LayerDecomposition, solve_decomposed
+)
+from floras.optimization.optimize import solve
+
+
+def chain(back_edge=False):
+    # s -> i -> t with the automaton states q0 -> q1 -> q2, the tester
+    # accepts in q1
+    node_dict = {0: ('s', 'q0'), 1: ('i', 'q1'), 2: ('t', 'q2')}
+    edges = [(0, 1), (1, 2)] + ([(1, 0)] if back_edge else [])
+    inv_node_dict = {state: node for node, state in node_dict.items()}
+    return GraphData([0, 1, 2], edges, node_dict, inv_node_dict, [2], [1, 2], [0])
+
+
+def test_automaton_layers():
+    decomposition = LayerDecomposition(chain())
+    assert automaton_layers(chain()).tolist() == [0, 1, 2]
+    assert decomposition.valid
+    assert [size["side"] for size in decomposition.sizes()] == [
+        'before', 'after', 'after'
+    ]
+
+    # q0 and q1 are one layer, which is before and after the tester accepts
+    decomposition = LayerDecomposition(chain(back_edge=True))
+    assert automaton_layers(chain(back_edge=True)).tolist() == [0, 0, 1]
+    assert not decomposition.valid
+    assert 'layer 0' in decomposition.reason
+
+
+def test_decomposed_reactive(reactive_problem):
+    virtual, transys, prod_aut, virtual_sys = reactive_problem
+    d_milp, flow_milp = solve(
+        virtual, transys, prod_aut, virtual_sys, case='reactive', callback=None
+    )
+    GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case='reactive')
+    d, flow, exit_status = solve_decomposed(GD, SD, 'reactive', callback=None)
+    # the stitched cut keeps the flow of the sub-problem
+    assert exit_status == 'opt'
+    assert flow == flow_milp
+    assert len(d) == len(d_milp)
+
+    d, flow = solve(
+        virtual, transys, prod_aut, virtual_sys, case='reactive', callback=None,
+        decomposition=True
+    )
+    assert flow == flow_milp
+    assert len(d) == len(d_milp)
+
+
+def test_decomposed_fallback(static_problem):
+    # the static coupling links the layers, the monolithic model is solved
+    virtual, transys, prod_aut, virtual_sys = static_problem
+    GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case='static')
+    assert solve_decomposed(GD, SD, 'static', callback=None)[2] == 'not solved'
+    d_milp, flow_milp = solve(
+        virtual, transys, prod_aut, virtual_sys, case='static', callback=None
+    )
+    d, flow = solve(
+        virtual, transys, prod_aut, virtual_sys, case='static', callback=None,
+        decomposition=True
+    )
+    assert flow == flow_milp
+    assert len(d) == len(d_milp)
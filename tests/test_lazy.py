@@ -0,0 +1,23 @@
+"""Testing the reachability check of the lazy reactive constraints."""
+
+import numpy as np
+from floras.components.compact_graph import CompactGraph
+from floras.optimization.lazy import SReachability
+
+
+def test_s_reachability():
+    # two paths from the source 0 to the sink 3 of S
+    S = CompactGraph(4, [0, 1, 0, 2], [1, 3, 2, 3])
+    s_edges = np.array([S.edge_id(1, 3), S.edge_id(2, 3), S.edge_id(2, 3)])
+    g_edges = np.array([0, 1, 2])
+    check = SReachability(S, [3], [('fS_q1_0', 'q1', 0)], {'q1': (s_edges, g_edges)})
+
+    assert check.violated([0, 0, 0]) == []
+    assert check.violated([1, 0, 0]) == []
+    assert check.violated([0, 1, 1]) == []
+    for d_vals in [[1, 1, 0], [1, 1, 1], [1, 0, 1]]:
+        cuts = check.violated(d_vals)
+        assert len(cuts) == 1
+        # the candidate violates the constraint: all of its edges are cut
+        assert np.all(np.asarray(d_vals)[cuts[0]] == 1)
+        assert 0 in cuts[0] and len(cuts[0]) == 2
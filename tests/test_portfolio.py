@@ -0,0 +1,24 @@
+"""Testing the portfolio with a failing member and a time limit."""
+
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+
+
+def test_failed_member(static_problem):
+    virtual, transys, prod_aut, virtual_sys = static_problem
+    GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case='static')
+    d_milp, flow_milp, _ = MILP(GD, SD, 'static', callback=None).optimize()
+
+    # the second member raises an error for the unknown parameter
+    milp = MILP(
+        GD, SD, 'static', callback=None, portfolio=[{'Seed': 0}, {'NoSuchParam': 1}]
+    )
+    d, flow, exit_status = milp.optimize(time_limit=60)
+    assert exit_status == 'opt'
+    assert flow == flow_milp
+    assert len(d) == len(d_milp)
+    runs = {run['config'].get('Seed'): run for run in milp.data['portfolio_runs']}
+    assert runs[0]['status'] == 'optimal'
+    assert runs[None]['status'] == 'failed'
+    assert runs[None]['term_condition'].startswith('error')
+    assert milp.data['portfolio_winner'] == {'Seed': 0}
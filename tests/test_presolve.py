@@ -0,0 +1,47 @@
+"""Testing the presolve of the virtual product graph."""
+
+import numpy as np
+from floras.components.compact_graph import CompactGraph
+from floras.optimization.presolve import presolve
+
+# source 0, intermediate node 4, sink 5, dead end 6 and unreachable node 7
+EDGES = [(0, 1), (1, 2), (2, 4), (0, 4), (4, 5), (4, 3), (3, 5), (0, 6), (7, 5)]
+
+
+def example_graph():
+    src, dst = zip(*EDGES)
+    return CompactGraph(8, src, dst)
+
+
+def test_presolve_trim():
+    G = example_graph()
+    reduction = presolve(G, [0], [5], [4])
+
+    assert set(reduction.graph.nodes) == {0, 1, 2, 3, 4, 5}
+    assert set(reduction.graph.edges) == set(EDGES[:7])
+    assert np.all(reduction.capacity == 1)
+    assert reduction.stats["trimmed_nodes"] == 2
+    assert reduction.stats["chains"] == 0
+
+
+def test_presolve_contract():
+    G = example_graph()
+    edges = G.edges
+    reduction = presolve(G, [0], [5], [4], classes=np.arange(len(edges)))
+
+    assert reduction.graph.edges == [(0, 4), (4, 5)]
+    assert np.all(reduction.capacity == 2)
+    assert np.all(reduction.contracted)
+    # a cut of a reduced edge cuts one edge of every parallel path
+    for (u, v), origins in zip(reduction.graph.edges, reduction.cut_origins):
+        assert len(origins) == 2
+        assert (u, v) in [edges[e] for e in origins]
+    assert reduction.stats["chains"] == 2
+    assert reduction.stats["merged_edges"] == 2
+
+    # coupled cuts are not contracted
+    classes = np.arange(len(edges))
+    classes[edges.index((3, 5))] = classes[edges.index((1, 2))]
+    reduction = presolve(G, [0], [5], [4], classes=classes)
+    assert reduction.stats["chains"] == 0
+    assert reduction.graph.number_of_edges() == 7
@@ -0,0 +1,95 @@
+"""Testing the exploration of the product against the previous exploration."""
+
+import pytest
+from floras.components.automata import (
+    get_system_automaton,
+    get_tester_automaton,
+    get_product_automaton
+)
+from floras.components.transition_system import TransitionSystemInput, TranSys
+from floras.components.product import Product
+
+
+def grid_transys(rows, cols):
+    states = [(i, j) for i in range(rows) for j in range(cols)]
+    transitions = {}
+    for i, j in states:
+        transitions[(i, j)] = [
+            (i + di, j + dj) for di, dj in [(0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)]
+            if 0 <= i + di < rows and 0 <= j + dj < cols
+        ]
+    labels = {(0, cols - 1): ['T'], (0, 0): ['I'], (rows - 1, cols - 1): ['I']}
+    return TranSys(TransitionSystemInput(states, transitions, labels, [(rows - 1, 0)]))
+
+
+def legacy_explore(prod):
+    """The exploration loop of Product.pruned_sync_prod before indexing."""
+    prod.E = dict()
+    aut_state_edges = [(si[0], sj) for si, sj in prod.automaton.delta.items()]
+    nodes_to_add = [(prod.transys.I[0], prod.automaton.qinit)]
+    nodes_to_keep = list(nodes_to_add)
+    while len(nodes_to_add) > 0:
+        next_nodes = []
+        for (s, q) in nodes_to_add:
+            for a in prod.transys.A:
+                if (s, a) in list(prod.transys.E.keys()):
+                    t = prod.transys.E[(s, a)]
+                    for p in prod.automaton.Q:
+                        if (q, p) in aut_state_edges:
+                            label = prod.transys.L[t]
+                            if prod.automaton.get_transition(q, label) == p:
+                                prod.E[((s, q), a)] = (t, p)
+                                if (t, p) not in nodes_to_keep:
+                                    nodes_to_keep.append((t, p))
+                                    next_nodes.append((t, p))
+        nodes_to_add = next_nodes
+    return nodes_to_keep
+
+
+@pytest.mark.parametrize('int_ids', [False, True])
+def test_explore_matches_legacy(int_ids):
+    transys = grid_transys(3, 4)
+    sys_aut, spot_aut_sys = get_system_automaton('F(T)')
+    test_aut, spot_aut_test = get_tester_automaton('F(I)')
+    prod_aut = get_product_automaton(spot_aut_sys, spot_aut_test)
+
+    for aut in [sys_aut, prod_aut]:
+        legacy = Product(transys, aut)
+        legacy_nodes = legacy_explore(legacy)
+
+        prod = Product(transys, aut, int_ids=int_ids)
+        prod.pruned_sync_prod()
+
+        # same states in the same order, same transitions
+        assert prod.S == legacy_nodes
+        assert list(prod.E.items()) == list(legacy.E.items())
+
+        # states numbered in the order of discovery
+        ids = [k if int_ids else 's' + str(k) for k in range(len(prod.S))]
+        assert list(prod.Sdict.items()) == list(zip(prod.S, ids))
+        assert list(prod.reverse_Sdict.items()) == list(zip(ids, prod.S))
+
+        # G on the product states matches the previous transitions
+        name = prod.reverse_Sdict
+        assert {name[node] for node in prod.G.nodes} == set(legacy_nodes)
+        edges = {
+            (name[u], name[v]): act for u, v, act in prod.G.edges(data='act')
+        }
+        assert edges == {
+            (state_act[0], in_node): state_act[1]
+            for state_act, in_node in legacy.E.items()
+        }
+        assert sorted(prod.graph.edges) == sorted(
+            (prod.S.index(u), prod.S.index(v)) for u, v in edges
+        )
+
+        # every automaton move is computed once per label class
+        label_class = {s: frozenset(map(str, label)) for s, label in transys.L.items()}
+        moves = [
+            (q, label_class[t]) for (s, q) in prod.S
+            for (s_out, a), t in transys.E.items() if s_out == s
+        ]
+        stats = prod.label_cache_stats
+        assert stats['label_classes'] == len(set(label_class.values()))
+        assert stats['misses'] == len(set(moves))
+        assert stats['hits'] + stats['misses'] == len(moves)
@@ -0,0 +1,59 @@
+"""Testing the graph data setup for the optimization."""
+
+import random
+import networkx as nx
+from floras.optimization.setup_graphs import GraphData
+from floras.optimization.utils import find_map_G_S, successors_by_state
+
+
+def do_not_cut_by_paths(G, acc_sys, acc_test):
+    do_not_cut = []
+    for edge in G.edges:
+        reach_T = any(nx.has_path(G, edge[0], accsys) for accsys in acc_sys)
+        reach_I = any(nx.has_path(G, edge[0], acctest) for acctest in acc_test)
+        if reach_T and not reach_I:
+            do_not_cut.append(edge)
+    return do_not_cut
+
+
+def test_do_not_cut_edges():
+    rng = random.Random(0)
+    for _ in range(50):
+        n = rng.randint(1, 12)
+        edges = list({(rng.randrange(n), rng.randrange(n)) for _ in range(3 * n)})
+        acc_sys = rng.sample(range(n), rng.randint(0, n))
+        acc_test = rng.sample(range(n), rng.randint(0, n))
+        GD = GraphData(list(range(n)), edges, {}, {}, acc_sys, acc_test, [0])
+
+        assert GD.do_not_cut == do_not_cut_by_paths(GD.graph, acc_sys, acc_test)
+        for node in range(n):
+            assert GD.coreach_sys[node] == any(
+                nx.has_path(GD.graph, node, accsys) for accsys in acc_sys
+            )
+
+
+def test_map_G_S():
+    rng = random.Random(1)
+    for _ in range(20):
+        n_G, n_S = rng.randint(1, 15), rng.randint(1, 10)
+        G_dict = {k: (rng.randrange(5), 'q' + str(rng.randrange(3)))
+                  for k in range(n_G)}
+        S_dict = {k: (rng.randrange(5), 'q0') for k in range(n_S)}
+        S_edges = list(
+            {(rng.randrange(n_S), rng.randrange(n_S)) for _ in range(2 * n_S)}
+        )
+        GD = GraphData(list(range(n_G)), [], G_dict, {}, [], [], [0])
+        SD = GraphData(list(range(n_S)), S_edges, S_dict, {}, [], [], [0])
+
+        map_G_to_S = find_map_G_S(GD, SD)
+        successors = successors_by_state(SD.compact, S_dict)
+        for i in range(n_G):
+            assert map_G_to_S[i] == [
+                s for s in range(n_S) if S_dict[s][0] == G_dict[i][0]
+            ]
+            for imap in range(n_S):
+                for state in range(5):
+                    assert successors.get((imap, state), []) == [
+                        jmap for jmap in range(n_S)
+                        if (imap, jmap) in S_edges and S_dict[jmap][0] == state
+                    ]
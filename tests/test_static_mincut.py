@@ -0,0 +1,80 @@
+"""Testing the min-cut solver in static setup against the MILP."""
+
+import numpy as np
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+from floras.optimization.mincut import MinCutResult, mincut, solve_mincut
+from floras.optimization.optimize import solve
+import floras.optimization.mincut as mincut_module
+
+
+def milp_and_mincut(virtual, transys, prod_aut, virtual_sys):
+    d_milp, flow_milp = solve(
+        virtual, transys, prod_aut, virtual_sys, case='static', callback=None
+    )
+    GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case='static')
+    result = mincut(MILP(GD, SD, 'static', callback=None))
+    d, flow = solve(
+        virtual, transys, prod_aut, virtual_sys, case='static', mode='mincut',
+        callback=None
+    )
+    return (d_milp, flow_milp), result, (d, flow)
+
+
+def test_static_mincut(static_problem):
+    (d_milp, flow_milp), result, (d, flow) = milp_and_mincut(*static_problem)
+
+    # the flow reaches the bound, the number of cuts is not proven minimal
+    assert result.status == 'flow-optimal'
+    assert result.flow == result.bound == flow_milp
+    assert flow == flow_milp
+    # the same number of cuts gives the same objective
+    assert len(d) == len(d_milp) == result.ncuts
+
+
+def test_coupled_grid(grid_problem):
+    # the goal is next to the initial state, so the transition between them
+    # can never be protected with the static coupling
+    problem = grid_problem((1, 3), (0, 3), [(2, 3), (0, 1)])
+    (d_milp, flow_milp), result, (d, flow) = milp_and_mincut(*problem)
+
+    assert flow_milp == 1.0
+    assert result.status == 'feasible'
+    assert result.flow == flow_milp
+    assert result.bound >= flow_milp
+    assert flow == flow_milp
+    assert len(d) == len(d_milp)
+
+
+def test_mincut_exit_status(static_problem):
+    # a maximum flow with cuts is reported as feasible, not optimal
+    virtual, transys, prod_aut, virtual_sys = static_problem
+    GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case='static')
+    milp = MILP(GD, SD, 'static', callback=None)
+    d, flow, exit_status = solve_mincut(milp)
+    assert exit_status == 'feasible'
+    assert milp.data["status"] == 'flow-optimal'
+    assert milp.data["exit_status"] == 'feasible'
+    assert milp.data["flow"] == flow
+    assert milp.data["ncuts"] == len(d)
+
+
+def test_mincut_fallback(static_problem, monkeypatch):
+    # without a flow from the min-cut solver the MILP is solved
+    def no_flow(milp, coupling=None):
+        n_edges = len(milp.model_edges)
+        return MinCutResult(
+            np.zeros(n_edges), np.zeros(n_edges), np.zeros(0), 0.0, 1.0,
+            milp.cut_weights
+        )
+    monkeypatch.setattr(mincut_module, 'mincut', no_flow)
+    virtual, transys, prod_aut, virtual_sys = static_problem
+    d_milp, flow_milp = solve(
+        virtual, transys, prod_aut, virtual_sys, case='static', callback=None
+    )
+    d, flow = solve(
+        virtual, transys, prod_aut, virtual_sys, case='static', mode='mincut',
+        callback=None
+    )
+    assert flow == flow_milp
+    assert d == d_milp
@@ -0,0 +1,46 @@
+"""Testing the LP relaxation and rounding in static setup against the MILP."""
+
+import pytest
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+from floras.optimization.relax import solve_relax
+from floras.optimization.optimize import solve
+
+
+def milp_and_relax(virtual, transys, prod_aut, virtual_sys):
+    GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case='static')
+    milp = MILP(GD, SD, 'static', callback=None)
+    d_milp, flow_milp, _ = milp.optimize()
+    relax = MILP(GD, SD, 'static', callback=None)
+    d, flow, exit_status = solve_relax(relax)
+    return (d_milp, flow_milp, milp.model.ObjVal), (d, flow, exit_status), relax
+
+
+def test_static_relax(static_problem):
+    (d_milp, flow_milp, objective), (d, flow, exit_status), relax = milp_and_relax(
+        *static_problem
+    )
+
+    # the LP bound is above the objective, the cut is not proven optimal
+    assert exit_status == 'feasible'
+    assert relax.data["relax_bound"] > objective
+    assert flow == flow_milp
+    assert len(d) == len(d_milp)
+    assert relax.data["relax_objective"] == pytest.approx(objective)
+    assert relax.data["relax_bound"] >= objective - 1e-6
+
+
+def test_relax_fallback(grid_problem):
+    # the goal is next to the initial state and the rounding of the LP cut
+    # finds no feasible cut, the MILP is solved instead
+    problem = grid_problem((0, 0), (0, 1), [(3, 3), (0, 3)])
+    (d_milp, flow_milp, objective), (d, flow, exit_status), relax = milp_and_relax(
+        *problem
+    )
+    assert flow_milp == 1.0
+    assert exit_status == 'not solved'
+    assert relax.data["relax_bound"] >= objective - 1e-6
+
+    d, flow = solve(*problem, case='static', mode='relax', callback=None)
+    assert flow == flow_milp
+    assert len(d) == len(d_milp)
@@ -0,0 +1,35 @@
+"""Testing the MIP start of a cut set against the constraints of the model."""
+
+import numpy as np
+import pytest
+from floras.optimization.setup_graphs import setup_nodes_and_edges
+from floras.optimization.optimization import MILP
+
+
+@pytest.mark.parametrize('problem, case', [
+    ('static_problem', 'static'), ('reactive_problem', 'reactive')
+])
+def test_cut_start_is_feasible(problem, case, request):
+    virtual, transys, prod_aut, virtual_sys = request.getfixturevalue(problem)
+    GD, SD = setup_nodes_and_edges(virtual, virtual_sys, prod_aut, case=case)
+    d, flow, _ = MILP(GD, SD, case, callback=None).optimize()
+
+    # the reactive model without the flows on S has only d, f and m
+    milp = MILP(GD, SD, case, callback=None, lazy=case == 'reactive')
+    milp.setup_model()
+    d_vals = milp.cut_start(d)
+    start_flow, f_vals, m_vals = milp.start_values(d_vals)
+    assert start_flow == flow
+
+    form = milp.form
+    x = np.zeros(form.n_vars)
+    x[milp.flow_cols] = f_vals
+    cuttable = milp.cut_cols >= 0
+    x[milp.cut_cols[cuttable]] = d_vals[cuttable]
+    x[form.var_blocks['m']] = m_vals
+    row_lb, row_ub = form.row_bounds()
+    Ax = form.A @ x
+    assert np.all(x >= form.lb - 1e-9) and np.all(x <= form.ub + 1e-9)
+    assert np.all(Ax >= row_lb - 1e-9) and np.all(Ax <= row_ub + 1e-9)
+    if case == 'reactive':
+        assert not milp.s_reachability_check().violated(d_vals)